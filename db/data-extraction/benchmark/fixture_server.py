@@ -0,0 +1,144 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import time
+
+# Path the site is served under, the same as on joeeitel.com.
+SITE_PATH = '/hsfoot/'
+
+
+class FixtureServer:
+    """
+    Serves a fixed set of pages from a local HTTP server, so that the scraper
+    can be run end to end without the network. Unknown pages get a 404.
+
+    It can also stand in for a site that throttles its clients: requests over
+    `throttle_rate` per second get a 429, with a Retry-After header.
+
+    Used as a context manager:
+
+        with FixtureServer(pages) as server:
+            scraper = Scraper(base_url = server.base_url)
+    """
+
+    def __init__(
+        self,
+        pages: Dict[str, str],
+        delay: float = 0.0,
+        port: int = 0,
+        throttle_rate: float = None,
+        retry_after: Optional[int] = 1,
+    ) -> None:
+        """
+        Args:
+            pages (Dict[str, str]): The html of each page keyed by its link
+                relative to the base url.
+            delay (float): Seconds every response is held back for, to mimic
+                the latency of the real site.
+            port (int): Port to listen on. Defaults to any free port.
+            throttle_rate (float): Requests per second above which requests are
+                answered with a 429. Never throttles if None.
+            retry_after (Optional[int]): Seconds sent in the Retry-After header of
+                a 429. No header is sent if None.
+
+        Returns:
+            None
+        """
+
+        self.pages = {link: page.encode('utf-8') for link, page in pages.items()}
+        self.delay = delay
+        self.requests = 0
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.throttled = 0
+
+        # A token bucket holding up to a second's worth of requests.
+        self._tokens = throttle_rate or 0.0
+        self._last_refill = time.monotonic()
+        self._lock = Lock()
+
+        server = self
+
+        class FixtureRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            # The headers and the body are written separately, which stalls
+            # keep-alive connections on delayed ACKs unless Nagle is disabled.
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                if server.delay:
+                    time.sleep(server.delay)
+
+                if not server.take_token():
+                    self.send_response(429)
+                    if server.retry_after is not None:
+                        self.send_header('Retry-After', str(server.retry_after))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                split_url = urlsplit(self.path)
+                link = split_url.path[len(SITE_PATH) : ] if split_url.path.startswith(SITE_PATH) else None
+                if link is not None and split_url.query:
+                    link += '?' + split_url.query
+
+                body = server.pages.get(link)
+
+                if body is None:
+                    self.send_response(404)
+                    body = b'Not found'
+                else:
+                    self.send_response(200)
+
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self._http_server = ThreadingHTTPServer(('127.0.0.1', port), FixtureRequestHandler)
+        self._http_server.daemon_threads = True
+        self._thread = Thread(target = self._http_server.serve_forever, daemon = True)
+
+    def take_token(self) -> bool:
+        """Counts a request, and returns whether it is let through."""
+
+        with self._lock:
+            self.requests += 1
+
+            if self.throttle_rate is None:
+                return True
+
+            now = time.monotonic()
+            self._tokens = min(self.throttle_rate, self._tokens + (now - self._last_refill) * self.throttle_rate)
+            self._last_refill = now
+
+            if self._tokens < 1:
+                self.throttled += 1
+                return False
+
+            self._tokens -= 1
+            return True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._http_server.server_address[ : 2]
+        return f'http://{host}:{port}{SITE_PATH}'
+
+    def start(self) -> 'FixtureServer':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._http_server.shutdown()
+        self._http_server.server_close()
+
+    def __enter__(self) -> 'FixtureServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,182 @@
+from typing import Dict, List, Tuple
+import json
+import random
+
+# Absolute links to the real site are mixed in with relative ones, the same as
+# on joeeitel.com.
+SITE_URL = 'http://www.joeeitel.com/hsfoot/'
+
+ROMAN_NUMERALS = ['I', 'II', 'III', 'IV', 'V', 'VI', 'VII']
+
+# Seasons scraped by DataframeBuilderOne and DataframeBuilderTwo respectively.
+LAYOUT_ONE_SEASONS = ['2000', '2001', '2015']
+LAYOUT_TWO_SEASONS = ['2005', '2008']
+
+# A team whose schedule page is broken, like some of the links on the site.
+BROKEN_TEAM_ID = 13
+
+ScheduleRow = Tuple[str, str, str, str, str, str, str]
+
+
+def get_team_name(team_id: int) -> str:
+    return f'Town{team_id} School'
+
+
+def build_schedule_rows(team_id: int, n_teams: int, rng: random.Random) -> List[ScheduleRow]:
+    """Returns ten regular season games, plus a playoff game for some of the teams."""
+
+    rows: List[ScheduleRow] = []
+
+    for week in range(10):
+        opponent_id = rng.randrange(1, n_teams + 1)
+        if opponent_id == team_id:
+            opponent_id = opponent_id % n_teams + 1
+
+        points_for, points_against = rng.randrange(0, 50), rng.randrange(0, 50)
+        result = 'W' if points_for > points_against else 'L' if points_for < points_against else 'T'
+        marker = '*' if week == 0 and team_id % 3 == 0 else ''
+
+        rows.append((
+            f'Aug {20 + week}' if week < 2 else f'Sep {week}',
+            rng.choice(['@', 'vs']),
+            f'{get_team_name(opponent_id)}{marker}',
+            '',
+            result,
+            f'{points_for}-{points_against}',
+            '',
+        ))
+
+    if team_id % 4 == 0:
+        rows.append(('Nov 5', 'vs', f'{get_team_name(team_id + 1)}#', '', 'W', '21-7', 'playoff'))
+
+    return rows
+
+
+def build_table_rows(rows: List[ScheduleRow]) -> str:
+    return ''.join('<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>' for row in rows)
+
+
+def build_layout_one_page(season: str, team_id: int, rows: List[ScheduleRow]) -> str:
+    """Team schedule page in the layout of seasons 2000, 2001, and 2013-2023."""
+
+    table_rows = build_table_rows(rows)
+    table_rows += '<tr><td colspan="7">* - game does not count in OHSAA rankings</td></tr>'
+    table_rows += '<tr><td colspan="7"># - Ohio playoff game</td></tr>'
+
+    county = '' if team_id % 7 == 0 else f'\nCounty{team_id % 5} County'
+    division = '' if team_id % 11 == 0 else \
+        f'\nOHSAA Division {ROMAN_NUMERALS[team_id % 6]}, Region {team_id % 12 + 1}'
+
+    return (
+        f'<html><body><div id="header" style="background-color:#{team_id:06x};color:#ffffff">'
+        f'<h2>{get_team_name(team_id)} Mascots{team_id}</h2></div>'
+        f'<h3>City{team_id}, OH{county}{division}\n</h3>'
+        f'<table><caption>{season} {get_team_name(team_id)} Football Schedule</caption>{table_rows}</table>'
+        f'<p>footer</p></body></html>'
+    )
+
+
+def build_layout_two_page(season: str, team_id: int, rows: List[ScheduleRow]) -> str:
+    """Team schedule page in the table-based layout of seasons 2002-2012."""
+
+    table_rows = f'<tr><td colspan="7">{season} Schedule</td></tr>' + build_table_rows(rows)
+    table_rows += '<tr><td colspan="7">* - game does not count in OHSAA rankings</td></tr>'
+
+    county = '' if team_id % 7 == 0 else f'<br/>County{team_id % 5} County'
+
+    return (
+        f'<html><body><table><tr><td valign="Top" bgcolor="#{team_id:06x}">'
+        f'<font color="#ffffff" size="5"><b>{get_team_name(team_id)} Mascots{team_id}</b></font>'
+        f'<font size="2">{get_team_name(team_id)} Mascots{team_id}<br/>City{team_id}, OH{county}'
+        f'<br/>OHSAA Division {ROMAN_NUMERALS[team_id % 6]}, Region {team_id % 12 + 1}</font>'
+        f'</td></tr></table>'
+        f'<table><tr><td bgcolor="#ffffff">{get_team_name(team_id)}{season} Football</td></tr></table>'
+        f'<table><tr><td>nav</td></tr></table><table><tr><td>ads</td></tr></table>'
+        f'<table>{table_rows}</table></body></html>'
+    )
+
+
+def build_fixture_site(
+    n_teams: int = 40,
+    n_regions: int = 4,
+    seasons: List[str] = LAYOUT_ONE_SEASONS + LAYOUT_TWO_SEASONS,
+    seed: int = 7,
+) -> Dict[str, str]:
+    """
+    Builds a copy of joeeitel.com with both page layouts. The pages are
+    generated from a fixed seed, so every run serves the exact same pages.
+
+    Args:
+        n_teams (int): Number of teams per season.
+        n_regions (int): Number of region homepages per season.
+        seasons (List[str]): The seasons of the site.
+        seed (int): Seed of the generated schedules.
+
+    Returns:
+        pages (Dict[str, str]): The html of each page keyed by its link
+            relative to the base url, e.g. 'index.php?season=2015'.
+    """
+
+    rng = random.Random(seed)
+    team_ids = list(range(1, n_teams + 1))
+
+    pages = {
+        '': '<html><body><div class="previous">'
+            + ''.join(f'<a href="index.php?season={season}">{season}</a>' for season in seasons)
+            + '</div></body></html>',
+    }
+
+    for season in seasons:
+        if season == '2000':
+            pages[f'index.php?season={season}'] = f'<html><body><a href="all{season}.html">all</a></body></html>'
+            pages[f'all{season}.html'] = '<html><body>' + ''.join(
+                f'<a href="schedule.php?teamID={team_id}&season={season}">{team_id}</a>' for team_id in team_ids
+            ) + '</body></html>'
+        else:
+            pages[f'index.php?season={season}'] = '<html><body><table class="rankings">' + ''.join(
+                f'<tr><td><a href="region.php?r={region}&season={season}">R{region}</a></td></tr>'
+                for region in range(1, n_regions + 1)
+            ) + '</table></body></html>'
+
+            for region in range(1, n_regions + 1):
+                region_team_ids = [team_id for team_id in team_ids if team_id % n_regions == region - 1]
+
+                # A team that is also listed under a second region.
+                if region == 1:
+                    region_team_ids.append(2)
+
+                anchors = ''.join(
+                    f'<tr><td><a href="{SITE_URL if team_id % 2 else ""}schedule.php?teamID={team_id}&season={season}">'
+                    f'{team_id}</a></td></tr>'
+                    for team_id in region_team_ids
+                )
+                pages[f'region.php?r={region}&season={season}'] = \
+                    f'<html><body><table><tr><td>rankings</td></tr></table><table>{anchors}</table></body></html>'
+
+        for team_id in team_ids:
+            rows = build_schedule_rows(team_id, n_teams, rng)
+
+            if team_id == BROKEN_TEAM_ID:
+                page = '<html><body>Not found</body></html>'
+            elif season in LAYOUT_TWO_SEASONS:
+                page = build_layout_two_page(season, team_id, rows)
+            else:
+                page = build_layout_one_page(season, team_id, rows)
+
+            pages[f'schedule.php?teamID={team_id}&season={season}'] = page
+
+    return pages
+
+
+def save_pages(pages: Dict[str, str], path: str) -> None:
+    """Records a set of pages, e.g. a snapshot of the real site, to a JSON file."""
+
+    with open(path, 'w', encoding = 'utf-8') as f:
+        json.dump(pages, f)
+
+
+def load_pages(path: str) -> Dict[str, str]:
+    """Reads a set of pages recorded with `save_pages`."""
+
+    with open(path, encoding = 'utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,373 @@
+"""
+Benchmarks the scraper end to end against a local copy of the site, for both
+page layouts, without touching the network.
+
+Run from `db/data-extraction`:
+
+    python -m benchmark.run_benchmark
+    python -m benchmark.run_benchmark --parser lxml --partial-parse --compare benchmark/results/<baseline>.json
+
+Each stage reports pages/sec, the percentiles of the time spent per page, and
+the peak RSS of the process so far. Results are saved as JSON under
+`benchmark/results` along with the commit they were measured at.
+"""
+
+from argparse import ArgumentParser
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+import json
+import subprocess
+import sys
+import numpy as np
+from scraper.document_cache import DocumentCache
+from scraper.fetcher import Fetcher
+from scraper.scraper import SEASON_HOMEPAGE_PARSE_ONLY, Scraper
+from dataframe_builder.dataframe_builder import read_dataframe_builder_factory
+from .fixture_server import FixtureServer
+from .fixture_site import build_fixture_site, load_pages
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+PERCENTILES = [50, 90, 99]
+
+
+@dataclass
+class StageResult:
+    """
+    Measurements of a single stage:
+        - stage (str): Name of the stage.
+        - pages (int): Number of pages visited.
+        - rows (int): Number of rows (or links, for discovery) produced.
+        - seconds (float): Wall time of the stage.
+        - pages_per_second (float)
+        - latency_ms (Dict[str, float]): Percentiles of the time spent per page,
+          from the moment the page is visited until the next one is.
+        - peak_rss_mb (Optional[float]): Peak RSS of the process at the end of
+          the stage. None where the platform does not report it.
+        - throttled (int): Number of requests the fixture server answered with
+          a 429 during the stage.
+    """
+    stage: str
+    pages: int
+    rows: int
+    seconds: float
+    pages_per_second: float
+    latency_ms: Dict[str, float]
+    peak_rss_mb: Optional[float]
+    throttled: int = 0
+
+
+class TimedScraper(Scraper):
+    """Scraper that records the moment each page is visited."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        # Set before the first page is visited by `Scraper.__init__`.
+        self.page_visits: List[float] = []
+        super().__init__(*args, **kwargs)
+
+    def update_url(self, url: str, parse_only = None) -> None:
+        self.page_visits.append(perf_counter())
+        super().update_url(url, parse_only)
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    """Returns the peak resident set size of the process in megabytes."""
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Reported in bytes on macOS and in kilobytes everywhere else.
+    if sys.platform == 'darwin':
+        return peak_rss / 1024 ** 2
+
+    return peak_rss / 1024
+
+
+def get_commit() -> Optional[str]:
+    """Returns the short hash of the checked out commit, if there is one."""
+
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output = True,
+            text = True,
+            check = True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stage(
+    scraper: TimedScraper,
+    stage: str,
+    stage_fn: Callable[[], int],
+    server: FixtureServer = None,
+) -> StageResult:
+    """
+    Runs and measures a stage.
+
+    Args:
+        scraper (TimedScraper): The scraper the stage visits its pages with.
+        stage (str): Name of the stage.
+        stage_fn (Callable[[], int]): Runs the stage and returns the number of
+            rows it produced.
+        server (FixtureServer): The server the pages are fetched from, to count
+            the requests it throttled.
+
+    Returns:
+        stage result (StageResult)
+    """
+
+    scraper.page_visits = []
+    throttled = server.throttled if server is not None else 0
+
+    start = perf_counter()
+    rows = stage_fn()
+    end = perf_counter()
+
+    page_visits = scraper.page_visits
+    latencies = np.diff(page_visits + [end]) * 1000 if page_visits else np.array([0.0])
+
+    return StageResult(
+        stage = stage,
+        pages = len(page_visits),
+        rows = rows,
+        seconds = end - start,
+        pages_per_second = len(page_visits) / (end - start),
+        latency_ms = {
+            f'p{percentile}': float(np.percentile(latencies, percentile))
+            for percentile in PERCENTILES
+        },
+        peak_rss_mb = get_peak_rss_mb(),
+        throttled = (server.throttled - throttled) if server is not None else 0,
+    )
+
+
+def run_benchmark(
+    pages: Dict[str, str],
+    max_workers: int = 4,
+    max_connections_per_host: int = 4,
+    parser_backend: str = 'html.parser',
+    partial_parse: bool = False,
+    delay: float = 0.0,
+    throttle_rate: float = None,
+    max_requests_per_second: float = None,
+    document_cache_mb: int = 0,
+) -> List[StageResult]:
+    """
+    Serves the pages from a local fixture server and runs every stage of the
+    scraper against it:
+        - discovery: the season homepages and the team schedule links.
+        - team_build: `TeamDataframeBuilder.build` for every season.
+        - schedule_build: `ScheduleDataframeBuilder.build` for every season.
+        - single_pass_build: `DataframeBuilderFactory.build` for every season,
+          the path `index.py` takes.
+
+    Args:
+        pages (Dict[str, str]): The html of each page keyed by its link.
+        max_workers (int): Number of threads used to fetch pages concurrently.
+        max_connections_per_host (int): Maximum number of requests in flight.
+        parser_backend (str): The BeautifulSoup parser.
+        partial_parse (bool): If True, only the parts of each page that are
+            read by the extractors are parsed.
+        delay (float): Seconds the fixture server holds back every response for.
+        throttle_rate (float): Requests per second above which the fixture
+            server answers with a 429 and a Retry-After header.
+        max_requests_per_second (float): Maximum requests per second of the
+            fetcher. Unlimited if None.
+        document_cache_mb (int): Estimated memory in megabytes that parsed pages
+            are cached in. The team and schedule stages visit the same pages, so
+            with a large enough cache the later stages don't parse them again.
+
+    Returns:
+        stage results (List[StageResult])
+    """
+
+    with FixtureServer(pages, delay = delay, throttle_rate = throttle_rate) as server:
+        fetcher = Fetcher(max_workers, max_connections_per_host, max_requests_per_second = max_requests_per_second)
+        # Keep proxy settings from the environment from rerouting local requests.
+        fetcher.session.trust_env = False
+
+        scraper = TimedScraper(
+            fetcher = fetcher,
+            parser_backend = parser_backend,
+            partial_parse = partial_parse,
+            base_url = server.base_url,
+            document_cache = DocumentCache(max_size_bytes = document_cache_mb * 1024 ** 2),
+        )
+
+        team_schedule_links: Dict[str, List[str]] = {}
+
+        def discover() -> int:
+            scraper.update_url('')
+
+            for season_homepage_link in scraper.get_season_homepage_links():
+                season = season_homepage_link[-4 : ]
+                scraper.update_url(season_homepage_link, SEASON_HOMEPAGE_PARSE_ONLY)
+                team_schedule_links[season] = scraper.get_team_schedule_links(season)
+
+            return sum(len(links) for links in team_schedule_links.values())
+
+        def build_teams() -> int:
+            return sum(
+                len(read_dataframe_builder_factory(season, links, scraper).get_team_dataframe_builder().build())
+                for season, links in team_schedule_links.items()
+            )
+
+        def build_schedules() -> int:
+            return sum(
+                len(read_dataframe_builder_factory(season, links, scraper).get_schedule_dataframe_builder().build())
+                for season, links in team_schedule_links.items()
+            )
+
+        def build_single_pass() -> int:
+            rows = 0
+
+            for season, links in team_schedule_links.items():
+                teams_df, schedules_df = read_dataframe_builder_factory(season, links, scraper).build()
+                rows += len(teams_df) + len(schedules_df)
+
+            return rows
+
+        stage_results = [
+            run_stage(scraper, 'discovery', discover, server),
+            run_stage(scraper, 'team_build', build_teams, server),
+            run_stage(scraper, 'schedule_build', build_schedules, server),
+            run_stage(scraper, 'single_pass_build', build_single_pass, server),
+        ]
+
+        fetcher.close()
+
+    return stage_results
+
+
+def save_results(results: dict, output_dir: Path = RESULTS_DIR) -> Path:
+    """Writes the results to a new JSON file named after the time and commit of the run."""
+
+    output_dir.mkdir(parents = True, exist_ok = True)
+
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    path = output_dir / f'benchmark_{timestamp}_{results["commit"] or "nocommit"}.json'
+
+    with open(path, 'w', encoding = 'utf-8') as f:
+        json.dump(results, f, indent = 2)
+
+    return path
+
+
+def format_change(value: float, baseline_value: float) -> str:
+    if not baseline_value:
+        return ''
+    return f' ({(value - baseline_value) / baseline_value:+.1%})'
+
+
+def print_results(stage_results: List[StageResult], baseline: dict = None) -> None:
+    """Prints a table of the stage results, along with the change from a baseline run if given."""
+
+    baseline_stages = {}
+    if baseline is not None:
+        baseline_stages = {stage['stage']: stage for stage in baseline['stages']}
+
+    for stage_result in stage_results:
+        baseline_stage = baseline_stages.get(stage_result.stage, {})
+        latencies = ', '.join(
+            f'{name} {value:.1f} ms{format_change(value, baseline_stage.get("latency_ms", {}).get(name))}'
+            for name, value in stage_result.latency_ms.items()
+        )
+        peak_rss = 'n/a' if stage_result.peak_rss_mb is None else f'{stage_result.peak_rss_mb:.0f} MB'
+        throttled = f' | {stage_result.throttled} throttled' if stage_result.throttled else ''
+
+        print(
+            f'{stage_result.stage:<18} {stage_result.pages:>5} pages {stage_result.rows:>6} rows '
+            f'{stage_result.seconds:>7.2f} s '
+            f'{stage_result.pages_per_second:>7.1f} pages/s'
+            f'{format_change(stage_result.pages_per_second, baseline_stage.get("pages_per_second"))} | '
+            f'{latencies} | peak RSS {peak_rss}{throttled}'
+        )
+
+
+def parse_args():
+    parser = ArgumentParser(description = 'Benchmarks the scraper against a local copy of the site.')
+    parser.add_argument('--max-workers', type = int, default = 4)
+    parser.add_argument('--max-connections-per-host', type = int, default = 4)
+    parser.add_argument('--parser', default = 'html.parser', help = 'The BeautifulSoup parser backend.')
+    parser.add_argument('--partial-parse', action = 'store_true')
+    parser.add_argument('--teams', type = int, default = 40, help = 'Number of teams per generated season.')
+    parser.add_argument('--regions', type = int, default = 4, help = 'Number of regions per generated season.')
+    parser.add_argument(
+        '--pages',
+        help = 'JSON file of recorded pages (see fixture_site.save_pages) to serve instead of the generated site.',
+    )
+    parser.add_argument(
+        '--delay',
+        type = float,
+        default = 0.0,
+        help = 'Seconds the fixture server holds back every response for.',
+    )
+    parser.add_argument(
+        '--throttle-rate',
+        type = float,
+        help = 'Requests per second above which the fixture server answers with a 429 and a Retry-After header.',
+    )
+    parser.add_argument(
+        '--max-requests-per-second',
+        type = float,
+        help = 'Maximum requests per second of the fetcher. Unlimited by default.',
+    )
+    parser.add_argument(
+        '--document-cache-mb',
+        type = int,
+        default = 0,
+        help = 'Estimated memory in megabytes that parsed pages are cached in. Disabled by default.',
+    )
+    parser.add_argument('--compare', help = 'Results file of an earlier run to compare against.')
+    parser.add_argument('--output-dir', default = str(RESULTS_DIR), help = 'Directory the results are saved to.')
+    parser.add_argument('--no-save', action = 'store_true', help = "Don't save the results.")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    if args.pages:
+        pages = load_pages(args.pages)
+    else:
+        pages = build_fixture_site(args.teams, args.regions)
+
+    settings = {
+        'max_workers': args.max_workers,
+        'max_connections_per_host': args.max_connections_per_host,
+        'parser_backend': args.parser,
+        'partial_parse': args.partial_parse,
+        'delay': args.delay,
+        'throttle_rate': args.throttle_rate,
+        'max_requests_per_second': args.max_requests_per_second,
+        'document_cache_mb': args.document_cache_mb,
+    }
+
+    stage_results = run_benchmark(pages, **settings)
+
+    results = {
+        'commit': get_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'site': {'pages': len(pages), 'recorded': args.pages, 'teams': args.teams, 'regions': args.regions},
+        'settings': settings,
+        'stages': [asdict(stage_result) for stage_result in stage_results],
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding = 'utf-8') as f:
+            baseline = json.load(f)
+
+    print_results(stage_results, baseline)
+
+    if not args.no_save:
+        print(f'Saved results to {save_results(results, Path(args.output_dir))}')
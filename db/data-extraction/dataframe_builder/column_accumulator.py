@@ -0,0 +1,84 @@
+from typing import Dict, Iterable
+import pandas as pd
+from metrics.metrics import METRICS
+
+
+class ColumnAccumulator:
+    """
+    Collects rows column by column so that a season's rows can be turned into a
+    single DataFrame at the end, instead of building a one-row (or one-team)
+    DataFrame per team and concatenating thousands of them.
+
+    Columns are kept in the order they are first seen and rows that are missing
+    a column hold None, the same as `pd.concat` would give.
+    """
+
+    __slots__ = ('columns', 'n_rows')
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, list] = {}
+        self.n_rows = 0
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def add_missing_columns(self, names: Iterable[str]) -> None:
+        """Adds columns that have not been seen yet, filled with None for the existing rows."""
+
+        for name in names:
+            if name not in self.columns:
+                self.columns[name] = [None] * self.n_rows
+
+    def append_record(self, record: dict) -> None:
+        """
+        Appends a single row.
+
+        Args:
+            record (dict): The row's values keyed by column name.
+        """
+
+        self.add_missing_columns(record)
+
+        for name, values in self.columns.items():
+            values.append(record.get(name))
+
+        self.n_rows += 1
+
+    def extend_columns(self, columns: Dict[str, list]) -> None:
+        """
+        Appends several rows that are given column by column.
+
+        Args:
+            columns (Dict[str, list]): Equal length lists of values keyed by column name.
+        """
+
+        n_rows = len(next(iter(columns.values()), []))
+
+        self.add_missing_columns(columns)
+
+        for name, values in self.columns.items():
+            if name in columns:
+                values.extend(columns[name])
+            else:
+                values.extend([None] * n_rows)
+
+        self.n_rows += n_rows
+
+    def extend_dataframe(self, df: pd.DataFrame) -> None:
+        """Appends the rows of a DataFrame."""
+
+        self.extend_columns({name: df[name].tolist() for name in df.columns})
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Builds a single DataFrame out of every row that has been collected.
+
+        Columns with missing values are kept as object columns so that e.g. a
+        column of integers with a few None values is not turned into floats.
+        """
+
+        with METRICS.timer('to_dataframe'):
+            return pd.DataFrame({
+                name: pd.Series(values, dtype = object if None in values else None)
+                for name, values in self.columns.items()
+            })
@@ -0,0 +1,188 @@
+from typing import Dict, List, Optional, TextIO, Tuple
+import json
+import os
+import shutil
+from utils.make_output_dir import make_output_dir
+
+
+class CrawlJournal:
+    """
+    Append-only record of the team pages of a season (or of one part of a
+    season) that have been scraped, along with the rows that were extracted from
+    each one. A line is written as soon as a team is done, so a crawl that
+    crashes partway through can be resumed without scraping those teams again.
+
+    Once the season's output has been written the journal is marked as
+    completed, which lets a resumed crawl skip the whole season.
+
+    Each line is a JSON object:
+        - {"link": ..., "team": {...} | null, "schedule": {...} | null} for
+          every scraped team page. A null team or schedule could not be
+          extracted from the page.
+        - {"completed": true, "regions": [...] | null} once the season is done.
+    """
+
+    def __init__(
+        self,
+        season: str,
+        part: int = None,
+        resume: bool = False,
+        journal_dir: str = None,
+    ) -> None:
+        """
+        Args:
+            season (str): The season for which the information is applicable for.
+            part (int): The shard's position within its season when the season
+                is split by region.
+            resume (bool): If True, the existing journal is loaded. Otherwise
+                any existing journal is discarded and the season starts over.
+            journal_dir (str): Directory of the journal files. Defaults to
+                `journal` inside of the output directory.
+
+        Returns:
+            None
+        """
+
+        journal_dir = journal_dir or self.get_journal_dir()
+        os.makedirs(journal_dir, exist_ok = True)
+
+        file_suffix = '' if part is None else f'.part{part}'
+        self.path = os.path.join(journal_dir, f'{season}{file_suffix}.jsonl')
+
+        self._entries: Dict[str, dict] = {}
+        self._completed: Optional[dict] = None
+        self._file: Optional[TextIO] = None
+
+        if resume:
+            self.load()
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    @staticmethod
+    def get_journal_dir() -> str:
+        """Returns the default directory of the journal files."""
+        return os.path.join(make_output_dir(), 'journal')
+
+    @classmethod
+    def clear(cls, journal_dir: str = None) -> None:
+        """Removes every journal, so that the next crawl starts from scratch."""
+        shutil.rmtree(journal_dir or cls.get_journal_dir(), ignore_errors = True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, team_schedule_link: str) -> bool:
+        return team_schedule_link in self._entries
+
+    def load(self) -> None:
+        """Reads the journal file, if there is one."""
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding = 'utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line is cut off if the crawl died while writing it.
+                    continue
+
+                if entry.get('completed'):
+                    self._completed = entry
+                else:
+                    self._entries[entry['link']] = entry
+
+    def get(self, team_schedule_link: str) -> Optional[Tuple[Optional[dict], Optional[Dict[str, list]]]]:
+        """
+        Returns the rows recorded for a team page.
+
+        Args:
+            team_schedule_link (str): The url of the team's schedule page.
+
+        Returns:
+            team, schedule (Optional[Tuple[Optional[dict], Optional[Dict[str, list]]]]):
+                The team record and the schedule's columns, or None if the page
+                has not been journaled.
+        """
+
+        entry = self._entries.get(team_schedule_link)
+
+        if entry is None:
+            return None
+
+        return entry['team'], entry['schedule']
+
+    def write_line(self, entry: dict) -> None:
+        """Appends an entry to the journal file and flushes it to the OS."""
+
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding = 'utf-8')
+
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+
+    def record(
+        self,
+        team_schedule_link: str,
+        team: Optional[dict],
+        schedule: Optional[Dict[str, list]],
+    ) -> None:
+        """
+        Records a scraped team page.
+
+        Args:
+            team_schedule_link (str): The url of the team's schedule page.
+            team (Optional[dict]): The team record, None if it could not be extracted.
+            schedule (Optional[Dict[str, list]]): The schedule's columns, None if
+                it could not be extracted.
+        """
+
+        entry = {'link': team_schedule_link, 'team': team, 'schedule': schedule}
+
+        self.write_line(entry)
+        self._entries[team_schedule_link] = entry
+
+    def is_completed(self, region_homepage_links: Optional[List[str]] = None) -> bool:
+        """
+        Returns whether the season, or the part of the season made up of the
+        given regions, was completed by an earlier crawl.
+        """
+
+        return self._completed is not None and self._completed['regions'] == region_homepage_links
+
+    def mark_completed(self, region_homepage_links: Optional[List[str]] = None) -> None:
+        """
+        Marks the season as completed once its output has been written. The
+        team entries are no longer needed, so the journal is rewritten to
+        only hold the completion marker.
+
+        Args:
+            region_homepage_links (Optional[List[str]]): The regions the journal
+                covers, if only part of the season was scraped.
+        """
+
+        self.close()
+
+        self._entries = {}
+        self._completed = {'completed': True, 'regions': region_homepage_links}
+
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+
+        with open(tmp_path, 'w', encoding = 'utf-8') as f:
+            f.write(json.dumps(self._completed) + '\n')
+
+        os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        """Removes the journal file, e.g. once the parts of a season have been merged."""
+
+        self.close()
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
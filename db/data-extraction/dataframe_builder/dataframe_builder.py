@@ -1,21 +1,32 @@
 from abc import ABC, abstractmethod
 import bs4
-from typing import List, Type
+from bs4 import SoupStrainer
+from typing import Dict, List, Tuple, Type
 import pandas as pd
 import logging
+import os
 from scraper.scraper import Scraper
+from metrics.metrics import METRICS
 from .team import Team
+from .column_accumulator import ColumnAccumulator
+from .crawl_journal import CrawlJournal
+from .previous_output import PreviousSeasonOutput
+from .schedule_table import find_tables, read_schedule_table
 from utils.get_query_parameter import get_query_parameter
 from utils.convert_roman_numeral import convert_roman_numeral
 from utils.make_output_dir import make_output_dir
 from utils.class_dict_mapper import class_dict_mapper
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s %(levelname)s %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    filename="scraper_log.log",
-)
+logger = logging.getLogger(__name__)
+
+# The elements of a team schedule page that the team and schedule builders read.
+# Used to only parse those subtrees when the scraper has partial parsing enabled.
+#   - Seasons 2000, 2001, and 2013-2023: div#header, h2, h3, and the schedule
+#     table along with its caption.
+#   - Seasons 2002-2012: the layout is built out of tables, so the tables along
+#     with any stray td, font, and b tags.
+NON_TABLE_TEAM_PAGE_PARSE_ONLY = SoupStrainer(['div', 'h2', 'h3', 'table'])
+TABLE_TEAM_PAGE_PARSE_ONLY = SoupStrainer(['table', 'td', 'font', 'b'])
 
 # TODO: Break these up into separate files
 class TeamDataframeBuilder(ABC):
@@ -36,6 +47,8 @@ class TeamDataframeBuilder(ABC):
         - mascot (str): Name of the mascot.
     """
 
+    parse_only: SoupStrainer = None
+
     def __init__(
         self,
         team_schedule_links: List[str],
@@ -77,6 +90,32 @@ class TeamDataframeBuilder(ABC):
         """Sets the team's name and mascot."""
         pass
 
+    def extract_team(self, team_schedule_link: str) -> dict:
+        """
+        Builds the team record from the page the scraper is currently on.
+        The scraper is expected to already be pointed at `team_schedule_link`.
+
+        Args:
+            team_schedule_link (str): The url of the team's schedule page.
+
+        Returns:
+            team (dict): The team's attributes keyed by column name.
+        """
+
+        # Start from a fresh record so that nothing leaks over from the previous team.
+        self.team = Team(season = self.team.season)
+
+        with METRICS.timer('get_team_id'):
+            self.get_team_id(team_schedule_link)
+        with METRICS.timer('get_team_colors'):
+            self.get_team_colors()
+        with METRICS.timer('get_team_location_info'):
+            self.get_team_location_info()
+        with METRICS.timer('get_team_name_info'):
+            self.get_team_name_info()
+
+        return class_dict_mapper(self.team)
+
     # This can probably go into its own class for a more "traditional"
     # builder pattern.
     def build(self) -> pd.DataFrame:
@@ -85,27 +124,25 @@ class TeamDataframeBuilder(ABC):
         of the class for each of the available team schedule links.
         """
 
-        teams: List[pd.DataFrame] = []
+        teams = ColumnAccumulator()
 
-        for team_schedule_link in self.team_schedule_links:
+        for team_schedule_link in self.scraper.iter_prefetched(self.team_schedule_links):
             try:
-                logging.info(f'Building Team Table for: {team_schedule_link}')
-                self.scraper.update_url(team_schedule_link)
-                self.get_team_id(team_schedule_link) \
-                    .get_team_colors() \
-                    .get_team_location_info() \
-                    .get_team_name_info()
-
-                team_dict = class_dict_mapper(self)
+                logger.debug('Building Team Table for: %s', team_schedule_link)
+                self.scraper.update_url(team_schedule_link, self.parse_only)
+                team_dict = self.extract_team(team_schedule_link)
                 
-                teams.append(pd.DataFrame([team_dict]))
+                teams.append_record(team_dict)
+                METRICS.increment('teams_built')
             except:
-                logging.warning(
-                    f'team_schedule_link and actual URL have mismatching teamID values. Skipping team: {team_schedule_link}'
+                METRICS.increment('teams_skipped')
+                logger.warning(
+                    'team_schedule_link and actual URL have mismatching teamID values. Skipping team: %s',
+                    team_schedule_link,
                 )
                 pass
         
-        teams_df = pd.concat(teams)
+        teams_df = teams.to_dataframe()
         
         return teams_df
 
@@ -115,6 +152,8 @@ class NonTableTeamDataframeBuilder(TeamDataframeBuilder):
     Responsible for defining the methods for scraping team information
     for seasons 2000, 2001, and 2013-2023.
     """
+
+    parse_only = NON_TABLE_TEAM_PAGE_PARSE_ONLY
     
     def get_team_colors(self) -> None:
         team_colors_tag = self.scraper.find('div', id = 'header')
@@ -174,6 +213,8 @@ class TableTeamDataframeBuilder(TeamDataframeBuilder):
     Class that defines the methods for scraping team information
     for seasons 2002 - 2012.
     """
+
+    parse_only = TABLE_TEAM_PAGE_PARSE_ONLY
     
     def get_font_tags(self) -> bs4.ResultSet:
         """Returns all font tags found on the webpage."""
@@ -243,8 +284,17 @@ class ScheduleDataframeBuilder(ABC):
     the complexity, many of the layouts are built using tables, so
     grabbing a list of all td attributes becomes to large to reasonably
     parse individually.
+
+    Instead of handing the page to `pd.read_html`, which parses every table on
+    the page, only the schedule table is read, straight from the document the
+    scraper already parsed.
     """
 
+    parse_only: SoupStrainer = None
+
+    # Number of rows at the top of the schedule table that only hold a caption.
+    caption_rows: int = 0
+
     def __init__(
         self,
         team_schedule_links: List[str],
@@ -264,57 +314,78 @@ class ScheduleDataframeBuilder(ABC):
         self.team_schedule_links = team_schedule_links
         self.scraper = scraper
         self.season = season
-        self.df: pd.DataFrame = pd.DataFrame(data = None)
+        self.columns: Dict[str, list] = {}
 
     @abstractmethod
-    def read_tables(self, url: str) -> pd.DataFrame:
-        """Returns a specific table from a url using pandas."""
-    
-    @abstractmethod
-    def rename_columns(self) -> pd.DataFrame:
-        """Renames the columns of a dataframe since the site does not hold column headers."""
-    
-    @abstractmethod
-    def drop_columns(self) -> pd.DataFrame:
-        """Drops columns from the dataframe."""
-        pass
-    
-    @abstractmethod
-    def rename_columns(self) -> pd.DataFrame:
-        """Renames the columns of a dataframe."""
-        pass
+    def get_schedule_table(self) -> bs4.Tag:
+        """Returns the schedule table of the page the scraper is currently on."""
+
+    def read_table(self) -> 'ScheduleDataframeBuilder':
+        """
+        Reads the schedule table into the internal columns. Column 3 is dropped,
+        the columns are named, and the info and caption rows are removed while
+        the table is being read.
+        """
+
+        with METRICS.timer('read_table'):
+            self.columns = read_schedule_table(self.get_schedule_table(), self.caption_rows)
+        return self
+
+    def get_n_rows(self) -> int:
+        """Returns the number of schedule rows that were read."""
+        return len(next(iter(self.columns.values()), []))
     
     @abstractmethod
-    def add_season(self) -> pd.DataFrame:
+    def add_season(self) -> 'ScheduleDataframeBuilder':
         """Adds constant column equal to the value of the current season."""
         pass
     
     @abstractmethod
-    def add_team_name(self) -> pd.DataFrame:
+    def add_team_name(self) -> 'ScheduleDataframeBuilder':
         """Get the name of the team whose schedule is being scraped."""
 
-    def drop_info_rows(self) -> pd.DataFrame:
-        """
-        Removes the following rows from the tables:
-            - "* - game does not count in OHSAA rankings"
-            - "# - Ohio playoff game"
+    def extract_schedule(self) -> Dict[str, list]:
         """
+        Builds the schedule table from the page the scraper is currently on.
+        The table is read from the document that the scraper already parsed,
+        so the page is not requested or parsed again.
 
-        info_rows_to_drop = [
-            '* - game does not count in OHSAA rankings',
-            '# - Ohio playoff game',
-        ]
+        Returns:
+            schedule (Dict[str, list]): The schedule's columns keyed by column name.
+        """
 
-        self.df = self.df[~self.df['game_dates'].isin(info_rows_to_drop)]
+        self.read_table() \
+            .add_season() \
+            .add_team_name()
 
-        return self
+        return self.columns
 
     def build(self) -> pd.DataFrame:
         """
         Exports a Pandas DataFrame by manipulating the internal
         dataframe for each of the available team schedule links.
         """
-        pass
+
+        schedules = ColumnAccumulator()
+
+        for team_schedule_link in self.scraper.iter_prefetched(self.team_schedule_links):
+            # Broken links in website. No choice but to pass.
+            try:
+                logger.debug('Building schedule table for: %s', team_schedule_link)
+                self.scraper.update_url(team_schedule_link, self.parse_only)
+                schedules.extend_columns(self.extract_schedule())
+                METRICS.increment('schedules_built')
+            except:
+                METRICS.increment('schedules_skipped')
+                logger.warning(
+                    'team_schedule_link and actual URL have mismatching teamID values. Skipping team: %s',
+                    team_schedule_link,
+                )
+                pass
+        
+        schedule_dfs = schedules.to_dataframe()
+        
+        return schedule_dfs
 
 
 class ScheduleDataframeBuilderOne(ScheduleDataframeBuilder):
@@ -323,6 +394,8 @@ class ScheduleDataframeBuilderOne(ScheduleDataframeBuilder):
     for seasons 2000, 2001, and 2013-2023.
     """
 
+    parse_only = NON_TABLE_TEAM_PAGE_PARSE_ONLY
+
     def __init__(
         self,
         team_schedule_links: List[str],
@@ -332,67 +405,23 @@ class ScheduleDataframeBuilderOne(ScheduleDataframeBuilder):
         self.team_schedule_links = team_schedule_links
         self.scraper = scraper
         self.season = season
-        self.df: pd.DataFrame = pd.DataFrame(data = None)
-    
-    def read_tables(self, url: str) -> pd.DataFrame:
-        dfs = pd.read_html(url)
-
-        self.df = dfs[0]
-        return self
-    
-    def drop_columns(self) -> pd.DataFrame:
-        self.df = self.df.drop(columns = [3])
-        return self
+        self.columns: Dict[str, list] = {}
     
-    def rename_columns(self) -> pd.DataFrame:
-        self.df = self.df.rename(columns = {
-            0: 'game_dates',
-            1: 'field',
-            2: 'opponent',
-            4: 'result',
-            5: 'score',
-            6: 'game_info'
-        })
-        return self
+    def get_schedule_table(self) -> bs4.Tag:
+        return find_tables(self.scraper)[0]
     
-    def add_season(self) -> pd.DataFrame:
-        self.df['season'] = self.season
+    def add_season(self) -> ScheduleDataframeBuilder:
+        self.columns['season'] = [self.season] * self.get_n_rows()
         return self
     
-    def add_team_name(self) -> str:
+    def add_team_name(self) -> ScheduleDataframeBuilder:
         caption = self.scraper.find('caption').text
 
         football_idx = caption.find('Football')
         team_name_only = caption[ : football_idx].replace(f'{self.season} ', '').strip()
 
-        self.df['team'] = team_name_only
+        self.columns['team'] = [team_name_only] * self.get_n_rows()
         return self
-    
-    def build(self) -> pd.DataFrame:
-        schedules: List[pd.DataFrame] = []
-
-        for team_schedule_link in self.team_schedule_links:
-            # Broken links in website. No choice but to pass.
-            try:
-                logging.info(f'Building schedule table for: {team_schedule_link}')
-                self.scraper.update_url(team_schedule_link)
-                self.read_tables(self.scraper.BASE_URL + team_schedule_link) \
-                    .drop_columns() \
-                    .rename_columns() \
-                    .drop_info_rows() \
-                    .add_season() \
-                    .add_team_name()
-                
-                schedules.append(self.df)
-            except:
-                logging.warning(
-                    f'team_schedule_link and actual URL have mismatching teamID values. Skipping team: {team_schedule_link}'
-                )
-                pass
-        
-        schedule_dfs = pd.concat(schedules)
-        
-        return schedule_dfs
 
 
 class ScheduleDataframeBuilderTwo(ScheduleDataframeBuilder):
@@ -401,6 +430,9 @@ class ScheduleDataframeBuilderTwo(ScheduleDataframeBuilder):
     for seasons 2002 - 2012.
     """
 
+    parse_only = TABLE_TEAM_PAGE_PARSE_ONLY
+    caption_rows = 1
+
     def __init__(
         self,
         team_schedule_links: List[str],
@@ -410,71 +442,23 @@ class ScheduleDataframeBuilderTwo(ScheduleDataframeBuilder):
         self.team_schedule_links = team_schedule_links
         self.scraper = scraper
         self.season = season
-        self.df: pd.DataFrame = pd.DataFrame(data = None)
-    
-    def read_tables(self, url: str) -> pd.DataFrame:
-        dfs = pd.read_html(url)
-
-        self.df = dfs[4]
-        return self
+        self.columns: Dict[str, list] = {}
     
-    def drop_columns(self) -> pd.DataFrame:
-        self.df = self.df.drop(columns = [3])
-        return self
-    
-    def rename_columns(self) -> pd.DataFrame:
-        self.df = self.df.rename(columns = {
-            0: 'game_dates',
-            1: 'field',
-            2: 'opponent',
-            4: 'result',
-            5: 'score',
-            6: 'game_info'
-        })
-        return self
-    
-    def drop_caption_row(self) -> pd.DataFrame:
-        self.df = self.df.tail(-1)
-        return self
+    def get_schedule_table(self) -> bs4.Tag:
+        return find_tables(self.scraper)[4]
     
-    def add_season(self) -> pd.DataFrame:
-        self.df['season'] = self.season
+    def add_season(self) -> ScheduleDataframeBuilder:
+        self.columns['season'] = [self.season] * self.get_n_rows()
         return self
     
-    def add_team_name(self) -> pd.DataFrame:
+    def add_team_name(self) -> ScheduleDataframeBuilder:
         td_tag_text = self.scraper.find('td', {'bgcolor': '#ffffff'}).text
         season_idx = td_tag_text.find(str(self.season))
         
         team_name_only = td_tag_text[ : season_idx]
 
-        self.df['name'] = team_name_only
+        self.columns['name'] = [team_name_only] * self.get_n_rows()
         return self
-    
-    def build(self) -> pd.DataFrame:
-        schedules: List[pd.DataFrame] = []
-
-        for team_schedule_link in self.team_schedule_links:
-            try:
-                logging.info(f'Building schedule table for: {team_schedule_link}')
-                self.scraper.update_url(team_schedule_link)
-                self.read_tables(self.scraper.BASE_URL + team_schedule_link) \
-                    .drop_columns() \
-                    .rename_columns() \
-                    .drop_info_rows() \
-                    .drop_caption_row() \
-                    .add_season() \
-                    .add_team_name()
-                
-                schedules.append(self.df)
-            except:
-                logging.warning(
-                    f'team_schedule_link and actual URL have mismatching teamID values. Skipping team: {team_schedule_link}'
-                )
-                pass
-        
-        schedule_dfs = pd.concat(schedules)
-        
-        return schedule_dfs
 
 
 class DataframeBuilderFactory(ABC):
@@ -482,6 +466,11 @@ class DataframeBuilderFactory(ABC):
     Abstract class that returns the appropriate builders for a particular season.
     """
 
+    parse_only: SoupStrainer = None
+
+    # The team column of the schedules built by the layout's schedule builder.
+    schedule_name_column = 'team'
+
     @abstractmethod
     def get_team_dataframe_builder(self) -> TeamDataframeBuilder:
         pass
@@ -490,10 +479,128 @@ class DataframeBuilderFactory(ABC):
     def get_schedule_dataframe_builder(self) -> ScheduleDataframeBuilder:
         pass
 
+    def build(
+        self,
+        previous_output: PreviousSeasonOutput = None,
+        journal: CrawlJournal = None,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Single-pass extraction. Each team schedule page is fetched and parsed
+        once, and both the team record and the schedule rows are extracted from
+        that one document.
+
+        Args:
+            previous_output (PreviousSeasonOutput): Rows exported by a previous
+                run. If given, teams whose page is unchanged since that run reuse
+                their previous rows instead of being extracted again.
+            journal (CrawlJournal): If given, the rows of every scraped team page
+                are journaled as soon as the page is done, and pages that are
+                already in the journal are neither fetched nor extracted again.
+
+        Returns:
+            teams_df, schedules_df (Tuple[pd.DataFrame, pd.DataFrame])
+        """
+
+        team_dataframe_builder = self.get_team_dataframe_builder()
+        schedule_dataframe_builder = self.get_schedule_dataframe_builder()
+
+        # Rows are collected column-wise and turned into a single DataFrame at
+        # the end of the season instead of one DataFrame per team.
+        teams = ColumnAccumulator()
+        schedules = ColumnAccumulator()
+
+        # Only the pages that are not journaled yet are prefetched. They are
+        # yielded in the same order as they appear in the team links.
+        pending_links = [
+            team_schedule_link for team_schedule_link in self.team_schedule_links
+            if journal is None or team_schedule_link not in journal
+        ]
+        prefetched_links = self.scraper.iter_prefetched(pending_links)
+
+        for team_schedule_link in self.team_schedule_links:
+            logger.debug('Building team and schedule tables for: %s', team_schedule_link)
+
+            journaled_rows = journal.get(team_schedule_link) if journal is not None else None
+
+            if journaled_rows is not None:
+                team_dict, schedule_columns = journaled_rows
+
+                if team_dict is not None:
+                    teams.append_record(team_dict)
+                if schedule_columns is not None:
+                    schedules.extend_columns(schedule_columns)
+
+                METRICS.increment('teams_from_journal')
+                continue
+
+            next(prefetched_links)
+
+            if previous_output is not None and self.scraper.is_unchanged(team_schedule_link):
+                previous_rows = previous_output.get_team_rows(team_schedule_link)
+
+                if previous_rows is not None:
+                    logger.debug('Team page unchanged. Reusing previous rows for: %s', team_schedule_link)
+                    teams.extend_dataframe(previous_rows[0])
+                    schedules.extend_dataframe(previous_rows[1])
+                    METRICS.increment('teams_reused')
+
+                    if journal is not None:
+                        journal.record(
+                            team_schedule_link,
+                            previous_rows[0].to_dict('records')[0],
+                            previous_rows[1].to_dict('list'),
+                        )
+                    continue
+
+            # Broken links in website. No choice but to pass.
+            try:
+                self.scraper.update_url(team_schedule_link, self.parse_only)
+            except:
+                METRICS.increment('pages_failed')
+                logger.warning('Unable to fetch team page. Skipping team: %s', team_schedule_link)
+                continue
+
+            # The team and schedule are skipped independently of each other so
+            # that the output matches what the separate builders produce.
+            team_dict = None
+            try:
+                team_dict = team_dataframe_builder.extract_team(team_schedule_link)
+                teams.append_record(team_dict)
+                METRICS.increment('teams_built')
+            except:
+                team_dict = None
+                METRICS.increment('teams_skipped')
+                logger.warning(
+                    'team_schedule_link and actual URL have mismatching teamID values. Skipping team: %s',
+                    team_schedule_link,
+                )
+
+            schedule_columns = None
+            try:
+                schedule_columns = schedule_dataframe_builder.extract_schedule()
+                schedules.extend_columns(schedule_columns)
+                METRICS.increment('schedules_built')
+            except:
+                schedule_columns = None
+                METRICS.increment('schedules_skipped')
+                logger.warning('Unable to read schedule table. Skipping schedule: %s', team_schedule_link)
+
+            if journal is not None:
+                journal.record(team_schedule_link, team_dict, schedule_columns)
+
+        prefetched_links.close()
+
+        teams_df = teams.to_dataframe()
+        schedules_df = schedules.to_dataframe()
+
+        return teams_df, schedules_df
+
 
 class DataframeBuilderOne(DataframeBuilderFactory):
     """Factory that returns the appropriate builders for seasons 2000, 2001 and 2012-2023"""
 
+    parse_only = NON_TABLE_TEAM_PAGE_PARSE_ONLY
+
     def __init__(
         self,
         team_schedule_links: List[str],
@@ -534,6 +641,9 @@ class DataframeBuilderOne(DataframeBuilderFactory):
 class DataframeBuilderTwo(DataframeBuilderFactory):
     """Factory that returns the appropriate builders for seasons 2002-2011"""
 
+    parse_only = TABLE_TEAM_PAGE_PARSE_ONLY
+    schedule_name_column = 'name'
+
     def __init__(
         self,
         team_schedule_links: List[str],
@@ -608,22 +718,135 @@ def read_dataframe_builder_factory(
         )
 
 
-def export_dataframes(dataframe_builder_factory: DataframeBuilderFactory, season: str):
-    team_dataframe_builder = dataframe_builder_factory.get_team_dataframe_builder()
-    schedule_dataframe_builder = dataframe_builder_factory.get_schedule_dataframe_builder()
+def export_dataframes(
+    dataframe_builder_factory: DataframeBuilderFactory,
+    season: str,
+    single_pass: bool = True,
+    incremental: bool = False,
+    part: int = None,
+    output_format: str = 'csv',
+    journal: CrawlJournal = None,
+):
+    """
+    Builds the team and schedule dataframes for a season and writes them to csv
+    or Parquet.
+
+    Args:
+        dataframe_builder_factory (DataframeBuilderFactory): Factory for the season's layout.
+        season (str): The season for which the information is applicable for.
+        single_pass (bool): If True, each team page is fetched and parsed once and
+            shared by the team and schedule builders. If False, the team and
+            schedule builders each make their own pass over the team pages.
+        incremental (bool): If True, teams whose page is unchanged since the last
+            crawl reuse the rows from the season's existing output. Requires
+            single_pass.
+        part (int): If given, only part of the season was scraped (e.g. a subset
+            of its regions) and the files are written as numbered parts that
+            are later combined with `merge_exported_parts`.
+        output_format (str): 'csv' writes `teams_{season}.csv` and
+            `schedules_{season}.csv`. 'parquet' writes typed, compressed Parquet
+            files partitioned by season under `output/parquet`, see
+            `parquet_export`. Requires pyarrow.
+        journal (CrawlJournal): If given, scraped team pages are journaled as
+            they finish and journaled pages are not scraped again. Requires
+            single_pass.
+    """
+
+    data_dir = make_output_dir()
 
-    teams_df = team_dataframe_builder.build()
-    schedules_df = schedule_dataframe_builder.build()
+    if single_pass:
+        previous_output = None
+        if incremental:
+            previous_output = PreviousSeasonOutput.load(
+                data_dir,
+                season,
+                output_format,
+                dataframe_builder_factory.schedule_name_column,
+            )
+
+        teams_df, schedules_df = dataframe_builder_factory.build(previous_output, journal)
+    else:
+        team_dataframe_builder = dataframe_builder_factory.get_team_dataframe_builder()
+        schedule_dataframe_builder = dataframe_builder_factory.get_schedule_dataframe_builder()
+
+        teams_df = team_dataframe_builder.build()
+        schedules_df = schedule_dataframe_builder.build()
+
+    if output_format == 'parquet':
+        # pyarrow is only needed for Parquet output.
+        from .parquet_export import write_season_table
+
+        with METRICS.timer('write_parquet'):
+            write_season_table(teams_df, 'teams', season, part)
+            write_season_table(schedules_df, 'schedules', season, part)
+        return
+
+    file_suffix = '' if part is None else f'.part{part}'
+
+    with METRICS.timer('write_csv'):
+        teams_df.to_csv(data_dir + f'/teams_{season}{file_suffix}.csv', index = False)
+        schedules_df.to_csv(data_dir + f'/schedules_{season}{file_suffix}.csv', index = False)
+
+def has_exported_parts(season: str, parts: int, output_format: str = 'csv') -> bool:
+    """Returns whether any of the numbered parts of a season are waiting to be merged."""
+
+    if output_format == 'parquet':
+        from .parquet_export import get_partition_dir
+
+        partition_dir = get_partition_dir('teams', season)
+        part_paths = [os.path.join(partition_dir, f'teams.part{part}.parquet') for part in range(parts)]
+    else:
+        data_dir = make_output_dir()
+        part_paths = [data_dir + f'/teams_{season}.part{part}.csv' for part in range(parts)]
+
+    return any(os.path.exists(part_path) for part_path in part_paths)
+
+def merge_exported_parts(season: str, parts: int, output_format: str = 'csv'):
+    """
+    Combines the numbered parts written by `export_dataframes` into the
+    season's files and removes the parts. Csv parts are read back as plain
+    strings so that the values are written out exactly as they were read in.
+
+    Args:
+        season (str): The season for which the information is applicable for.
+        parts (int): The number of parts the season was split into.
+        output_format (str): The format the parts were written in.
+    """
+
+    if not has_exported_parts(season, parts, output_format):
+        # Already merged, e.g. by the crawl that is being resumed.
+        return
+
+    if output_format == 'parquet':
+        from .parquet_export import merge_season_table_parts
+
+        merge_season_table_parts('teams', season, parts)
+        merge_season_table_parts('schedules', season, parts)
+        return
 
     data_dir = make_output_dir()
 
-    teams_df.to_csv(data_dir + f'/teams_{season}.csv', index = False)
-    schedules_df.to_csv(data_dir + f'/schedules_{season}.csv', index = False)
+    for table in ['teams', 'schedules']:
+        part_paths = [data_dir + f'/{table}_{season}.part{part}.csv' for part in range(parts)]
+        part_dfs = [
+            pd.read_csv(part_path, dtype = str, keep_default_na = False)
+            for part_path in part_paths
+        ]
+
+        pd.concat(part_dfs).to_csv(data_dir + f'/{table}_{season}.csv', index = False)
+
+        for part_path in part_paths:
+            os.remove(part_path)
 
 def scrape_and_build_dataframes(
     season: str,
     team_schedule_links: List[str],
     scraper: Type[Scraper],
+    single_pass: bool = True,
+    incremental: bool = False,
+    part: int = None,
+    output_format: str = 'csv',
+    journal: CrawlJournal = None,
 ):
     dataframe_builder_factory = read_dataframe_builder_factory(season, team_schedule_links, scraper)
-    export_dataframes(dataframe_builder_factory, season)
+    export_dataframes(dataframe_builder_factory, season, single_pass, incremental, part, output_format, journal)
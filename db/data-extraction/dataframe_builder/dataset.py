@@ -0,0 +1,228 @@
+"""
+Loads every exported season into a single teams frame and a single schedules
+frame, instead of a pair of string frames per season.
+
+Strings repeat a lot across seasons (states, counties, colors, team names,
+opponents, fields, ...), so they are stored as categoricals: every distinct
+string is kept once and each row only holds a small integer code. Integer
+columns are parsed into small nullable integer types (int8 for divisions and
+regions, int16 for seasons, int32 for teamIDs).
+
+Run from `db/data-extraction` to see how much memory the full history takes:
+
+    python -m dataframe_builder.dataset --format csv
+"""
+
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import os
+import pandas as pd
+from metrics.metrics import METRICS
+from utils.make_output_dir import make_output_dir
+from .schedule_normalizer import COLUMN_ALIASES, parse_distinct
+from .sqlite_loader import get_exported_seasons
+
+TEAMS_DTYPES: Dict[str, str] = {
+    'season': 'Int16',
+    'id': 'Int32',
+    'primary_color': 'category',
+    'secondary_color': 'category',
+    'city': 'category',
+    'county': 'category',
+    'state': 'category',
+    'division': 'Int8',
+    'region': 'Int8',
+    'name': 'category',
+    'mascot': 'category',
+}
+
+# Seasons 2002-2012 name the team column 'name' instead of 'team'. Every
+# season is loaded with 'team'.
+SCHEDULES_DTYPES: Dict[str, str] = {
+    'season': 'Int16',
+    'team': 'category',
+    'game_dates': 'category',
+    'field': 'category',
+    'opponent': 'category',
+    'result': 'category',
+    'score': 'category',
+    'game_info': 'category',
+}
+
+DTYPES: Dict[str, Dict[str, str]] = {
+    'teams': TEAMS_DTYPES,
+    'schedules': SCHEDULES_DTYPES,
+}
+
+
+@dataclass
+class Dataset:
+    """
+    Every loaded season of both tables:
+        - teams_df (pd.DataFrame): A row per team and season, see `TEAMS_DTYPES`.
+        - schedules_df (pd.DataFrame): A row per game, see `SCHEDULES_DTYPES`.
+    """
+    teams_df: pd.DataFrame
+    schedules_df: pd.DataFrame
+
+    def get_memory_usage_mb(self) -> float:
+        """Returns the memory both frames take up, including their strings."""
+        return sum(get_memory_usage_mb(df) for df in [self.teams_df, self.schedules_df])
+
+
+def get_memory_usage_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep = True).sum() / 1024 ** 2
+
+
+def to_compact_dtypes(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Returns a frame with exactly the given columns and dtypes. Integer columns
+    are parsed, with anything that is not a number as missing, the same as the
+    Parquet export. Columns the frame lacks (e.g. county before 2002) are missing.
+
+    Integer columns only hold a few hundred distinct values across every
+    season, so only those are parsed.
+    """
+
+    columns = {}
+
+    for column, dtype in dtypes.items():
+        if column not in df.columns:
+            columns[column] = pd.Series(None, index = df.index, dtype = 'object').astype(dtype)
+        elif dtype == 'category':
+            values = df[column]
+            columns[column] = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype('category')
+        else:
+            columns[column] = parse_distinct(
+                df[column],
+                lambda values: pd.DataFrame({'number': pd.to_numeric(values, errors = 'coerce').astype(dtype)}),
+            )['number']
+
+    return pd.DataFrame(columns, index = df.index)
+
+
+def read_season_csv(path: str, column_aliases: Dict[str, str] = None) -> pd.DataFrame:
+    """Reads an exported csv file as strings, with empty cells as missing values."""
+
+    df = pd.read_csv(path, dtype = str, keep_default_na = False, na_values = [''])
+    return df.rename(columns = column_aliases or {})
+
+
+def check_memory_budget(dfs: List[pd.DataFrame], memory_budget_mb: Optional[float], season: str) -> None:
+    if memory_budget_mb is None:
+        return
+
+    memory_usage_mb = sum(get_memory_usage_mb(df) for df in dfs)
+
+    if memory_usage_mb > memory_budget_mb:
+        raise MemoryError(
+            f'Loading season {season} takes the dataset to {memory_usage_mb:.1f} MB, '
+            f'over the budget of {memory_budget_mb} MB.'
+        )
+
+
+def load_csv_dataset(seasons: List[str], data_dir: str, memory_budget_mb: Optional[float]) -> Dataset:
+    """
+    Reads the seasons as strings and converts every column once all of them
+    are read. Building the categories of the whole history at once is a lot
+    faster than building them per season and unioning them afterwards.
+    """
+
+    teams_dfs, schedules_dfs = [], []
+
+    for season in seasons:
+        teams_path = os.path.join(data_dir, f'teams_{season}.csv')
+        schedules_path = os.path.join(data_dir, f'schedules_{season}.csv')
+
+        if not os.path.exists(teams_path) or not os.path.exists(schedules_path):
+            continue
+
+        teams_dfs.append(read_season_csv(teams_path))
+        schedules_dfs.append(read_season_csv(schedules_path, COLUMN_ALIASES))
+
+        # The strings are what the load peaks at, the converted columns take
+        # up a fraction of them.
+        check_memory_budget(teams_dfs + schedules_dfs, memory_budget_mb, season)
+
+    return Dataset(
+        to_compact_dtypes(pd.concat(teams_dfs, ignore_index = True) if teams_dfs else pd.DataFrame(), TEAMS_DTYPES),
+        to_compact_dtypes(pd.concat(schedules_dfs, ignore_index = True) if schedules_dfs else pd.DataFrame(), SCHEDULES_DTYPES),
+    )
+
+
+def load_parquet_dataset(seasons: List[str], data_dir: str, memory_budget_mb: Optional[float]) -> Dataset:
+    """Reads every season of both tables at once. Their dictionary columns are already categoricals."""
+
+    from .parquet_export import read_exported_table
+
+    if not seasons:
+        return Dataset(to_compact_dtypes(pd.DataFrame(), TEAMS_DTYPES), to_compact_dtypes(pd.DataFrame(), SCHEDULES_DTYPES))
+
+    teams_df, schedules_df = [
+        to_compact_dtypes(read_exported_table(table, seasons = seasons, data_dir = data_dir), DTYPES[table])
+        for table in ['teams', 'schedules']
+    ]
+
+    check_memory_budget([teams_df, schedules_df], memory_budget_mb, seasons[-1])
+    return Dataset(teams_df, schedules_df)
+
+
+def load_dataset(
+    seasons: Optional[Iterable[str]] = None,
+    output_format: str = 'csv',
+    data_dir: str = None,
+    memory_budget_mb: Optional[float] = None,
+) -> Dataset:
+    """
+    Loads exported seasons into a single teams frame and a single schedules
+    frame with compact dtypes. Seasons that were not exported are skipped.
+
+    Args:
+        seasons (Optional[Iterable[str]]): Seasons to load. Defaults to every
+            exported season.
+        output_format (str): The format the seasons were exported in.
+        data_dir (str): The output directory. Defaults to `make_output_dir()`.
+        memory_budget_mb (Optional[float]): If given, a MemoryError is raised
+            as soon as the loaded seasons take up more than this, instead of
+            running the process out of memory.
+
+    Returns:
+        dataset (Dataset)
+    """
+
+    data_dir = data_dir or make_output_dir()
+
+    if seasons is None:
+        seasons = get_exported_seasons(output_format, data_dir)
+    else:
+        exported_seasons = set(get_exported_seasons(output_format, data_dir))
+        seasons = [season for season in seasons if season in exported_seasons]
+
+    with METRICS.timer('load_dataset'):
+        if output_format == 'parquet':
+            dataset = load_parquet_dataset(list(seasons), data_dir, memory_budget_mb)
+        else:
+            dataset = load_csv_dataset(list(seasons), data_dir, memory_budget_mb)
+
+    METRICS.set_gauge('dataset_memory_mb', dataset.get_memory_usage_mb())
+    return dataset
+
+
+def parse_args():
+    parser = ArgumentParser(description = 'Loads every exported season and reports the memory it takes up.')
+    parser.add_argument('--format', choices = ['csv', 'parquet'], default = 'csv', help = 'Format the seasons were exported in.')
+    parser.add_argument('--seasons', nargs = '+', help = 'Seasons to load. Defaults to every exported season.')
+    parser.add_argument('--memory-budget-mb', type = float, help = 'Fail instead of loading more than this.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    dataset = load_dataset(args.seasons, args.format, memory_budget_mb = args.memory_budget_mb)
+
+    print(
+        f'Loaded {len(dataset.teams_df)} teams and {len(dataset.schedules_df)} schedule rows '
+        f'into {dataset.get_memory_usage_mb():.1f} MB.'
+    )
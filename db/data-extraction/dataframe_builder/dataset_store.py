@@ -0,0 +1,311 @@
+"""
+Read side of the scraped dataset. The teams and schedules of every season are
+written once to uncompressed Arrow files, which are memory-mapped when they are
+opened, so a lookup only reads the pages of the file that hold its rows.
+
+Each file is sorted on an integer key that is stored along with the rows, so
+every lookup is a binary search for a contiguous range of rows:
+    - teams: season, division, region.
+    - schedules: teamID, season.
+
+Run from `db/data-extraction` to build the store from the exported seasons:
+
+    python -m dataframe_builder.dataset_store --format csv
+
+and query it with:
+
+    store = DatasetStore()
+    store.get_team_schedule(team_id = 4)
+    store.get_season_record(team_id = 4, season = 2015)
+"""
+
+from argparse import ArgumentParser
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from metrics.metrics import METRICS
+from utils.make_output_dir import make_output_dir
+from .dataset import load_dataset
+from .opponent_resolver import OpponentResolver
+from .parquet_export import PANDAS_INTEGER_DTYPES
+from .schedule_normalizer import normalize_schedules
+
+# Seasons, divisions, and regions are packed into the keys with this many values each.
+SEASON_RANGE = 2 ** 16
+DIVISION_RANGE = 2 ** 8
+REGION_RANGE = 2 ** 8
+
+# Schedule rows whose team or opponent could not be resolved to a teamID.
+UNRESOLVED_TEAM_ID = -1
+
+KEY_COLUMN = 'key'
+
+
+def get_default_store_dir() -> str:
+    return os.path.join(make_output_dir(), 'store')
+
+
+def get_team_key(season: np.ndarray, division: np.ndarray, region: np.ndarray) -> np.ndarray:
+    """Packs seasons, divisions and regions into keys. Missing divisions and regions are -1."""
+    return (season.astype(np.int64) * DIVISION_RANGE + division + 1) * REGION_RANGE + region + 1
+
+
+def get_schedule_key(team_id: np.ndarray, season: np.ndarray) -> np.ndarray:
+    return team_id.astype(np.int64) * SEASON_RANGE + season
+
+
+def to_int_array(values: pd.Series, missing: int = -1) -> np.ndarray:
+    return values.astype('Int64').fillna(missing).to_numpy(dtype = np.int64)
+
+
+def sort_by_key(df: pd.DataFrame, key: np.ndarray) -> pd.DataFrame:
+    """Adds the key column and sorts on it. Rows with the same key keep their order."""
+
+    order = np.argsort(key, kind = 'stable')
+    return df.iloc[order].assign(**{KEY_COLUMN: key[order]}).reset_index(drop = True)
+
+
+def write_table(df: pd.DataFrame, path: str) -> None:
+    """
+    Writes a frame as an uncompressed Arrow file in a single record batch, so
+    that every column can be read from the memory map without a copy. The file
+    is replaced in one step, so readers that have the old one mapped keep
+    reading it.
+
+    Categoricals are written as plain strings. A slice of a dictionary column
+    drags the whole dictionary along, which made converting a lookup's few
+    rows to pandas several times slower.
+    """
+
+    table = pa.Table.from_pandas(df, preserve_index = False).combine_chunks()
+    table = pa.table({
+        name: column.cast(column.type.value_type) if pa.types.is_dictionary(column.type) else column
+        for name, column in zip(table.column_names, table.columns)
+    })
+    temporary_path = f'{path}.tmp'
+
+    with pa.OSFile(temporary_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize = max(table.num_rows, 1))
+
+    os.replace(temporary_path, path)
+
+
+def build_store(
+    seasons: Optional[Iterable[str]] = None,
+    output_format: str = 'csv',
+    data_dir: str = None,
+    store_dir: str = None,
+) -> Tuple[int, int]:
+    """
+    Builds the store from the exported seasons. The schedules are normalized
+    (see `normalize_schedules`) and both the team and the opponent of every
+    game are resolved to a teamID (see `OpponentResolver`).
+
+    Args:
+        seasons (Optional[Iterable[str]]): Seasons to store. Defaults to every
+            exported season.
+        output_format (str): The format the seasons were exported in.
+        data_dir (str): The output directory. Defaults to `make_output_dir()`.
+        store_dir (str): Where the store is written. Defaults to `output/store`.
+
+    Returns:
+        teams, schedule rows (Tuple[int, int]): The number of rows stored.
+    """
+
+    store_dir = store_dir or get_default_store_dir()
+    os.makedirs(store_dir, exist_ok = True)
+
+    dataset = load_dataset(seasons, output_format, data_dir)
+
+    with METRICS.timer('build_store'):
+        teams_df = dataset.teams_df
+        teams_df = sort_by_key(teams_df, get_team_key(
+            to_int_array(teams_df['season']),
+            to_int_array(teams_df['division']),
+            to_int_array(teams_df['region']),
+        ))
+
+        resolver = OpponentResolver(dataset.teams_df)
+        team_ids = resolver.resolve(dataset.schedules_df, 'team')['team_id']
+        opponent_ids = resolver.resolve(dataset.schedules_df, 'opponent')['team_id']
+
+        schedules_df = normalize_schedules(dataset.schedules_df).assign(
+            team_id = to_int_array(team_ids, UNRESOLVED_TEAM_ID).astype(np.int32),
+            opponent_id = to_int_array(opponent_ids, UNRESOLVED_TEAM_ID).astype(np.int32),
+        )
+        schedules_df = sort_by_key(schedules_df, get_schedule_key(
+            schedules_df['team_id'].to_numpy(),
+            to_int_array(schedules_df['season']),
+        ))
+
+        write_table(teams_df, os.path.join(store_dir, 'teams.arrow'))
+        write_table(schedules_df, os.path.join(store_dir, 'schedules.arrow'))
+
+    return len(teams_df), len(schedules_df)
+
+
+def open_table(path: str) -> pa.Table:
+    """Memory-maps an Arrow file. Nothing is read until the rows are used."""
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'{path} does not exist. Build the store with `build_store` first.')
+
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def get_keys(table: pa.Table) -> np.ndarray:
+    """Returns the key column as a view of the memory map."""
+
+    keys = table.column(KEY_COLUMN)
+
+    if keys.num_chunks == 1:
+        return keys.chunk(0).to_numpy(zero_copy_only = True)
+
+    return keys.to_numpy()
+
+
+class DatasetStore:
+    """
+    Answers the common lookups from the memory-mapped store. Each lookup finds
+    its rows with a binary search on a key column and only converts those rows
+    to a DataFrame, so it costs the same whether the store holds one season
+    or all of them.
+
+    A store is read-only and can be shared by any number of threads.
+    """
+
+    def __init__(self, store_dir: str = None) -> None:
+        """
+        Args:
+            store_dir (str): Where the store was built. Defaults to `output/store`.
+
+        Returns:
+            None
+        """
+
+        store_dir = store_dir or get_default_store_dir()
+
+        self.teams = open_table(os.path.join(store_dir, 'teams.arrow'))
+        self.schedules = open_table(os.path.join(store_dir, 'schedules.arrow'))
+
+        self.team_keys = get_keys(self.teams)
+        self.schedule_keys = get_keys(self.schedules)
+
+    def get_rows(self, table: pa.Table, keys: np.ndarray, low: int, high: int) -> pa.Table:
+        """Returns the rows whose key is in [low, high)."""
+
+        start, stop = np.searchsorted(keys, [low, high])
+        return table.slice(start, stop - start)
+
+    def to_df(self, table: pa.Table) -> pd.DataFrame:
+        return table.drop_columns([KEY_COLUMN]).to_pandas(types_mapper = PANDAS_INTEGER_DTYPES.get)
+
+    def get_team_schedule(self, team_id: int, season: int = None) -> pd.DataFrame:
+        """
+        Returns a team's games, of every season or of a single one.
+
+        Args:
+            team_id (int): The team's teamID.
+            season (int): If given, only the games of this season.
+
+        Returns:
+            schedule (pd.DataFrame): The normalized schedule rows, ordered by
+                season and then as listed on the team's page.
+        """
+
+        if season is None:
+            low = get_schedule_key(np.int64(team_id), 0)
+            high = get_schedule_key(np.int64(team_id + 1), 0)
+        else:
+            low = get_schedule_key(np.int64(team_id), season)
+            high = low + 1
+
+        return self.to_df(self.get_rows(self.schedules, self.schedule_keys, low, high))
+
+    def get_season_record(self, team_id: int, season: int) -> Dict[str, int]:
+        """
+        Returns a team's record for a season.
+
+        Args:
+            team_id (int): The team's teamID.
+            season (int): The season.
+
+        Returns:
+            record (Dict[str, int]): The number of games, wins, losses and ties,
+                and the points scored and allowed.
+        """
+
+        # Counted straight from the rows, without converting them to pandas.
+        low = get_schedule_key(np.int64(team_id), season)
+        games = self.get_rows(self.schedules, self.schedule_keys, low, low + 1)
+        results = Counter(games.column('result').to_pylist())
+
+        return {
+            'games': games.num_rows,
+            'wins': results['W'],
+            'losses': results['L'],
+            'ties': results['T'],
+            'points_for': pc.sum(games.column('points_for')).as_py() or 0,
+            'points_against': pc.sum(games.column('points_against')).as_py() or 0,
+        }
+
+    def get_head_to_head(self, team_id: int, opponent_id: int) -> pd.DataFrame:
+        """
+        Returns every game between two teams, as listed on the first team's pages.
+
+        Args:
+            team_id (int): The teamID of the team whose side of the games is returned.
+            opponent_id (int): The teamID of the opponent.
+
+        Returns:
+            games (pd.DataFrame): The normalized schedule rows, ordered by season.
+        """
+
+        low = get_schedule_key(np.int64(team_id), 0)
+        high = get_schedule_key(np.int64(team_id + 1), 0)
+        games = self.get_rows(self.schedules, self.schedule_keys, low, high)
+
+        opponent_ids = games.column('opponent_id').to_numpy()
+        return self.to_df(games.take(np.flatnonzero(opponent_ids == opponent_id)))
+
+    def get_division_teams(self, season: int, division: int, region: int = None) -> pd.DataFrame:
+        """
+        Returns the teams of a division, or of a single region of it, for a season.
+
+        Args:
+            season (int): The season.
+            division (int): The division.
+            region (int): If given, only the teams of this region.
+
+        Returns:
+            teams (pd.DataFrame): Ordered by region.
+        """
+
+        if region is None:
+            low = get_team_key(np.int64(season), division, -1)
+            high = low + REGION_RANGE
+        else:
+            low = get_team_key(np.int64(season), division, region)
+            high = low + 1
+
+        return self.to_df(self.get_rows(self.teams, self.team_keys, low, high))
+
+
+def parse_args():
+    parser = ArgumentParser(description = 'Builds the memory-mapped store of the exported seasons.')
+    parser.add_argument('--format', choices = ['csv', 'parquet'], default = 'csv', help = 'Format the seasons were exported in.')
+    parser.add_argument('--seasons', nargs = '+', help = 'Seasons to store. Defaults to every exported season.')
+    parser.add_argument('--store-dir', help = 'Where the store is written. Defaults to output/store.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    n_teams, n_schedule_rows = build_store(args.seasons, args.format, store_dir = args.store_dir)
+    print(f'Stored {n_teams} teams and {n_schedule_rows} schedule rows in {args.store_dir or get_default_store_dir()}.')
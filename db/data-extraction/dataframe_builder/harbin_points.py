@@ -0,0 +1,198 @@
+"""
+OHSAA Harbin computer points, computed week by week for any number of seasons
+from the exported schedules and the division of every team.
+
+    - Level 1: for every win, points for the size of the defeated opponent,
+      from 6 for a Division I opponent down by half a point per division.
+    - Level 2: for every win of every defeated opponent, points for the size
+      of the team that opponent defeated, the same as level 1.
+    - Average: (level 1 + level 2 / 10) / games played.
+
+Ties earn half the points of a win. Games the site marks as not counting in
+the OHSAA rankings (*) and playoff games (#) are left out entirely.
+
+Run from `db/data-extraction` to write the points of every exported season to
+`output/harbin_points.csv`:
+
+    python -m dataframe_builder.harbin_points --format csv
+"""
+
+from argparse import ArgumentParser
+from typing import Iterable, Optional
+import os
+import numpy as np
+import pandas as pd
+from metrics.metrics import METRICS
+from utils.make_output_dir import make_output_dir
+from .dataset import load_dataset
+from .opponent_resolver import OpponentResolver
+from .schedule_normalizer import normalize_schedules
+
+DIVISION_ONE_POINTS = 6.0
+POINTS_PER_DIVISION = 0.5
+
+# Opponents without a division (out of state, or not resolved to a team) are
+# worth no points, but the game is still counted as played.
+UNKNOWN_DIVISION_POINTS = 0.0
+
+LEVEL_TWO_DIVISOR = 10
+
+RESULT_WEIGHTS = {'W': 1.0, 'T': 0.5, 'L': 0.0}
+
+HARBIN_COLUMNS = [
+    'season', 'team_id', 'week', 'division', 'region',
+    'games_played', 'level1', 'level2', 'average', 'region_rank',
+]
+
+
+def get_division_points(divisions: np.ndarray) -> np.ndarray:
+    """Returns the points a win over a team of each division is worth. Missing divisions are NaN."""
+
+    points = DIVISION_ONE_POINTS - POINTS_PER_DIVISION * (divisions - 1)
+    return np.where(np.isnan(points), UNKNOWN_DIVISION_POINTS, points)
+
+
+def get_weeks(game_dates: pd.Series, seasons: pd.Series) -> np.ndarray:
+    """
+    Returns the week of the season each game was played in, counted from the
+    season's first game. Games without a date are put in the last week.
+    """
+
+    first_dates = game_dates.groupby(seasons).transform('min')
+    weeks = ((game_dates - first_dates).dt.days // 7).to_numpy(dtype = float, na_value = np.nan)
+
+    last_weeks = pd.Series(weeks).groupby(seasons.to_numpy()).transform('max').to_numpy()
+    return np.where(np.isnan(weeks), np.nan_to_num(last_weeks), weeks).astype(np.int64)
+
+
+def compute_harbin_points(schedules_df: pd.DataFrame, teams_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes the Harbin points of every team after every week, for any number
+    of seasons at once.
+
+    The games form an adjacency list of (team, opponent, week, result) arrays
+    over every team of every season. Level 1 points are scattered into a
+    (team, week) matrix and summed over the weeks. Level 2 points of a team
+    after week w are the level 1 points, after week w, of the opponents it
+    beat by then, which is a gather of that matrix along the adjacency list.
+    There is no loop over teams or seasons.
+
+    Args:
+        schedules_df (pd.DataFrame): Schedule rows, raw or as loaded by
+            `load_dataset`. Each team's points come from its own schedule.
+        teams_df (pd.DataFrame): The team rows of the same seasons, for their
+            divisions and regions.
+
+    Returns:
+        points (pd.DataFrame): A row per team of `teams_df` and week of its
+            season, see `HARBIN_COLUMNS`. The region rank is by average.
+    """
+
+    with METRICS.timer('compute_harbin_points'):
+        resolver = OpponentResolver(teams_df)
+        games_df = normalize_schedules(schedules_df)
+
+        # Every team of every season gets its own index.
+        teams = teams_df[['season', 'id', 'division', 'region']].astype('Int32').dropna(subset = ['season', 'id'])
+        teams = teams.drop_duplicates(['season', 'id']).reset_index(drop = True)
+        team_index = pd.Series(teams.index, index = pd.MultiIndex.from_frame(teams[['season', 'id']]))
+
+        def get_team_indexes(team_ids: pd.Series) -> np.ndarray:
+            keys = pd.MultiIndex.from_arrays([games_df['season'].astype('Int32'), team_ids.astype('Int32')])
+            return team_index.reindex(keys).fillna(-1).to_numpy(dtype = np.int64)
+
+        team = get_team_indexes(resolver.resolve(schedules_df, 'team')['team_id'])
+        opponent = get_team_indexes(resolver.resolve(schedules_df, 'opponent')['team_id'])
+        week = get_weeks(games_df['game_date'], games_df['season'])
+        result = games_df['result'].astype(object).map(RESULT_WEIGHTS).fillna(0.0).to_numpy(dtype = float)
+
+        counting = (team >= 0) & ~games_df['playoff'].to_numpy() & ~games_df['non_counting'].to_numpy()
+        team, opponent, week, result = team[counting], opponent[counting], week[counting], result[counting]
+
+        n_teams, n_weeks = len(teams), int(week.max()) + 1 if len(week) else 1
+        division_points = get_division_points(teams['division'].to_numpy(dtype = float, na_value = np.nan))
+
+        # Points of each game and a mask of the opponents that are known teams.
+        known_opponent = opponent >= 0
+        level1_game_points = result * np.where(known_opponent, division_points[np.maximum(opponent, 0)], UNKNOWN_DIVISION_POINTS)
+
+        games_played = np.zeros((n_teams, n_weeks))
+        np.add.at(games_played, (team, week), 1)
+        games_played = games_played.cumsum(axis = 1)
+
+        level1 = np.zeros((n_teams, n_weeks))
+        np.add.at(level1, (team, week), level1_game_points)
+        level1 = level1.cumsum(axis = 1)
+
+        # A game counts towards level 2 from its own week on, with whatever
+        # the opponent has won by each of those weeks.
+        played_by_week = np.arange(n_weeks)[None, :] >= week[known_opponent, None]
+        level2_game_points = result[known_opponent, None] * level1[opponent[known_opponent]] * played_by_week
+
+        level2 = np.zeros((n_teams, n_weeks))
+        np.add.at(level2, team[known_opponent], level2_game_points)
+
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            average = np.where(games_played > 0, (level1 + level2 / LEVEL_TWO_DIVISOR) / games_played, 0.0)
+
+        points = pd.DataFrame({
+            'season': np.repeat(teams['season'].to_numpy(dtype = np.int64), n_weeks),
+            'team_id': np.repeat(teams['id'].to_numpy(dtype = np.int64), n_weeks),
+            'week': np.tile(np.arange(n_weeks), n_teams),
+            'division': np.repeat(teams['division'].to_numpy(), n_weeks),
+            'region': np.repeat(teams['region'].to_numpy(), n_weeks),
+            'games_played': games_played.ravel().astype(np.int64),
+            'level1': level1.ravel(),
+            'level2': level2.ravel(),
+            'average': average.ravel().round(4),
+        })
+
+        # Seasons differ in length, so weeks past the end of a season are dropped.
+        last_weeks = pd.Series(week).groupby(teams['season'].to_numpy()[team]).max()
+        points = points[points['week'] <= points['season'].map(last_weeks).fillna(0)]
+
+        points = points.sort_values(
+            ['season', 'week', 'division', 'region', 'average', 'team_id'],
+            ascending = [True, True, True, True, False, True],
+        )
+        ranks = points.groupby(['season', 'week', 'division', 'region'], dropna = False).cumcount() + 1
+        points['region_rank'] = ranks.where(points[['division', 'region']].notna().all(axis = 1))
+
+    return points.sort_values(['season', 'team_id', 'week'], ignore_index = True)[HARBIN_COLUMNS].astype({
+        'season': 'Int16',
+        'team_id': 'Int32',
+        'week': 'Int8',
+        'division': 'Int8',
+        'region': 'Int8',
+        'games_played': 'Int8',
+        'region_rank': 'Int16',
+    })
+
+
+def load_harbin_points(
+    seasons: Optional[Iterable[str]] = None,
+    output_format: str = 'csv',
+    data_dir: str = None,
+) -> pd.DataFrame:
+    """Computes the Harbin points of exported seasons, see `compute_harbin_points`."""
+
+    dataset = load_dataset(seasons, output_format, data_dir)
+    return compute_harbin_points(dataset.schedules_df, dataset.teams_df)
+
+
+def parse_args():
+    parser = ArgumentParser(description = 'Computes the OHSAA Harbin points of the exported seasons.')
+    parser.add_argument('--format', choices = ['csv', 'parquet'], default = 'csv', help = 'Format the seasons were exported in.')
+    parser.add_argument('--seasons', nargs = '+', help = 'Seasons to compute. Defaults to every exported season.')
+    parser.add_argument('--output', help = 'Where the points are written. Defaults to output/harbin_points.csv.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    points = load_harbin_points(args.seasons, args.format)
+
+    output_path = args.output or os.path.join(make_output_dir(), 'harbin_points.csv')
+    points.to_csv(output_path, index = False)
+    print(f'Wrote the Harbin points of {points["team_id"].nunique()} teams to {output_path}.')
@@ -0,0 +1,225 @@
+"""
+Resolves the opponents of schedule rows, which are only display names, to the
+teamIDs of the team tables.
+
+Run from `db/data-extraction` to resolve every exported season and write the
+names that could not be resolved to `output/unresolved_opponents.csv`:
+
+    python -m dataframe_builder.opponent_resolver --format csv
+"""
+
+from argparse import ArgumentParser
+from typing import Iterable, Optional, Tuple
+import os
+import numpy as np
+import pandas as pd
+from metrics.metrics import METRICS
+from utils.make_output_dir import make_output_dir
+from .dataset import load_dataset
+from .schedule_normalizer import COLUMN_ALIASES, MARKER_REGEX, parse_distinct, parse_seasons, to_strings
+
+# How the name of a schedule row was matched:
+#   - season: to a single team of the same season.
+#   - other_season: to a single team, but only in other seasons, e.g. an
+#     opponent whose own page was not scraped that season.
+#   - ambiguous: to several teams.
+#   - unresolved: to no team at all.
+MATCHES = pd.CategoricalDtype(['season', 'other_season', 'ambiguous', 'unresolved'])
+
+# Rewrites applied to every name before it is looked up, in order.
+NAME_REWRITES = [
+    (MARKER_REGEX, ''),
+    (r'&', ' and '),
+    (r'\bsaint\b', 'st'),
+    (r'[^\w\s]', ' '),
+    (r'\s+(high school|high|school|hs)\s*$', ''),
+    (r'\s+', ' '),
+]
+
+
+def normalize_team_names(names: pd.Series) -> pd.Series:
+    """
+    Returns the lookup key of every name: lowercased, without the site's
+    markers, punctuation, or a trailing "High School", and with "Saint"
+    written as "St".
+    """
+
+    def normalize(distinct_names: pd.Series) -> pd.DataFrame:
+        keys = distinct_names.str.lower()
+
+        for pattern, replacement in NAME_REWRITES:
+            keys = keys.str.replace(pattern, replacement, regex = True)
+
+        return pd.DataFrame({'key': keys.str.strip().replace('', pd.NA)})
+
+    return parse_distinct(to_strings(names), normalize)['key']
+
+
+def get_name_column(schedules_df: pd.DataFrame, column: str) -> pd.Series:
+    """Returns a name column of schedule rows. 'team' is also found under its 2002-2012 name, 'name'."""
+
+    if column not in schedules_df.columns:
+        column = {alias: name for name, alias in COLUMN_ALIASES.items()}.get(column, column)
+
+    return schedules_df[column]
+
+
+class OpponentResolver:
+    """
+    Hash index from the names of the teams to their teamIDs, built from the
+    team tables of any number of seasons. Every team is indexed under its name
+    and under its name followed by its mascot.
+
+    Names are looked up within their own season first, and in every other
+    season second, so that teams which are only known from other seasons are
+    still resolved. A name that is shared by several teams is never resolved
+    to either of them.
+    """
+
+    def __init__(self, teams_df: pd.DataFrame) -> None:
+        """
+        Args:
+            teams_df (pd.DataFrame): Team rows of one or more seasons, as exported
+                by the builders.
+
+        Returns:
+            None
+        """
+
+        with METRICS.timer('build_opponent_index'):
+            seasons = parse_distinct(to_strings(teams_df['season']), parse_seasons)['season']
+            team_ids = pd.to_numeric(teams_df['id'], errors = 'coerce').astype('Int32')
+            names = to_strings(teams_df['name'])
+            mascots = to_strings(teams_df['mascot'] if 'mascot' in teams_df.columns else pd.Series('', index = teams_df.index))
+
+            variants = pd.concat([
+                pd.DataFrame({'season': seasons, 'key': normalize_team_names(names), 'team_id': team_ids}),
+                pd.DataFrame({'season': seasons, 'key': normalize_team_names(names + ' ' + mascots), 'team_id': team_ids}),
+            ], ignore_index = True).dropna().drop_duplicates()
+
+            season_ids = variants.groupby(['season', 'key'])['team_id'].agg(['first', 'nunique'])
+            self.season_index = season_ids['first'].where(season_ids['nunique'] == 1).rename('season_team_id')
+
+            name_ids = variants.drop_duplicates(['key', 'team_id']).groupby('key')['team_id'].agg(['first', 'nunique'])
+            self.name_index = name_ids['first'].where(name_ids['nunique'] == 1).rename('name_team_id')
+
+    def __len__(self) -> int:
+        return len(self.name_index)
+
+    def resolve(self, schedules_df: pd.DataFrame, column: str = 'opponent') -> pd.DataFrame:
+        """
+        Resolves a name column of schedule rows to teamIDs, with a single join
+        against the index for all of the rows.
+
+        Args:
+            schedules_df (pd.DataFrame): Schedule rows of any number of seasons,
+                raw or normalized.
+            column (str): The column to resolve, e.g. 'opponent' or 'team'.
+
+        Returns:
+            resolved (pd.DataFrame): Aligned with the schedule rows:
+                - team_id (Int32): The teamID, or missing.
+                - match (category): How the name was matched, see `MATCHES`.
+        """
+
+        with METRICS.timer('resolve_opponents'):
+            keys = pd.DataFrame({
+                'season': parse_distinct(to_strings(schedules_df['season']), parse_seasons)['season'].to_numpy(),
+                'key': normalize_team_names(get_name_column(schedules_df, column)).to_numpy(),
+            })
+
+            joined = keys.join(self.season_index, on = ['season', 'key']).join(self.name_index, on = 'key')
+
+            season_team_ids = joined['season_team_id']
+            name_team_ids = joined['name_team_id']
+
+            # Keys that are indexed but hold no teamID are shared by several teams.
+            ambiguous_in_season = (
+                pd.MultiIndex.from_frame(keys).isin(self.season_index.index) & season_team_ids.isna().to_numpy()
+            )
+            ambiguous = joined['key'].isin(self.name_index.index).to_numpy() & name_team_ids.isna().to_numpy()
+
+            match = np.select(
+                [season_team_ids.notna().to_numpy(), ambiguous_in_season, name_team_ids.notna().to_numpy(), ambiguous],
+                ['season', 'ambiguous', 'other_season', 'ambiguous'],
+                default = 'unresolved',
+            )
+
+            # A name shared by several teams of its own season is not resolved
+            # to a team of another season either.
+            team_ids = season_team_ids.fillna(name_team_ids).astype('Int32').mask(ambiguous_in_season)
+
+        return pd.DataFrame(
+            {'team_id': team_ids.array, 'match': pd.Categorical(match, dtype = MATCHES)},
+            index = schedules_df.index,
+        )
+
+    def get_unresolved_report(self, schedules_df: pd.DataFrame, column: str = 'opponent') -> pd.DataFrame:
+        """
+        Returns the names that could not be resolved to a single team, most
+        frequent first.
+
+        Args:
+            schedules_df (pd.DataFrame): Schedule rows of any number of seasons.
+            column (str): The column to resolve.
+
+        Returns:
+            report (pd.DataFrame): A row per name and match (ambiguous or
+                unresolved), with the number of games, the number of seasons,
+                and the first and last season it appears in.
+        """
+
+        resolved = self.resolve(schedules_df, column)
+        unresolved = resolved['team_id'].isna()
+
+        rows = pd.DataFrame({
+            'name': to_strings(get_name_column(schedules_df, column)).str.replace(MARKER_REGEX, '', regex = True)[unresolved],
+            'match': resolved['match'][unresolved].astype(str),
+            'season': parse_distinct(to_strings(schedules_df['season']), parse_seasons)['season'][unresolved],
+        })
+
+        report = rows.groupby(['name', 'match'], dropna = False).agg(
+            games = ('season', 'size'),
+            seasons = ('season', 'nunique'),
+            first_season = ('season', 'min'),
+            last_season = ('season', 'max'),
+        ).reset_index()
+
+        return report.sort_values(['games', 'name'], ascending = [False, True], ignore_index = True)
+
+
+def load_exported_tables(
+    seasons: Optional[Iterable[str]] = None,
+    output_format: str = 'csv',
+    data_dir: str = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Reads the exported teams and schedules of several seasons, see `load_dataset`."""
+
+    dataset = load_dataset(seasons, output_format, data_dir)
+
+    if dataset.teams_df.empty:
+        raise FileNotFoundError(f'No exported {output_format} seasons were found in {data_dir or make_output_dir()}.')
+
+    return dataset.teams_df, dataset.schedules_df
+
+
+def parse_args():
+    parser = ArgumentParser(description = 'Resolves the opponents of the exported schedules to teamIDs.')
+    parser.add_argument('--format', choices = ['csv', 'parquet'], default = 'csv', help = 'Format the seasons were exported in.')
+    parser.add_argument('--seasons', nargs = '+', help = 'Seasons to resolve. Defaults to every exported season.')
+    parser.add_argument('--report', help = 'Where the unresolved names are written. Defaults to output/unresolved_opponents.csv.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    teams_df, schedules_df = load_exported_tables(args.seasons, args.format)
+    resolver = OpponentResolver(teams_df)
+
+    matches = resolver.resolve(schedules_df)['match'].value_counts()
+    print(', '.join(f'{count} {match}' for match, count in matches.items()))
+
+    report_path = args.report or os.path.join(make_output_dir(), 'unresolved_opponents.csv')
+    resolver.get_unresolved_report(schedules_df).to_csv(report_path, index = False)
+    print(f'Wrote the unresolved names to {report_path}.')
@@ -0,0 +1,205 @@
+from typing import Dict, List, Optional
+import glob
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from utils.make_output_dir import make_output_dir
+
+# Strings that repeat a lot (colors, counties, opponents, ...) are dictionary
+# encoded, so they are stored once per file and read back as categoricals.
+DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+
+# The season is not stored inside of the files. It is the partition key, e.g.
+# `output/parquet/teams/season=2015/teams.parquet`.
+PARTITIONING = ds.partitioning(pa.schema([('season', pa.int16())]), flavor = 'hive')
+
+TEAMS_SCHEMA = pa.schema([
+    ('id', pa.int32()),
+    ('primary_color', DICTIONARY_STRING),
+    ('secondary_color', DICTIONARY_STRING),
+    ('city', DICTIONARY_STRING),
+    ('county', DICTIONARY_STRING),
+    ('state', DICTIONARY_STRING),
+    ('division', pa.int8()),
+    ('region', pa.int8()),
+    ('name', pa.string()),
+    ('mascot', pa.string()),
+])
+
+# Seasons 2002-2012 name the team column 'name' instead of 'team'. Both are
+# written as 'team' so that every season shares a single schema.
+SCHEDULES_SCHEMA = pa.schema([
+    ('team', DICTIONARY_STRING),
+    ('game_dates', pa.string()),
+    ('field', DICTIONARY_STRING),
+    ('opponent', DICTIONARY_STRING),
+    ('result', DICTIONARY_STRING),
+    ('score', pa.string()),
+    ('game_info', DICTIONARY_STRING),
+])
+
+SCHEMAS: Dict[str, pa.Schema] = {
+    'teams': TEAMS_SCHEMA,
+    'schedules': SCHEDULES_SCHEMA,
+}
+
+COLUMN_ALIASES = {
+    'schedules': {'name': 'team'},
+}
+
+COMPRESSION = 'zstd'
+
+# Integer columns with nulls are read as nullable integers instead of floats.
+PANDAS_INTEGER_DTYPES = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+}
+
+
+def get_dataset_dir(table: str, data_dir: str = None) -> str:
+    """Returns the directory that holds every season partition of a table."""
+    return os.path.join(data_dir or make_output_dir(), 'parquet', table)
+
+
+def get_partition_dir(table: str, season: str, data_dir: str = None) -> str:
+    """Returns the directory that holds a single season of a table."""
+    return os.path.join(get_dataset_dir(table, data_dir), f'season={int(season)}')
+
+
+def to_arrow_table(df: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """
+    Converts a scraped DataFrame to an Arrow table with the given schema.
+
+    The scraped columns hold a mix of ints and strings (e.g. the 2002-2012
+    layouts leave division and region as strings), so integer columns are
+    parsed and anything that is not a number becomes null. Empty strings become
+    null as well. Columns of the DataFrame that are not in the schema are dropped.
+
+    Args:
+        df (pd.DataFrame): The scraped rows.
+        schema (pa.Schema): The schema of the table.
+
+    Returns:
+        table (pa.Table)
+    """
+
+    arrays: List[pa.Array] = []
+
+    for field in schema:
+        if field.name not in df.columns:
+            arrays.append(pa.nulls(len(df), field.type))
+            continue
+
+        values = df[field.name].astype(object).where(df[field.name].notna(), None)
+        values = values.replace('', None)
+
+        if pa.types.is_integer(field.type):
+            numbers = pd.to_numeric(values, errors = 'coerce').astype('Int64')
+            arrays.append(pa.array(numbers, type = field.type, from_pandas = True))
+        else:
+            strings = pa.array(values.map(str, na_action = 'ignore'), type = pa.string(), from_pandas = True)
+
+            if pa.types.is_dictionary(field.type):
+                strings = pc.dictionary_encode(strings)
+
+            arrays.append(strings)
+
+    return pa.Table.from_arrays(arrays, schema = schema)
+
+
+def write_season_table(df: pd.DataFrame, table: str, season: str, part: int = None) -> str:
+    """
+    Writes a season of a table as a Parquet file inside of the season's partition.
+
+    Args:
+        df (pd.DataFrame): The scraped rows.
+        table (str): Either 'teams' or 'schedules'.
+        season (str): The season for which the information is applicable for.
+        part (int): If given, only part of the season was scraped and the file
+            is written as a numbered part that is later combined with
+            `merge_season_table_parts`.
+
+    Returns:
+        path (str): Location of the written file.
+    """
+
+    df = df.rename(columns = COLUMN_ALIASES.get(table, {}))
+
+    # A column and its alias would both be selected by `to_arrow_table`, e.g.
+    # reused 'team' rows next to freshly built 'name' rows.
+    duplicated_columns = df.columns[df.columns.duplicated()].unique().tolist()
+    if duplicated_columns:
+        raise ValueError(f'The {season} {table} rows have duplicate columns after renaming: {duplicated_columns}.')
+
+    partition_dir = get_partition_dir(table, season)
+    os.makedirs(partition_dir, exist_ok = True)
+
+    if part is None:
+        # Parts left behind by an earlier sharded run would be read as
+        # duplicate rows.
+        for stale_path in glob.glob(os.path.join(partition_dir, '*.parquet')):
+            os.remove(stale_path)
+
+        path = os.path.join(partition_dir, f'{table}.parquet')
+    else:
+        path = os.path.join(partition_dir, f'{table}.part{part}.parquet')
+
+    pq.write_table(to_arrow_table(df, SCHEMAS[table]), path, compression = COMPRESSION)
+    return path
+
+
+def merge_season_table_parts(table: str, season: str, parts: int) -> None:
+    """
+    Combines the numbered parts written by `write_season_table` into the
+    season's file and removes the parts.
+
+    Args:
+        table (str): Either 'teams' or 'schedules'.
+        season (str): The season for which the information is applicable for.
+        parts (int): The number of parts the season was split into.
+    """
+
+    partition_dir = get_partition_dir(table, season)
+    part_paths = [os.path.join(partition_dir, f'{table}.part{part}.parquet') for part in range(parts)]
+
+    merged_table = pa.concat_tables([pq.read_table(part_path) for part_path in part_paths])
+    pq.write_table(merged_table, os.path.join(partition_dir, f'{table}.parquet'), compression = COMPRESSION)
+
+    for part_path in part_paths:
+        os.remove(part_path)
+
+
+def read_exported_table(
+    table: str,
+    columns: Optional[List[str]] = None,
+    seasons: Optional[List[str]] = None,
+    data_dir: str = None,
+) -> pd.DataFrame:
+    """
+    Reads an exported table back. Only the requested columns and season
+    partitions are read from disk.
+
+    Args:
+        table (str): Either 'teams' or 'schedules'.
+        columns (Optional[List[str]]): Columns to read. Defaults to every column,
+            with the season as the last one.
+        seasons (Optional[List[str]]): Seasons to read. Defaults to every season.
+        data_dir (str): The output directory. Defaults to `make_output_dir()`.
+
+    Returns:
+        df (pd.DataFrame): Dictionary-encoded columns are read as categoricals
+            and integer columns as nullable integers.
+    """
+
+    dataset = ds.dataset(get_dataset_dir(table, data_dir), format = 'parquet', partitioning = PARTITIONING)
+
+    season_filter = None
+    if seasons is not None:
+        season_filter = ds.field('season').isin([int(season) for season in seasons])
+
+    arrow_table = dataset.to_table(columns = columns, filter = season_filter)
+    return arrow_table.to_pandas(types_mapper = PANDAS_INTEGER_DTYPES.get)
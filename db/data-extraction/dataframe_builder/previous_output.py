@@ -0,0 +1,143 @@
+from typing import Optional, Tuple
+import os
+import pandas as pd
+from utils.get_query_parameter import get_query_parameter
+
+
+class PreviousSeasonOutput:
+    """
+    The teams and schedules that a previous run exported for a season, looked
+    up by teamID. Used by incremental runs to reuse the rows of teams whose
+    schedule page has not changed instead of extracting them again.
+
+    The csv files are read back as plain strings so that reused rows are written
+    out exactly as they were read in.
+    """
+
+    def __init__(self, teams_df: pd.DataFrame, schedules_df: pd.DataFrame) -> None:
+        """
+        Args:
+            teams_df (pd.DataFrame): The previously exported teams.
+            schedules_df (pd.DataFrame): The previously exported schedules.
+
+        Returns:
+            None
+        """
+
+        self.teams_df = teams_df
+        self.schedules_df = schedules_df
+
+        # Schedules only carry the team's name, so they are matched to a
+        # teamID through the teams table.
+        self.schedule_name_column = 'team' if 'team' in schedules_df.columns else 'name'
+        self.team_ids_per_name = teams_df.groupby('name')['id'].nunique()
+
+    @classmethod
+    def load(
+        cls,
+        data_dir: str,
+        season: str,
+        output_format: str = 'csv',
+        schedule_name_column: str = 'team',
+    ) -> Optional['PreviousSeasonOutput']:
+        """
+        Reads the season's previously exported files.
+
+        Args:
+            data_dir (str): The output directory.
+            season (str): The season for which the information is applicable for.
+            output_format (str): The format the season was exported in.
+            schedule_name_column (str): The name of the schedules' team column
+                in the season's layout, 'name' for seasons 2002-2012. Parquet
+                files always name it 'team', so it is renamed back to match
+                the rows the season's builder produces.
+
+        Returns:
+            previous output (Optional[PreviousSeasonOutput]): None if the season
+                has not been exported before.
+        """
+
+        if output_format == 'parquet':
+            return cls.load_parquet(data_dir, season, schedule_name_column)
+
+        teams_path = os.path.join(data_dir, f'teams_{season}.csv')
+        schedules_path = os.path.join(data_dir, f'schedules_{season}.csv')
+
+        if not os.path.exists(teams_path) or not os.path.exists(schedules_path):
+            return None
+
+        return cls(
+            pd.read_csv(teams_path, dtype = str, keep_default_na = False),
+            pd.read_csv(schedules_path, dtype = str, keep_default_na = False),
+        )
+
+    @classmethod
+    def load_parquet(
+        cls,
+        data_dir: str,
+        season: str,
+        schedule_name_column: str = 'team',
+    ) -> Optional['PreviousSeasonOutput']:
+        """
+        Reads the season's previously exported Parquet files. The typed columns
+        are turned back into strings, with nulls as empty strings, the same as
+        the csv files are read.
+
+        Reused rows are combined with freshly built ones before the season is
+        written again, so the team column of the schedules is renamed to the
+        one the season's builder uses (see `COLUMN_ALIASES` of `parquet_export`).
+        """
+
+        from .parquet_export import get_partition_dir, read_exported_table
+
+        tables = ['teams', 'schedules']
+        if not all(os.path.isdir(get_partition_dir(table, season, data_dir)) for table in tables):
+            return None
+
+        teams_df, schedules_df = [
+            read_exported_table(table, seasons = [season], data_dir = data_dir).astype(object)
+            for table in tables
+        ]
+
+        schedules_df = schedules_df.rename(columns = {'team': schedule_name_column})
+
+        return cls(
+            teams_df.where(teams_df.notna(), '').astype(str),
+            schedules_df.where(schedules_df.notna(), '').astype(str),
+        )
+
+    def get_team_rows(self, team_schedule_link: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """
+        Returns the previously exported team row and schedule rows for a team.
+
+        Args:
+            team_schedule_link (str): The url of the team's schedule page.
+
+        Returns:
+            team row, schedule rows (Optional[Tuple[pd.DataFrame, pd.DataFrame]]):
+                None if the team was not exported before, or if its schedule rows
+                cannot be told apart from another team's.
+        """
+
+        try:
+            team_id = get_query_parameter(team_schedule_link, 'teamID')
+        except KeyError:
+            return None
+
+        team_rows = self.teams_df[self.teams_df['id'] == team_id]
+
+        if team_rows.empty:
+            return None
+
+        name = team_rows['name'].iloc[0]
+
+        if self.team_ids_per_name[name] > 1:
+            return None
+
+        schedule_rows = self.schedules_df[self.schedules_df[self.schedule_name_column] == name]
+
+        # A team that was linked more than once was exported more than once.
+        # Only keep a single copy of its rows.
+        copies = len(team_rows)
+
+        return team_rows.head(1), schedule_rows.head(len(schedule_rows) // copies)
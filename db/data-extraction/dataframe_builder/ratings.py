@@ -0,0 +1,345 @@
+"""
+Massey and Elo ratings of every team, computed per season from the exported
+schedules with the opponents resolved to teamIDs.
+
+The games of a season are kept as a sparse game matrix, a row per game with
++1 in the column of one team and -1 in the column of the other, so a season
+of 720 teams and 5,000 games takes 10,000 stored values instead of a dense
+team by team pivot.
+
+    - Massey: the ratings whose differences best fit the score margins, in
+      the least squares sense, solved on the sparse game matrix.
+    - Elo: every team starts the season at 1500 and every game moves the
+      ratings of both teams by how unexpected its result was. The games of a
+      week are played against the ratings at the start of that week, so a
+      week is a single vectorized update.
+
+Seasons are rated independently, so re-rating a season after it was scraped
+again only touches that season.
+
+Run from `db/data-extraction` to write the ratings of every exported season
+to `output/ratings.csv`:
+
+    python -m dataframe_builder.ratings --format csv
+"""
+
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import lsqr
+from metrics.metrics import METRICS
+from utils.make_output_dir import make_output_dir
+from .dataset import load_dataset
+from .harbin_points import RESULT_WEIGHTS, get_weeks
+from .opponent_resolver import OpponentResolver
+from .schedule_normalizer import normalize_schedules
+
+ELO_INITIAL_RATING = 1500.0
+ELO_K = 32.0
+ELO_SCALE = 400.0
+
+# The least squares solver stops once the ratings change by less than this.
+MASSEY_TOLERANCE = 1e-10
+
+RATINGS_COLUMNS = [
+    'season', 'team_id', 'division', 'region', 'games',
+    'massey', 'massey_rank', 'elo', 'elo_rank',
+]
+
+
+@dataclass
+class SeasonGames:
+    """
+    The games of a season between two of its teams, each counted once:
+        - season (int)
+        - teams (pd.DataFrame): The season's teams (id, division, region), a
+          row per column of the game matrix, including teams without games.
+        - team, opponent (np.ndarray): The column of each side of every game.
+        - week (np.ndarray): The week of the season each game was played in.
+        - result (np.ndarray): 1 if the team won, 0.5 for a tie, 0 if it lost.
+        - margin (np.ndarray): The team's points minus the opponent's, NaN
+          if the score is unknown.
+    """
+    season: int
+    teams: pd.DataFrame
+    team: np.ndarray
+    opponent: np.ndarray
+    week: np.ndarray
+    result: np.ndarray
+    margin: np.ndarray
+
+    def get_game_matrix(self) -> sparse.csr_matrix:
+        """Returns the (games, teams) matrix with +1 for the team and -1 for the opponent of every game."""
+
+        n_games = len(self.team)
+        rows = np.tile(np.arange(n_games), 2)
+        columns = np.concatenate([self.team, self.opponent])
+        values = np.concatenate([np.ones(n_games), -np.ones(n_games)])
+
+        return sparse.csr_matrix((values, (rows, columns)), shape = (n_games, len(self.teams)))
+
+    def get_games_played(self) -> np.ndarray:
+        n_teams = len(self.teams)
+        return np.bincount(self.team, minlength = n_teams) + np.bincount(self.opponent, minlength = n_teams)
+
+
+def get_season_games(schedules_df: pd.DataFrame, teams_df: pd.DataFrame) -> Dict[int, SeasonGames]:
+    """
+    Extracts the games of any number of seasons at once.
+
+    A game between two scraped teams is listed on both of their schedules, so
+    games are only kept once per season, pair of teams and date. Games whose
+    result is unknown, or whose team or opponent is not a team of that season,
+    can't be rated and are left out. Playoff and non-counting games are rated.
+
+    Args:
+        schedules_df (pd.DataFrame): Schedule rows, raw or as loaded by
+            `load_dataset`.
+        teams_df (pd.DataFrame): The team rows of the same seasons.
+
+    Returns:
+        games (Dict[int, SeasonGames]): The games of every season of `teams_df`.
+    """
+
+    resolver = OpponentResolver(teams_df)
+    games_df = normalize_schedules(schedules_df)
+
+    # Every team gets a column of its season's game matrix.
+    teams = teams_df[['season', 'id', 'division', 'region']].astype('Int32').dropna(subset = ['season', 'id'])
+    teams = teams.drop_duplicates(['season', 'id']).sort_values(['season', 'id'], ignore_index = True)
+    columns = teams.groupby('season').cumcount()
+    team_index = pd.Series(columns.to_numpy(), index = pd.MultiIndex.from_frame(teams[['season', 'id']]))
+
+    def get_columns(team_ids: pd.Series) -> np.ndarray:
+        keys = pd.MultiIndex.from_arrays([games_df['season'].astype('Int32'), team_ids.astype('Int32')])
+        return team_index.reindex(keys).fillna(-1).to_numpy(dtype = np.int64)
+
+    team = get_columns(resolver.resolve(schedules_df, 'team')['team_id'])
+    opponent = get_columns(resolver.resolve(schedules_df, 'opponent')['team_id'])
+    season = games_df['season'].astype('Int64').fillna(-1).to_numpy(dtype = np.int64)
+    week = get_weeks(games_df['game_date'], games_df['season'])
+    result = games_df['result'].astype(object).map(RESULT_WEIGHTS).to_numpy(dtype = float, na_value = np.nan)
+    margin = (games_df['points_for'] - games_df['points_against']).to_numpy(dtype = float, na_value = np.nan)
+    days = games_df['game_date'].to_numpy(dtype = 'datetime64[D]').astype(np.int64)
+    playoff = games_df['playoff'].to_numpy(dtype = bool)
+
+    rated = (team >= 0) & (opponent >= 0) & (team != opponent) & ~np.isnan(result)
+    rated_index = np.flatnonzero(rated)
+
+    # The first listing of every game is kept, seen from that team's side.
+    # Playoff rematches of undated games are still told apart.
+    listings = pd.DataFrame({
+        'season': season[rated_index],
+        'low': np.minimum(team, opponent)[rated_index],
+        'high': np.maximum(team, opponent)[rated_index],
+        'day': days[rated_index],
+        'playoff': playoff[rated_index],
+    })
+    rated_index = rated_index[~listings.duplicated().to_numpy()]
+
+    order = rated_index[np.argsort(season[rated_index], kind = 'stable')]
+    ordered_seasons = season[order]
+    season_games = {}
+
+    for season_value, season_teams in teams.groupby('season', sort = True):
+        start, stop = np.searchsorted(ordered_seasons, [season_value, season_value + 1])
+        in_season = order[start:stop]
+
+        season_games[int(season_value)] = SeasonGames(
+            season = int(season_value),
+            teams = season_teams[['id', 'division', 'region']].reset_index(drop = True),
+            team = team[in_season],
+            opponent = opponent[in_season],
+            week = week[in_season],
+            result = result[in_season],
+            margin = margin[in_season],
+        )
+
+    return season_games
+
+
+def solve_massey(games: SeasonGames) -> np.ndarray:
+    """
+    Solves the Massey ratings of a season: the ratings r minimizing
+    ||X r - margins||, where X is the game matrix of the games with a score.
+
+    Ratings are only defined up to a constant within every group of teams
+    that are connected by games. The least squares solver returns the
+    solution of minimum norm, which averages 0 within every such group, so
+    no constraint row is needed even if some teams only played out of state.
+
+    Args:
+        games (SeasonGames): The season's games.
+
+    Returns:
+        ratings (np.ndarray): A rating per team of `games.teams`, NaN for teams
+            without a scored game.
+    """
+
+    scored = ~np.isnan(games.margin)
+    ratings = np.full(len(games.teams), np.nan)
+
+    if not scored.any():
+        return ratings
+
+    game_matrix = games.get_game_matrix()[scored]
+    solution = lsqr(game_matrix, games.margin[scored], atol = MASSEY_TOLERANCE, btol = MASSEY_TOLERANCE)[0]
+
+    has_games = np.diff(game_matrix.tocsc().indptr) > 0
+    ratings[has_games] = solution[has_games]
+    return ratings
+
+
+def run_elo(games: SeasonGames, k: float = ELO_K) -> np.ndarray:
+    """
+    Runs the Elo ratings of a season, a week at a time. Every game of a week
+    is played against the ratings at the start of the week, so the updates of
+    a week are computed for all of its games at once and summed per team.
+
+    Args:
+        games (SeasonGames): The season's games.
+        k (float): The most a single game moves a rating.
+
+    Returns:
+        ratings (np.ndarray): A rating per team of `games.teams` after the
+            season's last week.
+    """
+
+    n_teams = len(games.teams)
+    ratings = np.full(n_teams, ELO_INITIAL_RATING)
+
+    order = np.argsort(games.week, kind = 'stable')
+    weeks, week_starts = np.unique(games.week[order], return_index = True)
+
+    for week_games in np.split(order, week_starts[1:]) if len(weeks) else []:
+        team, opponent = games.team[week_games], games.opponent[week_games]
+
+        expected = 1 / (1 + 10 ** ((ratings[opponent] - ratings[team]) / ELO_SCALE))
+        changes = k * (games.result[week_games] - expected)
+
+        ratings += np.bincount(team, changes, n_teams) - np.bincount(opponent, changes, n_teams)
+
+    return ratings
+
+
+def rate_season(games: SeasonGames, elo_k: float = ELO_K) -> pd.DataFrame:
+    """Rates a season's teams and ranks them by each rating, see `RATINGS_COLUMNS`."""
+
+    ratings = pd.DataFrame({
+        'season': games.season,
+        'team_id': games.teams['id'],
+        'division': games.teams['division'],
+        'region': games.teams['region'],
+        'games': games.get_games_played(),
+        'massey': solve_massey(games).round(4),
+        'elo': run_elo(games, elo_k).round(2),
+    })
+
+    ratings['massey_rank'] = ratings['massey'].rank(method = 'min', ascending = False)
+    ratings['elo_rank'] = ratings['elo'].where(ratings['games'] > 0).rank(method = 'min', ascending = False)
+
+    return ratings[RATINGS_COLUMNS].astype({
+        'season': 'Int16',
+        'team_id': 'Int32',
+        'division': 'Int8',
+        'region': 'Int8',
+        'massey_rank': 'Int16',
+        'elo_rank': 'Int16',
+    })
+
+
+class RatingEngine:
+    """
+    Keeps the games and ratings of every season it was given. Seasons are
+    rated independently of one another, so updating the engine with the
+    schedules of a single season re-extracts and re-solves only that season.
+    """
+
+    def __init__(self, elo_k: float = ELO_K) -> None:
+        """
+        Args:
+            elo_k (float): The most a single game moves an Elo rating.
+
+        Returns:
+            None
+        """
+
+        self.elo_k = elo_k
+        self.games: Dict[int, SeasonGames] = {}
+        self.ratings: Dict[int, pd.DataFrame] = {}
+
+    def update(self, schedules_df: pd.DataFrame, teams_df: pd.DataFrame) -> List[int]:
+        """
+        Rates the seasons of the given rows, replacing any earlier ratings of them.
+
+        Args:
+            schedules_df (pd.DataFrame): Schedule rows of one or more seasons.
+            teams_df (pd.DataFrame): The team rows of the same seasons.
+
+        Returns:
+            seasons (List[int]): The seasons that were rated.
+        """
+
+        with METRICS.timer('compute_ratings'):
+            season_games = get_season_games(schedules_df, teams_df)
+
+            for season, games in season_games.items():
+                self.games[season] = games
+                self.ratings[season] = rate_season(games, self.elo_k)
+
+        return sorted(season_games)
+
+    def get_ratings(self, seasons: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """
+        Args:
+            seasons (Optional[Iterable[int]]): Seasons to return. Defaults to
+                every rated season.
+
+        Returns:
+            ratings (pd.DataFrame): A row per team and season, see `RATINGS_COLUMNS`.
+        """
+
+        seasons = sorted(self.ratings) if seasons is None else [int(season) for season in seasons if int(season) in self.ratings]
+
+        if not seasons:
+            return pd.DataFrame(columns = RATINGS_COLUMNS)
+
+        return pd.concat([self.ratings[season] for season in seasons], ignore_index = True)
+
+
+def load_ratings(
+    seasons: Optional[Iterable[str]] = None,
+    output_format: str = 'csv',
+    data_dir: str = None,
+    elo_k: float = ELO_K,
+) -> pd.DataFrame:
+    """Rates exported seasons, see `RatingEngine`."""
+
+    dataset = load_dataset(seasons, output_format, data_dir)
+
+    engine = RatingEngine(elo_k)
+    engine.update(dataset.schedules_df, dataset.teams_df)
+    return engine.get_ratings()
+
+
+def parse_args():
+    parser = ArgumentParser(description = 'Computes the Massey and Elo ratings of the exported seasons.')
+    parser.add_argument('--format', choices = ['csv', 'parquet'], default = 'csv', help = 'Format the seasons were exported in.')
+    parser.add_argument('--seasons', nargs = '+', help = 'Seasons to rate. Defaults to every exported season.')
+    parser.add_argument('--elo-k', type = float, default = ELO_K, help = 'The most a single game moves an Elo rating.')
+    parser.add_argument('--output', help = 'Where the ratings are written. Defaults to output/ratings.csv.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    ratings = load_ratings(args.seasons, args.format, elo_k = args.elo_k)
+
+    output_path = args.output or os.path.join(make_output_dir(), 'ratings.csv')
+    ratings.to_csv(output_path, index = False)
+    print(f'Wrote the ratings of {len(ratings)} teams to {output_path}.')
@@ -0,0 +1,190 @@
+from typing import Callable, Iterable, Optional
+import numpy as np
+import pandas as pd
+from metrics.metrics import METRICS
+
+# Markers the site appends to the opponent, explained by the info rows at the
+# bottom of the schedule tables (see `schedule_table.INFO_ROWS`).
+PLAYOFF_MARKER = '#'
+NON_COUNTING_MARKER = '*'
+MARKER_REGEX = r'\s*[#*]+\s*$'
+
+SCORE_REGEX = r'(?P<points_for>\d+)\s*-\s*(?P<points_against>\d+)'
+
+# Game dates are written either as "Aug 20" (optionally with a weekday in
+# front) or as "8/20".
+MONTH_NAME_DATE_REGEX = r'(?P<month>[A-Za-z]{3})[a-z]*\.?\s+(?P<day>\d{1,2})'
+NUMERIC_DATE_REGEX = r'(?P<month>\d{1,2})/(?P<day>\d{1,2})'
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+# A season starts in August. Games in the first half of the year belong to
+# the calendar year after the season.
+FIRST_MONTH_OF_SEASON = 7
+
+RESULTS = pd.CategoricalDtype(['W', 'L', 'T'])
+
+# Seasons 2002-2012 name the team column 'name' instead of 'team'.
+COLUMN_ALIASES = {'name': 'team'}
+
+
+def to_strings(values: pd.Series) -> pd.Series:
+    """Returns the values as strings, with empty strings as missing values."""
+    return values.astype('string').replace('', pd.NA)
+
+
+def parse_distinct(values: pd.Series, parse: Callable[[pd.Series], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Parses only the distinct values of a column and spreads the result back
+    over its rows. Dates and scores repeat a lot (a few hundred distinct dates
+    over all seasons), and regex extraction is done value by value.
+
+    Args:
+        values (pd.Series): The raw values.
+        parse (Callable[[pd.Series], pd.DataFrame]): Parses a column of strings.
+
+    Returns:
+        parsed (pd.DataFrame): A row for every value. Missing values parse to
+            missing values.
+    """
+
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype = 'string'))
+
+    # Missing values have code -1, which reindexes to a row of missing values.
+    return parsed.reindex(codes).set_axis(values.index)
+
+
+def parse_seasons(seasons: pd.Series) -> pd.DataFrame:
+    return pd.DataFrame({'season': pd.to_numeric(seasons, errors = 'coerce').astype('Int16')})
+
+
+def parse_month_days(game_dates: pd.Series) -> pd.DataFrame:
+    """Returns the month and day of each game date as floats, NaN where they can't be parsed."""
+
+    month_name_parts = game_dates.str.extract(MONTH_NAME_DATE_REGEX)
+    numeric_parts = game_dates.str.extract(NUMERIC_DATE_REGEX)
+
+    months = month_name_parts['month'].str.lower().map(MONTHS).astype(float)
+    days = pd.to_numeric(month_name_parts['day'], errors = 'coerce').astype(float)
+
+    return pd.DataFrame({
+        'month': months.fillna(pd.to_numeric(numeric_parts['month'], errors = 'coerce').astype(float)),
+        'day': days.fillna(pd.to_numeric(numeric_parts['day'], errors = 'coerce').astype(float)),
+    })
+
+
+def parse_scores(scores: pd.Series) -> pd.DataFrame:
+    """Returns the points for and against of each score as nullable integers."""
+
+    parts = scores.str.extract(SCORE_REGEX)
+
+    return pd.DataFrame({
+        column: pd.to_numeric(parts[column], errors = 'coerce').astype('Int16')
+        for column in ['points_for', 'points_against']
+    })
+
+
+def parse_game_dates(game_dates: pd.Series, seasons: pd.Series) -> pd.Series:
+    """
+    Parses the site's game dates, which leave out the year, into dates. The
+    year is inferred from the season.
+
+    Args:
+        game_dates (pd.Series): The raw game dates.
+        seasons (pd.Series): The season of each row, as integers.
+
+    Returns:
+        dates (pd.Series): Dates that can't be parsed are NaT.
+    """
+
+    month_days = parse_distinct(to_strings(game_dates), parse_month_days)
+    months = month_days['month'].to_numpy()
+
+    years = seasons.to_numpy(dtype = float, na_value = np.nan) + (months < FIRST_MONTH_OF_SEASON)
+
+    # Missing parts are NaN, which `pd.to_datetime` turns into NaT.
+    date_parts = pd.DataFrame({'year': years, 'month': months, 'day': month_days['day'].to_numpy()})
+
+    return pd.Series(pd.to_datetime(date_parts, errors = 'coerce').to_numpy(), index = game_dates.index)
+
+
+def normalize_schedules(schedules_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turns scraped schedule rows, of one or any number of seasons, into typed
+    columns. Every step works on whole columns at once.
+
+        - season: int16.
+        - team: The team column of every layout is named 'team'.
+        - game_date: The game date, with the year inferred from the season.
+        - opponent: The opponent without the site's markers.
+        - result: 'W', 'L', or 'T' as a categorical.
+        - points_for, points_against: The score, as nullable integers.
+        - playoff: True for games marked with '#'.
+        - non_counting: True for games marked with '*', which don't count in
+          the OHSAA rankings.
+
+    The remaining columns (field, game_info) are kept as they are.
+
+    Args:
+        schedules_df (pd.DataFrame): Schedule rows as exported by the builders.
+
+    Returns:
+        schedules_df (pd.DataFrame)
+    """
+
+    with METRICS.timer('normalize_schedules'):
+        df = schedules_df.rename(columns = COLUMN_ALIASES)
+
+        seasons = parse_distinct(to_strings(df['season']), parse_seasons)['season']
+        opponents = to_strings(df['opponent'])
+        game_info = to_strings(df['game_info'])
+
+        # The markers are on the opponent, but older pages put them in the
+        # game info column.
+        marked = opponents.fillna('') + ' ' + game_info.fillna('')
+        scores = parse_distinct(to_strings(df['score']), parse_scores)
+        results = to_strings(df['result']).str.strip().str[ : 1].str.upper()
+
+        normalized_df = pd.DataFrame({
+            'season': seasons,
+            'team': to_strings(df['team']),
+            'game_date': parse_game_dates(df['game_dates'], seasons),
+            'field': to_strings(df['field']),
+            'opponent': opponents.str.replace(MARKER_REGEX, '', regex = True),
+            'result': results.astype(RESULTS),
+            'points_for': scores['points_for'],
+            'points_against': scores['points_against'],
+            'playoff': marked.str.contains(PLAYOFF_MARKER, regex = False).astype(bool),
+            'non_counting': marked.str.contains(NON_COUNTING_MARKER, regex = False).astype(bool),
+            'game_info': game_info,
+        })
+
+    return normalized_df
+
+
+def load_normalized_schedules(
+    seasons: Optional[Iterable[str]] = None,
+    output_format: str = 'csv',
+    data_dir: str = None,
+) -> pd.DataFrame:
+    """
+    Reads the exported schedules of several seasons and normalizes them in a
+    single pass.
+
+    Args:
+        seasons (Optional[Iterable[str]]): Seasons to read. Defaults to every
+            exported season.
+        output_format (str): The format the seasons were exported in.
+        data_dir (str): The output directory. Defaults to `make_output_dir()`.
+
+    Returns:
+        schedules_df (pd.DataFrame): See `normalize_schedules`.
+    """
+
+    from .dataset import load_dataset
+
+    return normalize_schedules(load_dataset(seasons, output_format, data_dir).schedules_df)
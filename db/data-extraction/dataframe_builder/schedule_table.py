@@ -0,0 +1,178 @@
+from typing import Dict, List, Optional, Tuple, Union
+import re
+import bs4
+
+# The site does not hold column headers, so the columns are named by position.
+# Column 3 holds nothing of use and is dropped.
+SCHEDULE_COLUMNS = {
+    0: 'game_dates',
+    1: 'field',
+    2: 'opponent',
+    4: 'result',
+    5: 'score',
+    6: 'game_info',
+}
+DROPPED_COLUMNS = [3]
+
+# Legend rows that are found at the bottom of the schedule tables:
+#   - "* - game does not count in OHSAA rankings"
+#   - "# - Ohio playoff game"
+INFO_ROWS = [
+    '* - game does not count in OHSAA rankings',
+    '# - Ohio playoff game',
+]
+
+# Cell values that pandas treats as missing.
+NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+WHITESPACE_REGEX = re.compile(r'[\r\n]+|\s{2,}')
+NON_EMPTY_REGEX = re.compile(r'.+')
+
+
+def find_tables(document: bs4.BeautifulSoup) -> List[bs4.Tag]:
+    """
+    Returns the tables in the document in the same order, and with the same
+    filtering of empty tables, as `pd.read_html`. This keeps the positional
+    indexes the builders use (e.g. "the fifth table") the same.
+    """
+
+    return [
+        table for table in document.find_all('table')
+        if NON_EMPTY_REGEX.search(table.get_text())
+    ]
+
+
+def get_cell_rows(table: bs4.Tag) -> List[List[Tuple[bs4.Tag, List[str]]]]:
+    """
+    Groups the cells of a table into rows, along with the text of each cell.
+
+    Older pages often leave td and tr tags unclosed, which html.parser turns into
+    cells nested inside of cells and rows nested inside of cells. Rows and cells
+    are therefore assigned by walking the tree instead of by looking at direct
+    children, which recovers the same rows a forgiving parser like lxml would.
+    The text of a table nested inside of a cell belongs to that cell.
+    """
+
+    rows: List[List[Tuple[bs4.Tag, List[str]]]] = []
+    row: Optional[List[Tuple[bs4.Tag, List[str]]]] = None
+    cell_text: Optional[List[str]] = None
+
+    def walk(node: bs4.Tag) -> None:
+        nonlocal row, cell_text
+
+        for child in node.children:
+            if isinstance(child, bs4.NavigableString):
+                if cell_text is not None and type(child) in (bs4.NavigableString, bs4.CData):
+                    cell_text.append(str(child))
+            elif child.name == 'tr':
+                row = []
+                rows.append(row)
+                cell_text = None
+                walk(child)
+            elif child.name in ('td', 'th'):
+                if row is None:
+                    row = []
+                    rows.append(row)
+
+                cell_text = []
+                row.append((child, cell_text))
+                walk(child)
+            elif child.name == 'table':
+                if cell_text is not None:
+                    cell_text.append(child.get_text())
+            else:
+                walk(child)
+
+    walk(table)
+    return rows
+
+
+def get_text_rows(table: bs4.Tag) -> List[List[str]]:
+    """
+    Returns the text of every row of a table. Cells that span several columns or
+    rows have their text copied into each of them, the same as `pd.read_html`.
+    """
+
+    text_rows: List[List[str]] = []
+
+    # (column index, text, rows left) of cells spanning into the following rows.
+    remainder: List[Tuple[int, str, int]] = []
+
+    for row in get_cell_rows(table):
+        texts: List[str] = []
+        next_remainder: List[Tuple[int, str, int]] = []
+        index = 0
+
+        for cell, cell_text in row:
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+                index += 1
+
+            text = WHITESPACE_REGEX.sub(' ', ''.join(cell_text).strip())
+            rowspan = int(cell.get('rowspan') or 1)
+            colspan = int(cell.get('colspan') or 1)
+
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+
+        # Rows without any content are skipped, the same as pandas does.
+        if len(texts) > 1 or (len(texts) == 1 and texts[0].strip()):
+            text_rows.append(texts)
+
+        remainder = next_remainder
+
+    return text_rows
+
+
+def read_schedule_table(table: bs4.Tag, caption_rows: int = 0) -> Dict[Union[str, int], list]:
+    """
+    Reads a schedule table straight into its columns. The info rows and any
+    caption rows are dropped while reading.
+
+    Every column holds the cell text, with None for empty cells. The info rows
+    hold text in every column, so `pd.read_html` already left the columns as
+    text on nearly every page.
+
+    Args:
+        table (bs4.Tag): The schedule table.
+        caption_rows (int): Number of rows at the top of the table that only
+            hold a caption.
+
+    Returns:
+        columns (Dict[Union[str, int], list]): The schedule's columns keyed by
+            column name, in the order of the site's columns.
+    """
+
+    text_rows = get_text_rows(table)[caption_rows : ]
+    text_rows = [text_row for text_row in text_rows if text_row[0] not in INFO_ROWS]
+
+    n_columns = max((len(text_row) for text_row in text_rows), default = len(SCHEDULE_COLUMNS) + len(DROPPED_COLUMNS))
+
+    columns: Dict[Union[str, int], list] = {}
+
+    for index in range(n_columns):
+        if index in DROPPED_COLUMNS:
+            continue
+
+        values = [
+            text_row[index] if index < len(text_row) and text_row[index] not in NA_VALUES else None
+            for text_row in text_rows
+        ]
+
+        columns[SCHEDULE_COLUMNS.get(index, index)] = values
+
+    return columns
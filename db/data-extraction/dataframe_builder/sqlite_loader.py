@@ -0,0 +1,266 @@
+"""
+Loads the exported seasons into a local SQLite database.
+
+Run from `db/data-extraction` to load every season that was exported:
+
+    python -m dataframe_builder.sqlite_loader --format csv
+
+Each season is loaded in a single transaction and replaces whatever the
+database held for it before, so loading a season again never duplicates rows.
+"""
+
+from argparse import ArgumentParser
+from typing import Iterable, List, Optional, Tuple
+import glob
+import os
+import re
+import sqlite3
+import pandas as pd
+from metrics.metrics import METRICS
+from utils.make_output_dir import make_output_dir
+from .previous_output import PreviousSeasonOutput
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS teams (
+    season INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    primary_color TEXT,
+    secondary_color TEXT,
+    city TEXT,
+    county TEXT,
+    state TEXT,
+    division INTEGER,
+    region INTEGER,
+    name TEXT,
+    mascot TEXT,
+    PRIMARY KEY (season, id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS teams_season_name ON teams (season, name);
+
+CREATE TABLE IF NOT EXISTS schedules (
+    season INTEGER NOT NULL,
+    team TEXT,
+    game_dates TEXT,
+    field TEXT,
+    opponent TEXT,
+    result TEXT,
+    score TEXT,
+    game_info TEXT
+);
+
+CREATE INDEX IF NOT EXISTS schedules_season_team ON schedules (season, team);
+"""
+
+TEAMS_COLUMNS = [
+    'season', 'id', 'primary_color', 'secondary_color', 'city', 'county', 'state',
+    'division', 'region', 'name', 'mascot',
+]
+SCHEDULES_COLUMNS = ['season', 'team', 'game_dates', 'field', 'opponent', 'result', 'score', 'game_info']
+
+INTEGER_COLUMNS = {'season', 'id', 'division', 'region'}
+
+# Seasons 2002-2012 name the team column of the schedules 'name' instead of 'team'.
+SCHEDULES_COLUMN_ALIASES = {'name': 'team'}
+
+# Rows are sent to SQLite in batches of this size.
+BATCH_SIZE = 5000
+
+UPSERT_TEAMS = (
+    f'INSERT INTO teams ({", ".join(TEAMS_COLUMNS)}) VALUES ({", ".join("?" * len(TEAMS_COLUMNS))}) '
+    'ON CONFLICT (season, id) DO UPDATE SET '
+    + ', '.join(f'{column} = excluded.{column}' for column in TEAMS_COLUMNS[2 : ])
+)
+INSERT_SCHEDULES = (
+    f'INSERT INTO schedules ({", ".join(SCHEDULES_COLUMNS)}) VALUES ({", ".join("?" * len(SCHEDULES_COLUMNS))})'
+)
+
+
+def get_default_db_path() -> str:
+    return os.path.join(make_output_dir(), 'ohfootball.db')
+
+
+def connect(db_path: str = None) -> sqlite3.Connection:
+    """
+    Opens the database, creating its tables and indexes if they don't exist yet.
+
+    Args:
+        db_path (str): Location of the database. Defaults to `ohfootball.db`
+            inside of the output directory.
+
+    Returns:
+        connection (sqlite3.Connection)
+    """
+
+    connection = sqlite3.connect(db_path or get_default_db_path())
+
+    # Only the last transaction can be lost on a crash, which is rolled back
+    # as a whole and can simply be loaded again.
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    connection.executescript(SCHEMA)
+
+    return connection
+
+
+def to_rows(df: pd.DataFrame, columns: List[str]) -> List[tuple]:
+    """
+    Returns the rows of a scraped DataFrame as tuples in the order of the
+    columns. Integer columns are parsed, with anything that is not a number
+    stored as NULL, and empty strings are stored as NULL as well. Columns that
+    the DataFrame lacks (e.g. county before 2002) are NULL.
+    """
+
+    values = {}
+
+    for column in columns:
+        if column not in df.columns:
+            values[column] = [None] * len(df)
+            continue
+
+        series = df[column].astype(object).where(df[column].notna(), None).replace('', None)
+
+        if column in INTEGER_COLUMNS:
+            numbers = pd.to_numeric(series, errors = 'coerce').astype('Int64')
+            values[column] = [None if pd.isna(number) else int(number) for number in numbers]
+        else:
+            values[column] = [None if value is None else str(value) for value in series]
+
+    return list(zip(*(values[column] for column in columns)))
+
+
+def execute_batches(connection: sqlite3.Connection, statement: str, rows: List[tuple]) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.executemany(statement, rows[start : start + BATCH_SIZE])
+
+
+def load_season(
+    connection: sqlite3.Connection,
+    season: str,
+    teams_df: pd.DataFrame,
+    schedules_df: pd.DataFrame,
+) -> Tuple[int, int]:
+    """
+    Replaces a season in the database with the given rows, in a single transaction.
+
+    Teams are upserted on (season, id), so a team that was exported twice is
+    stored once, and teams that are no longer part of the season are deleted.
+    Schedule rows have no key of their own, so the season's schedules are
+    deleted and inserted again.
+
+    Args:
+        connection (sqlite3.Connection)
+        season (str): The season for which the information is applicable for.
+        teams_df (pd.DataFrame): The season's teams.
+        schedules_df (pd.DataFrame): The season's schedules.
+
+    Returns:
+        teams, schedule rows (Tuple[int, int]): The number of rows loaded.
+    """
+
+    teams_df = teams_df.assign(season = season)
+    schedules_df = schedules_df.rename(columns = SCHEDULES_COLUMN_ALIASES).assign(season = season)
+
+    # Teams without a numeric teamID can't be keyed.
+    team_rows = [row for row in to_rows(teams_df, TEAMS_COLUMNS) if row[1] is not None]
+    schedule_rows = to_rows(schedules_df, SCHEDULES_COLUMNS)
+    team_ids = sorted({row[1] for row in team_rows})
+
+    with connection:
+        execute_batches(connection, UPSERT_TEAMS, team_rows)
+
+        connection.execute(
+            f'DELETE FROM teams WHERE season = ? AND id NOT IN ({", ".join("?" * len(team_ids))})',
+            [int(season), *team_ids],
+        )
+        connection.execute('DELETE FROM schedules WHERE season = ?', [int(season)])
+
+        execute_batches(connection, INSERT_SCHEDULES, schedule_rows)
+
+    return len(team_ids), len(schedule_rows)
+
+
+def get_exported_seasons(output_format: str = 'csv', data_dir: str = None) -> List[str]:
+    """Returns every season that was exported in the given format."""
+
+    data_dir = data_dir or make_output_dir()
+
+    if output_format == 'parquet':
+        pattern, season_regex = os.path.join(data_dir, 'parquet', 'teams', 'season=*'), r'season=(\d{4})$'
+    else:
+        pattern, season_regex = os.path.join(data_dir, 'teams_*.csv'), r'teams_(\d{4})\.csv$'
+
+    seasons = []
+    for path in glob.glob(pattern):
+        match = re.search(season_regex, path)
+        if match:
+            seasons.append(match.group(1))
+
+    return sorted(seasons)
+
+
+def load_exported_seasons(
+    seasons: Optional[Iterable[str]] = None,
+    output_format: str = 'csv',
+    db_path: str = None,
+) -> Tuple[int, int]:
+    """
+    Loads exported seasons into the database. Seasons that were not exported
+    are skipped.
+
+    Args:
+        seasons (Optional[Iterable[str]]): The seasons to load. Defaults to every
+            exported season.
+        output_format (str): The format the seasons were exported in.
+        db_path (str): Location of the database. Defaults to `ohfootball.db`
+            inside of the output directory.
+
+    Returns:
+        teams, schedule rows (Tuple[int, int]): The number of rows loaded.
+    """
+
+    data_dir = make_output_dir()
+
+    if seasons is None:
+        seasons = get_exported_seasons(output_format, data_dir)
+
+    connection = connect(db_path)
+    n_teams, n_schedule_rows = 0, 0
+
+    try:
+        for season in seasons:
+            exported_season = PreviousSeasonOutput.load(data_dir, season, output_format)
+            if exported_season is None:
+                continue
+
+            METRICS.set_season(season)
+
+            with METRICS.timer('load_sqlite'):
+                season_teams, season_schedule_rows = load_season(
+                    connection,
+                    season,
+                    exported_season.teams_df,
+                    exported_season.schedules_df,
+                )
+
+            n_teams += season_teams
+            n_schedule_rows += season_schedule_rows
+    finally:
+        connection.close()
+
+    return n_teams, n_schedule_rows
+
+
+def parse_args():
+    parser = ArgumentParser(description = 'Loads the exported seasons into a SQLite database.')
+    parser.add_argument('--format', choices = ['csv', 'parquet'], default = 'csv', help = 'Format the seasons were exported in.')
+    parser.add_argument('--db', help = 'Location of the database. Defaults to output/ohfootball.db.')
+    parser.add_argument('--seasons', nargs = '+', help = 'Seasons to load. Defaults to every exported season.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    n_teams, n_schedule_rows = load_exported_seasons(args.seasons, args.format, args.db)
+    print(f'Loaded {n_teams} teams and {n_schedule_rows} schedule rows into {args.db or get_default_db_path()}.')
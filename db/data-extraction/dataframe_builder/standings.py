@@ -0,0 +1,272 @@
+"""
+Materialized per-team, per-season aggregates and standings, computed from the
+exported schedules and kept in `output/standings`, one csv file per season.
+
+A manifest records a hash of the exported files each season was computed
+from. Updating the standings only recomputes the seasons whose exports
+changed since, which during the season is just the latest one.
+
+Run from `db/data-extraction` to bring the standings up to date:
+
+    python -m dataframe_builder.standings --format csv
+"""
+
+from argparse import ArgumentParser
+from hashlib import sha256
+from typing import Dict, Iterable, List, Optional
+import glob
+import json
+import os
+import pandas as pd
+from metrics.metrics import METRICS
+from utils.make_output_dir import make_output_dir
+from .dataset import load_dataset
+from .opponent_resolver import OpponentResolver
+from .schedule_normalizer import normalize_schedules
+from .sqlite_loader import get_exported_seasons
+
+# The field column holds '@' for away games and 'vs' for home games.
+HOME_FIELD = 'vs'
+AWAY_FIELD = '@'
+
+RESULTS = {'wins': 'W', 'losses': 'L', 'ties': 'T'}
+
+STANDINGS_COLUMNS = [
+    'season', 'team_id', 'team', 'division', 'region',
+    'games', 'wins', 'losses', 'ties', 'win_pct',
+    'points_for', 'points_against', 'point_differential',
+    'home_wins', 'home_losses', 'home_ties', 'away_wins', 'away_losses', 'away_ties',
+    'region_rank', 'division_rank',
+]
+
+STANDINGS_DTYPES = {
+    'season': 'Int16',
+    'team_id': 'Int32',
+    'division': 'Int8',
+    'region': 'Int8',
+    'region_rank': 'Int16',
+    'division_rank': 'Int16',
+}
+
+
+def get_standings_dir(data_dir: str = None) -> str:
+    return os.path.join(data_dir or make_output_dir(), 'standings')
+
+
+def get_standings_path(season: str, data_dir: str = None) -> str:
+    return os.path.join(get_standings_dir(data_dir), f'standings_{season}.csv')
+
+
+def get_exported_paths(season: str, output_format: str, data_dir: str) -> List[str]:
+    """Returns the files a season was exported to."""
+
+    if output_format == 'parquet':
+        return sorted(
+            glob.glob(os.path.join(data_dir, 'parquet', 'teams', f'season={int(season)}', '*.parquet'))
+            + glob.glob(os.path.join(data_dir, 'parquet', 'schedules', f'season={int(season)}', '*.parquet'))
+        )
+
+    return [os.path.join(data_dir, f'teams_{season}.csv'), os.path.join(data_dir, f'schedules_{season}.csv')]
+
+
+def hash_exported_season(season: str, output_format: str, data_dir: str) -> str:
+    """
+    Returns a hash of a season's exported files. Every crawl writes the files
+    again, so their contents are hashed rather than their modification times.
+    """
+
+    digest = sha256()
+
+    for path in get_exported_paths(season, output_format, data_dir):
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 ** 2), b''):
+                digest.update(block)
+
+    return digest.hexdigest()
+
+
+def compute_standings(schedules_df: pd.DataFrame, teams_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes the aggregates and standings of every team, for any number of
+    seasons at once, with a single group-by over all of the games.
+
+    Every game counts towards the record, including playoff games and games
+    that don't count in the OHSAA rankings. Teams are ranked within their
+    region and within their division by winning percentage (ties count as
+    half a win), then by point differential.
+
+    Args:
+        schedules_df (pd.DataFrame): Schedule rows, raw or as loaded by
+            `load_dataset`.
+        teams_df (pd.DataFrame): The team rows of the same seasons.
+
+    Returns:
+        standings (pd.DataFrame): A row per team and season, see `STANDINGS_COLUMNS`.
+    """
+
+    with METRICS.timer('compute_standings'):
+        games_df = normalize_schedules(schedules_df)
+        results = games_df['result']
+        home = (games_df['field'] == HOME_FIELD).fillna(False).to_numpy(dtype = bool)
+        away = (games_df['field'] == AWAY_FIELD).fillna(False).to_numpy(dtype = bool)
+
+        counts = {'games': 1}
+        for name, result in RESULTS.items():
+            is_result = (results == result).to_numpy(dtype = bool)
+            counts[name] = is_result
+            counts[f'home_{name}'] = is_result & home
+            counts[f'away_{name}'] = is_result & away
+
+        counts_df = pd.DataFrame({
+            'season': games_df['season'],
+            'team': games_df['team'],
+            **{name: pd.Series(values, index = games_df.index).astype('int32') for name, values in counts.items()},
+            'points_for': games_df['points_for'].astype('Int32').fillna(0),
+            'points_against': games_df['points_against'].astype('Int32').fillna(0),
+        })
+
+        standings = counts_df.groupby(['season', 'team'], sort = False).sum().reset_index()
+
+        # Resolved per team rather than per game.
+        team_ids = OpponentResolver(teams_df).resolve(standings, 'team')['team_id']
+        team_divisions = teams_df[['season', 'id', 'division', 'region']].astype('Int32').drop_duplicates(['season', 'id'])
+
+        standings = standings.assign(team_id = team_ids.astype('Int32')).merge(
+            team_divisions.rename(columns = {'id': 'team_id'}).astype({'season': standings['season'].dtype}),
+            on = ['season', 'team_id'],
+            how = 'left',
+        )
+
+        standings['win_pct'] = ((standings['wins'] + standings['ties'] / 2) / standings['games']).round(4)
+        standings['point_differential'] = standings['points_for'] - standings['points_against']
+
+        for rank_column, group in [('region_rank', ['division', 'region']), ('division_rank', ['division'])]:
+            standings = standings.sort_values(
+                ['season', *group, 'win_pct', 'point_differential', 'team'],
+                ascending = [True] * (len(group) + 1) + [False, False, True],
+            )
+            ranks = standings.groupby(['season', *group], dropna = False).cumcount() + 1
+            standings[rank_column] = ranks.where(standings[group].notna().all(axis = 1))
+
+        standings = standings.sort_values(['season', 'division', 'region', 'region_rank'], ignore_index = True)
+
+    return standings[STANDINGS_COLUMNS].astype(STANDINGS_DTYPES)
+
+
+class StandingsManifest:
+    """The hash of the exported files that each season's standings were computed from."""
+
+    def __init__(self, data_dir: str = None) -> None:
+        self.path = os.path.join(get_standings_dir(data_dir), 'standings_manifest.json')
+        self._hashes: Dict[str, str] = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding = 'utf-8') as f:
+                self._hashes = json.load(f)
+
+    def is_current(self, season: str, season_hash: str) -> bool:
+        return self._hashes.get(season) == season_hash
+
+    def set_hash(self, season: str, season_hash: str) -> None:
+        self._hashes[season] = season_hash
+
+    def save(self) -> None:
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+
+        with open(tmp_path, 'w', encoding = 'utf-8') as f:
+            json.dump(self._hashes, f, indent = 1)
+
+        os.replace(tmp_path, self.path)
+
+
+def update_standings(
+    seasons: Optional[Iterable[str]] = None,
+    output_format: str = 'csv',
+    data_dir: str = None,
+    force: bool = False,
+) -> List[str]:
+    """
+    Recomputes the standings of the seasons whose exports changed since they
+    were last computed, all of them in a single pass.
+
+    Args:
+        seasons (Optional[Iterable[str]]): Seasons to check. Defaults to every
+            exported season.
+        output_format (str): The format the seasons were exported in.
+        data_dir (str): The output directory. Defaults to `make_output_dir()`.
+        force (bool): If True, the seasons are recomputed whether or not they changed.
+
+    Returns:
+        seasons (List[str]): The seasons that were recomputed.
+    """
+
+    data_dir = data_dir or make_output_dir()
+    os.makedirs(get_standings_dir(data_dir), exist_ok = True)
+
+    exported_seasons = get_exported_seasons(output_format, data_dir)
+    if seasons is not None:
+        exported_seasons = [season for season in exported_seasons if season in set(seasons)]
+
+    manifest = StandingsManifest(data_dir)
+    season_hashes = {season: hash_exported_season(season, output_format, data_dir) for season in exported_seasons}
+
+    stale_seasons = [
+        season for season, season_hash in season_hashes.items()
+        if force
+        or not manifest.is_current(season, season_hash)
+        or not os.path.exists(get_standings_path(season, data_dir))
+    ]
+
+    if not stale_seasons:
+        return []
+
+    dataset = load_dataset(stale_seasons, output_format, data_dir)
+    standings = compute_standings(dataset.schedules_df, dataset.teams_df)
+
+    for season in stale_seasons:
+        season_standings = standings[standings['season'] == int(season)]
+        season_standings.to_csv(get_standings_path(season, data_dir), index = False)
+        manifest.set_hash(season, season_hashes[season])
+
+    manifest.save()
+    return stale_seasons
+
+
+def load_standings(seasons: Optional[Iterable[str]] = None, data_dir: str = None) -> pd.DataFrame:
+    """
+    Reads the materialized standings.
+
+    Args:
+        seasons (Optional[Iterable[str]]): Seasons to read. Defaults to every
+            season that has standings.
+        data_dir (str): The output directory. Defaults to `make_output_dir()`.
+
+    Returns:
+        standings (pd.DataFrame): See `STANDINGS_COLUMNS`.
+    """
+
+    if seasons is None:
+        paths = sorted(glob.glob(os.path.join(get_standings_dir(data_dir), 'standings_*.csv')))
+    else:
+        paths = [get_standings_path(season, data_dir) for season in seasons]
+        paths = [path for path in paths if os.path.exists(path)]
+
+    if not paths:
+        return pd.DataFrame(columns = STANDINGS_COLUMNS).astype(STANDINGS_DTYPES)
+
+    return pd.concat([pd.read_csv(path) for path in paths], ignore_index = True).astype(STANDINGS_DTYPES)
+
+
+def parse_args():
+    parser = ArgumentParser(description = 'Brings the standings of the exported seasons up to date.')
+    parser.add_argument('--format', choices = ['csv', 'parquet'], default = 'csv', help = 'Format the seasons were exported in.')
+    parser.add_argument('--seasons', nargs = '+', help = 'Seasons to update. Defaults to every exported season.')
+    parser.add_argument('--force', action = 'store_true', help = 'Recompute the seasons even if their exports did not change.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    updated_seasons = update_standings(args.seasons, args.format, force = args.force)
+    print(f'Updated the standings of {len(updated_seasons)} seasons.')
@@ -1,30 +1,701 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
 from time import time
-from scraper.scraper import Scraper
-from dataframe_builder.dataframe_builder import scrape_and_build_dataframes
+import multiprocessing
+from typing import Dict, List, Optional, Set
+from bs4 import SoupStrainer
+from scraper.scraper import (
+    HOMEPAGE_PARSE_ONLY,
+    SEASON_HOMEPAGE_PARSE_ONLY,
+    Scraper,
+)
+from scraper.crawl_manifest import CrawlManifest
+from scraper.document_cache import DocumentCache
+from scraper.link_index import LinkIndex, deduplicate_team_schedule_links
+from scraper.fetcher import FetchStats, Fetcher
+from scraper.response_cache import ResponseCache
+from dataframe_builder.crawl_journal import CrawlJournal
+from dataframe_builder.dataframe_builder import merge_exported_parts, scrape_and_build_dataframes
+from dataframe_builder.sqlite_loader import get_default_db_path, load_exported_seasons
+from dataframe_builder.standings import update_standings
+from metrics.metrics import METRICS
+from logger.logger import LogOptions, configure_queue_handler, log_season_summary, start_logging
 
-def main():
-    scraper = Scraper()
 
-    # Get list of all season homepages
-    season_homepage_links = scraper.get_season_homepage_links()
-    
-    # Loop through each season's homepage and scrape the data
-    for season_homepage_link in season_homepage_links:
-        scraper.update_url(season_homepage_link)
+@dataclass
+class ScrapeOptions:
+    """Settings needed to build a Scraper. Passed to worker processes so each one can build its own."""
+    max_workers: int = 4
+    max_connections_per_host: int = 4
+    use_cache: bool = False
+    offline: bool = False
+    cache_max_mb: int = 2048
+    incremental: bool = False
+    parser_backend: str = 'html.parser'
+    partial_parse: bool = False
+    output_format: str = 'csv'
+    resume: bool = False
+    use_link_index: bool = False
+    refresh_links: bool = False
+    max_requests_per_second: Optional[float] = None
+    document_cache_mb: int = 0
+
+
+@dataclass
+class SeasonShard:
+    """
+    A unit of work for one worker:
+        - season (str): The season being scraped.
+        - season_homepage_link (str): url of the season's homepage.
+        - region_homepage_links (Optional[List[str]]): If given, only the teams
+          of these regions are scraped.
+        - part (Optional[int]): The shard's position within its season when the
+          season is split by region.
+        - team_schedule_links (Optional[List[str]]): The shard's teams, if they
+          were already discovered when the season was split.
+        - refresh_links (bool): If True, the season's teams are discovered again
+          instead of being read from the link index.
+    """
+    season: str
+    season_homepage_link: str
+    region_homepage_links: Optional[List[str]] = None
+    part: Optional[int] = None
+    team_schedule_links: Optional[List[str]] = None
+    refresh_links: bool = False
+
+
+@dataclass
+class ShardResult:
+    """
+    What a worker process sends back to the parent once its shard is done, so
+    that workers don't overwrite each other's files:
+        - fetcher_stats (FetchStats): The worker's fetch counters.
+        - manifest_entries (Dict[str, dict]): The worker's crawl manifest.
+        - link_index_entries (Dict[str, dict]): The shard's season in the link index.
+        - metrics (Dict[str, dict]): Snapshot of the worker's timers and counters.
+    """
+    fetcher_stats: FetchStats
+    manifest_entries: Dict[str, dict]
+    link_index_entries: Dict[str, dict]
+    metrics: Dict[str, dict]
+
+
+def build_fetcher(options: ScrapeOptions) -> Fetcher:
+    """Builds a Fetcher, along with its cache and manifest, from the given options."""
+
+    cache = None
+    if options.use_cache or options.offline or options.incremental:
+        cache = ResponseCache(max_size_bytes = options.cache_max_mb * 1024 ** 2)
+
+    manifest = None
+    if options.incremental:
+        manifest = CrawlManifest()
+
+    return Fetcher(
+        options.max_workers,
+        options.max_connections_per_host,
+        cache = cache,
+        offline = options.offline,
+        manifest = manifest,
+        max_requests_per_second = options.max_requests_per_second,
+    )
+
+
+def build_scraper(options: ScrapeOptions, url: str = '', parse_only: SoupStrainer = HOMEPAGE_PARSE_ONLY) -> Scraper:
+    """Builds a Scraper, along with its Fetcher, from the given options."""
+
+    return Scraper(
+        url,
+        fetcher = build_fetcher(options),
+        parser_backend = options.parser_backend,
+        partial_parse = options.partial_parse,
+        parse_only = parse_only,
+        document_cache = DocumentCache(max_size_bytes = options.document_cache_mb * 1024 ** 2),
+    )
+
+
+def get_team_schedule_links_per_region(
+    scraper: Scraper,
+    season: str,
+    season_homepage_link: str,
+    link_index: LinkIndex = None,
+    refresh_links: bool = False,
+) -> Dict[str, List[str]]:
+    """
+    Returns the team schedule links of a season grouped by region. Seasons that
+    are in the link index are read from it without any requests, unless they
+    are being refreshed. Seasons that are discovered are added to the index.
+    """
+
+    if link_index is not None and not refresh_links:
+        team_schedule_links_per_region = link_index.get_team_schedule_links_per_region(season)
+
+        if team_schedule_links_per_region is not None:
+            return team_schedule_links_per_region
+
+    if scraper.url != season_homepage_link:
+        scraper.update_url(season_homepage_link, SEASON_HOMEPAGE_PARSE_ONLY)
+
+    team_schedule_links_per_region = scraper.get_team_schedule_links_per_region(season)
+
+    if link_index is not None:
+        link_index.set_season(season, team_schedule_links_per_region)
+
+    return team_schedule_links_per_region
+
+
+def scrape_season_shard(
+    scraper: Scraper,
+    shard: SeasonShard,
+    options: ScrapeOptions,
+    link_index: LinkIndex = None,
+):
+    """
+    Scrapes a season, or the regions of a season given by the shard, and writes
+    its outputs. Progress is journaled, so with `options.resume` a shard that
+    was completed by an earlier crawl is skipped and a shard that was cut short
+    picks up where it left off.
+    """
+
+    METRICS.set_season(shard.season)
 
-        season = scraper.url[-4 : ]
-        team_schedule_links = scraper.get_team_schedule_links(season)
-     
+    journal = CrawlJournal(shard.season, shard.part, options.resume)
+
+    # Whole seasons that were completed are already dropped by `main`.
+    if journal.is_completed(shard.region_homepage_links):
+        return
+
+    team_schedule_links = shard.team_schedule_links
+
+    if team_schedule_links is None:
+        team_schedule_links_per_region = get_team_schedule_links_per_region(
+            scraper,
+            shard.season,
+            shard.season_homepage_link,
+            link_index,
+            shard.refresh_links,
+        )
+        team_schedule_links = deduplicate_team_schedule_links(
+            team_schedule_link
+            for region_team_schedule_links in team_schedule_links_per_region.values()
+            for team_schedule_link in region_team_schedule_links
+        )
+
+    try:
         scrape_and_build_dataframes(
-            season,
+            shard.season,
             team_schedule_links,
-            scraper
+            scraper,
+            incremental = options.incremental,
+            part = shard.part,
+            output_format = options.output_format,
+            journal = journal,
         )
+    finally:
+        journal.close()
+
+    journal.mark_completed(shard.region_homepage_links)
+
+    # The summary of a sharded season is logged once its parts are merged.
+    if shard.part is None:
+        log_season_summary(shard.season)
+
+
+def run_season_shard(options: ScrapeOptions, shard: SeasonShard) -> ShardResult:
+    """Entry point of a worker process. Scrapes the shard with its own Scraper."""
+
+    # A forked worker starts out with a copy of the parent's metrics.
+    METRICS.reset()
+    METRICS.set_season(shard.season)
+
+    scraper = build_scraper(options, shard.season_homepage_link, SEASON_HOMEPAGE_PARSE_ONLY)
+    fetcher = scraper.fetcher
+
+    link_index = LinkIndex() if options.use_link_index else None
+
+    scrape_season_shard(scraper, shard, options, link_index)
+
+    fetcher_stats = fetcher.get_stats()
+    fetcher.close()
+
+    manifest_entries = {}
+    if fetcher.manifest is not None:
+        manifest_entries = fetcher.manifest.get_entries()
+
+    link_index_entries = {}
+    if link_index is not None:
+        link_index_entries = link_index.get_entries([shard.season])
+
+    return ShardResult(fetcher_stats, manifest_entries, link_index_entries, METRICS.snapshot())
+
+
+def get_incomplete_season_homepage_links(season_homepage_links: List[str]) -> List[str]:
+    """Drops the seasons that were completed by an earlier crawl."""
+
+    incomplete_season_homepage_links: List[str] = []
+
+    for season_homepage_link in season_homepage_links:
+        season = season_homepage_link[-4 : ]
+
+        if CrawlJournal(season, resume = True).is_completed():
+            print(f'Skipping season {season}, already completed.')
+        else:
+            incomplete_season_homepage_links.append(season_homepage_link)
+
+    return incomplete_season_homepage_links
+
+
+def get_season_shards(
+    scraper: Scraper,
+    season_homepage_links: List[str],
+    shards_per_season: int,
+    link_index: LinkIndex = None,
+    refresh_seasons: Set[str] = frozenset(),
+) -> List[SeasonShard]:
+    """
+    Splits each season into shards. Seasons whose team links are spread over
+    region pages are split into `shards_per_season` contiguous runs of regions,
+    so that concatenating the shards in order reproduces the unsharded output.
+
+    The teams of a split season are discovered up front, so that a team that is
+    listed in regions of two different shards is only scraped by the first one.
+
+    Args:
+        scraper (Scraper): Scraper object.
+        season_homepage_links (List[str]): urls of the season homepages.
+        shards_per_season (int): Number of shards each season is split into.
+        link_index (LinkIndex): If given, the teams of indexed seasons are read
+            from the index instead of being discovered again.
+        refresh_seasons (Set[str]): Seasons whose teams are always discovered again.
+    """
+
+    shards: List[SeasonShard] = []
+
+    for season_homepage_link in season_homepage_links:
+        season = season_homepage_link[-4 : ]
+        refresh_links = season in refresh_seasons
+
+        # The 2000 season lists every team on a single page.
+        if shards_per_season == 1 or season == '2000':
+            shards.append(SeasonShard(season, season_homepage_link, refresh_links = refresh_links))
+            continue
+
+        team_schedule_links_per_region = get_team_schedule_links_per_region(
+            scraper,
+            season,
+            season_homepage_link,
+            link_index,
+            refresh_links,
+        )
+        region_homepage_links = list(team_schedule_links_per_region)
+
+        n_shards = max(1, min(shards_per_season, len(region_homepage_links)))
+        shard_size, remainder = divmod(len(region_homepage_links), n_shards)
+
+        seen_team_ids: Set[str] = set()
+
+        start = 0
+        for part in range(n_shards):
+            end = start + shard_size + (1 if part < remainder else 0)
+
+            team_schedule_links = deduplicate_team_schedule_links(
+                (
+                    team_schedule_link
+                    for region_homepage_link in region_homepage_links[start : end]
+                    for team_schedule_link in team_schedule_links_per_region[region_homepage_link]
+                ),
+                seen_team_ids,
+            )
+
+            shards.append(SeasonShard(
+                season,
+                season_homepage_link,
+                region_homepage_links[start : end],
+                part,
+                team_schedule_links,
+            ))
+            start = end
+
+    return shards
+
+
+def main(
+    max_workers: int = 4,
+    max_connections_per_host: int = 4,
+    use_cache: bool = False,
+    offline: bool = False,
+    cache_max_mb: int = 2048,
+    incremental: bool = False,
+    processes: int = 1,
+    shard_regions: bool = False,
+    parser_backend: str = 'html.parser',
+    partial_parse: bool = False,
+    output_format: str = 'csv',
+    resume: bool = False,
+    use_link_index: bool = False,
+    refresh_links: bool = False,
+    metrics_file: str = None,
+    log_options: LogOptions = None,
+    load_sqlite: bool = False,
+    max_requests_per_second: float = None,
+    document_cache_mb: int = 0,
+    build_standings: bool = False,
+):
+    """
+    Args:
+        max_workers (int): Number of threads used to fetch pages concurrently.
+        max_connections_per_host (int): Maximum number of requests in flight
+            against joeeitel.com at once.
+        use_cache (bool): If True, pages are stored in and replayed from the
+            on-disk response cache.
+        offline (bool): If True, the scraper runs entirely from the response
+            cache and makes no requests.
+        cache_max_mb (int): Size cap of the response cache in megabytes.
+        incremental (bool): If True, pages are revalidated with conditional
+            requests and teams whose page is unchanged reuse their rows from the
+            previous run's csv files. Implies use_cache.
+        processes (int): Number of worker processes seasons are spread across.
+            Each process fetches with its own `max_workers` threads and
+            `max_connections_per_host` limit.
+        shard_regions (bool): If True, seasons whose teams are listed on region
+            pages are also split by region across the worker processes.
+        parser_backend (str): The BeautifulSoup parser, e.g. 'html.parser' or 'lxml'.
+        partial_parse (bool): If True, only the parts of each page that are
+            read by the extractors are parsed.
+        output_format (str): 'csv' or 'parquet'. Parquet output is typed,
+            compressed, and partitioned by season. Requires pyarrow.
+        resume (bool): If True, seasons completed by an earlier crawl are
+            skipped and a season that was cut short only scrapes the team pages
+            that are not in its journal yet.
+        use_link_index (bool): If True, the team links of each season are kept
+            in a link index, so that region homepages are only downloaded for
+            seasons that are not indexed yet and for the latest season, whose
+            teams can still change.
+        refresh_links (bool): If True, every season is discovered again and
+            the link index is rebuilt.
+        metrics_file (str): If given, the per-season timings and counters of
+            the run are written to this file. Files ending in `.prom` are
+            written in the Prometheus text format, anything else as JSON.
+        log_options (LogOptions): If given, logging is set up for the crawl.
+            Records are handed to a background thread over a queue, so that
+            writing the log never holds up the scrape.
+        load_sqlite (bool): If True, the exported seasons are loaded into the
+            SQLite database at `output/ohfootball.db` once they are scraped.
+        max_requests_per_second (float): Maximum requests per second sent to
+            joeeitel.com, shared by the worker processes. Unlimited if None,
+            but the scraper always backs off when the site throttles it with
+            a 429 or 503 (honoring Retry-After) and ramps back up once it stops.
+        document_cache_mb (int): Estimated memory in megabytes that each process
+            may keep parsed pages in, so that pages which are visited again
+            during the run are not downloaded and parsed again. Disabled if 0,
+            since the crawl visits every team page only once.
+        build_standings (bool): If True, the standings in `output/standings` are
+            recomputed for the seasons whose exports changed during the run.
+    """
+    options = ScrapeOptions(
+        max_workers,
+        max_connections_per_host,
+        use_cache,
+        offline,
+        cache_max_mb,
+        incremental,
+        parser_backend,
+        partial_parse,
+        output_format,
+        resume,
+        use_link_index,
+        refresh_links,
+        max_requests_per_second,
+        document_cache_mb,
+    )
+
+    log_listener = None
+    if log_options is not None:
+        # Worker processes send their records to the listener of this process.
+        log_listener = start_logging(log_options, multiprocessing.Queue() if processes > 1 else None)
+
+    scraper = build_scraper(options)
+    fetcher = scraper.fetcher
+    manifest = fetcher.manifest
+    link_index = LinkIndex() if use_link_index else None
+
+    # The worker processes share the rate of the whole crawl.
+    if processes > 1 and max_requests_per_second is not None:
+        options = replace(options, max_requests_per_second = max_requests_per_second / processes)
+
+    if not resume:
+        CrawlJournal.clear()
+
+    # Get list of all season homepages
+    season_homepage_links = scraper.get_season_homepage_links()
+    seasons = [season_homepage_link[-4 : ] for season_homepage_link in season_homepage_links]
+
+    # Only the latest season still gains and loses teams.
+    if refresh_links:
+        refresh_seasons = set(seasons)
+    else:
+        refresh_seasons = {max(seasons)} if seasons else set()
+
+    if resume:
+        season_homepage_links = get_incomplete_season_homepage_links(season_homepage_links)
+
+    shards = get_season_shards(
+        scraper,
+        season_homepage_links,
+        processes if shard_regions else 1,
+        link_index,
+        refresh_seasons,
+    )
+
+    if processes == 1:
+        # Loop through each season's homepage and scrape the data
+        for shard in shards:
+            scrape_season_shard(scraper, shard, options, link_index)
+
+            if manifest is not None:
+                manifest.save()
+            if link_index is not None:
+                link_index.save()
+
+        fetcher_stats = fetcher.get_stats()
+    else:
+        fetcher_stats = fetcher.get_stats()
+
+        # Seasons that were discovered while splitting them are read back from
+        # the index by the workers.
+        if link_index is not None:
+            link_index.save()
+
+        with ProcessPoolExecutor(
+            max_workers = processes,
+            initializer = configure_queue_handler if log_listener is not None else None,
+            initargs = (log_listener.queue, log_options) if log_listener is not None else (),
+        ) as executor:
+            futures = [executor.submit(run_season_shard, options, shard) for shard in shards]
+
+            for future in futures:
+                shard_result = future.result()
+                fetcher_stats = fetcher_stats + shard_result.fetcher_stats
+                METRICS.merge(shard_result.metrics)
+
+                if manifest is not None:
+                    manifest.update(shard_result.manifest_entries)
+                if link_index is not None:
+                    link_index.update(shard_result.link_index_entries)
+
+        parts_per_season: Dict[str, int] = {}
+        for shard in shards:
+            if shard.part is not None:
+                parts_per_season[shard.season] = shard.part + 1
+
+        for season, parts in parts_per_season.items():
+            merge_exported_parts(season, parts, output_format)
+
+            # The season is now complete as a whole, which holds no matter how
+            # it is sharded by the next crawl.
+            CrawlJournal(season, resume = True).mark_completed()
+            for part in range(parts):
+                CrawlJournal(season, part, resume = True).remove()
+
+            log_season_summary(season)
+
+        if manifest is not None:
+            manifest.save()
+        if link_index is not None:
+            link_index.save()
+
+    fetcher.close()
+
+    if load_sqlite:
+        n_teams, n_schedule_rows = load_exported_seasons(seasons, output_format)
+        print(f'Loaded {n_teams} teams and {n_schedule_rows} schedule rows into {get_default_db_path()}.')
+
+    if build_standings:
+        updated_seasons = update_standings(seasons, output_format)
+        print(f'Updated the standings of {len(updated_seasons)} seasons.')
+
+    print(
+        f'Sent {fetcher_stats.requests} requests over {fetcher_stats.connections_opened} connections '
+        f'({fetcher_stats.connections_reused} reused, {fetcher_stats.retries} retries, '
+        f'{fetcher_stats.failures} failures).'
+    )
+
+    if fetcher.cache is not None:
+        print(f'Response cache: {fetcher_stats.cache_hits} hits, {fetcher_stats.cache_misses} misses.')
+
+    if manifest is not None:
+        print(f'{fetcher_stats.unchanged} pages unchanged since the last crawl ({fetcher_stats.not_modified} not modified).')
+
+    if metrics_file is not None:
+        METRICS.save(metrics_file)
+
+
+def parse_args():
+    parser = ArgumentParser(description = 'Scrapes team and schedule data from joeeitel.com.')
+    parser.add_argument(
+        '--max-workers',
+        type = int,
+        default = 4,
+        help = 'Number of pages fetched concurrently. Use 1 to fetch pages one at a time.',
+    )
+    parser.add_argument(
+        '--max-connections-per-host',
+        type = int,
+        default = 4,
+        help = 'Maximum number of requests in flight against joeeitel.com at once.',
+    )
+    parser.add_argument(
+        '--max-requests-per-second',
+        type = float,
+        help = (
+            'Maximum requests per second sent to joeeitel.com. Unlimited by default, '
+            'but the scraper always backs off when the site throttles it.'
+        ),
+    )
+    parser.add_argument(
+        '--cache',
+        action = 'store_true',
+        help = 'Store every page in the on-disk response cache and replay cached pages.',
+    )
+    parser.add_argument(
+        '--offline',
+        action = 'store_true',
+        help = 'Run entirely from the response cache without making any requests.',
+    )
+    parser.add_argument(
+        '--cache-max-mb',
+        type = int,
+        default = 2048,
+        help = 'Size cap of the response cache in megabytes.',
+    )
+    parser.add_argument(
+        '--incremental',
+        action = 'store_true',
+        help = (
+            'Revalidate pages with conditional requests and reuse the previous rows '
+            'of teams whose page has not changed. Implies --cache.'
+        ),
+    )
+    parser.add_argument(
+        '--processes',
+        type = int,
+        default = 1,
+        help = 'Number of worker processes seasons are spread across.',
+    )
+    parser.add_argument(
+        '--shard-regions',
+        action = 'store_true',
+        help = 'Also split seasons by region across the worker processes.',
+    )
+    parser.add_argument(
+        '--parser',
+        default = 'html.parser',
+        help = "The BeautifulSoup parser backend, e.g. 'html.parser' or 'lxml'.",
+    )
+    parser.add_argument(
+        '--partial-parse',
+        action = 'store_true',
+        help = 'Only parse the parts of each page that are read by the extractors.',
+    )
+    parser.add_argument(
+        '--document-cache-mb',
+        type = int,
+        default = 0,
+        help = 'Estimated memory in megabytes that parsed pages are cached in. Disabled by default.',
+    )
+    parser.add_argument(
+        '--format',
+        choices = ['csv', 'parquet'],
+        default = 'csv',
+        help = 'Output format. Parquet output is typed and partitioned by season, and requires pyarrow.',
+    )
+    parser.add_argument(
+        '--resume',
+        action = 'store_true',
+        help = 'Pick up a crawl that was cut short instead of starting over.',
+    )
+    parser.add_argument(
+        '--link-index',
+        action = 'store_true',
+        help = 'Keep the team links of each season in a link index instead of rediscovering them every run.',
+    )
+    parser.add_argument(
+        '--refresh-links',
+        action = 'store_true',
+        help = 'Rediscover the team links of every season and rebuild the link index.',
+    )
+    parser.add_argument(
+        '--metrics-file',
+        help = (
+            'Write per-season timings and counters to this file at the end of the run. '
+            'Files ending in .prom are written in the Prometheus text format, anything else as JSON.'
+        ),
+    )
+    parser.add_argument(
+        '--sqlite',
+        action = 'store_true',
+        help = 'Load the scraped seasons into the SQLite database at output/ohfootball.db.',
+    )
+    parser.add_argument(
+        '--standings',
+        action = 'store_true',
+        help = 'Recompute the standings in output/standings for the seasons whose exports changed.',
+    )
+    parser.add_argument(
+        '--log-level',
+        choices = ['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        default = 'WARNING',
+        help = 'Lowest level that is logged. DEBUG logs every team page, INFO adds a summary of every season.',
+    )
+    parser.add_argument(
+        '--log-file',
+        default = 'scraper_log.log',
+        help = "File the log is written to. Pass '-' to log to stderr instead.",
+    )
+    parser.add_argument(
+        '--log-sample-rate',
+        type = float,
+        default = 1.0,
+        help = 'Fraction of the DEBUG records that is kept, e.g. 0.01 keeps one in every hundred.',
+    )
+    parser.add_argument('--log-max-mb', type = float, default = 10, help = 'Size at which the log file is rotated.')
+    parser.add_argument('--log-backups', type = int, default = 3, help = 'Number of rotated log files that are kept.')
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
+    args = parse_args()
+
     start_time = time()
-    main()
+    main(
+        max_workers = args.max_workers,
+        max_connections_per_host = args.max_connections_per_host,
+        use_cache = args.cache,
+        offline = args.offline,
+        cache_max_mb = args.cache_max_mb,
+        incremental = args.incremental,
+        processes = args.processes,
+        shard_regions = args.shard_regions,
+        parser_backend = args.parser,
+        partial_parse = args.partial_parse,
+        output_format = args.format,
+        resume = args.resume,
+        use_link_index = args.link_index,
+        refresh_links = args.refresh_links,
+        metrics_file = args.metrics_file,
+        load_sqlite = args.sqlite,
+        max_requests_per_second = args.max_requests_per_second,
+        document_cache_mb = args.document_cache_mb,
+        build_standings = args.standings,
+        log_options = LogOptions(
+            level = args.log_level,
+            file = None if args.log_file == '-' else args.log_file,
+            sample_rate = args.log_sample_rate,
+            max_mb = args.log_max_mb,
+            backups = args.log_backups,
+        ),
+    )
     elapsed_time = (time() - start_time) / 60
 
     print(f'Scraper finished in {elapsed_time} minutes.')
@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from itertools import count
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import SimpleQueue
+from typing import Optional
+import atexit
+import json
+import logging
+from metrics.metrics import METRICS
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Logger of the structured per-season summaries.
+SUMMARY_LOGGER_NAME = 'season_summary'
+
+
+@dataclass
+class LogOptions:
+    """
+    How a crawl logs:
+        - level (str): Lowest level that is logged, e.g. 'DEBUG' or 'WARNING'.
+        - file (Optional[str]): File the log is written to. Logs to stderr if None.
+        - sample_rate (float): Fraction of the DEBUG records that is kept, e.g.
+          0.01 keeps one in every hundred. Everything from INFO up is always kept.
+        - max_mb (float): Size at which the log file is rotated.
+        - backups (int): Number of rotated log files that are kept.
+    """
+    level: str = 'WARNING'
+    file: Optional[str] = 'scraper_log.log'
+    sample_rate: float = 1.0
+    max_mb: float = 10
+    backups: int = 3
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in every `1 / sample_rate` DEBUG records, and every other record."""
+
+    def __init__(self, sample_rate: float) -> None:
+        super().__init__()
+        self.every = max(1, round(1 / sample_rate)) if sample_rate > 0 else None
+        self._counter = count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+
+        if self.every is None:
+            return False
+
+        return next(self._counter) % self.every == 0
+
+
+def configure_queue_handler(log_queue, options: LogOptions) -> None:
+    """
+    Points the root logger at a queue, so that logging a record only costs a
+    put on the queue. Records that are filtered out by level or sampling never
+    reach it.
+
+    Also the initializer of worker processes, whose records are written by the
+    listener of the parent.
+
+    Args:
+        log_queue: The queue read by the listener, a `multiprocessing.Queue`
+            when records are sent from worker processes.
+        options (LogOptions)
+
+    Returns:
+        None
+    """
+
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(options.sample_rate))
+
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(options.level.upper())
+
+
+def start_logging(options: LogOptions, log_queue = None) -> QueueListener:
+    """
+    Sets up logging for a crawl. Records are written to a rotating log file by
+    a background thread, which is stopped (and drained) when the interpreter
+    exits.
+
+    Args:
+        options (LogOptions)
+        log_queue: The queue the records are passed through. Defaults to a
+            queue that is local to this process.
+
+    Returns:
+        listener (QueueListener): Its `queue` is passed on to worker processes.
+    """
+
+    if log_queue is None:
+        log_queue = SimpleQueue()
+
+    if options.file is None:
+        handler = logging.StreamHandler()
+    else:
+        handler = RotatingFileHandler(
+            options.file,
+            maxBytes = int(options.max_mb * 1024 ** 2),
+            backupCount = options.backups,
+            encoding = 'utf-8',
+            delay = True,
+        )
+
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+
+    configure_queue_handler(log_queue, options)
+
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    return listener
+
+
+def log_season_summary(season: str) -> None:
+    """
+    Logs a single JSON line with the counters of a season and the seconds spent
+    in each of its stages, as recorded in `METRICS`.
+    """
+
+    metrics = METRICS.snapshot().get(season)
+    if metrics is None:
+        return
+
+    summary = {
+        'season': season,
+        **metrics['counters'],
+        'stage_seconds': {
+            name: round(timer['total_seconds'], 3)
+            for name, timer in metrics['timers'].items()
+        },
+    }
+
+    logging.getLogger(SUMMARY_LOGGER_NAME).info('season summary %s', json.dumps(summary))
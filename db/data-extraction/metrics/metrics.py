@@ -0,0 +1,187 @@
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Dict, Iterator, Tuple
+import json
+import os
+
+# Label of whatever happens outside of a season, e.g. finding the seasons.
+NO_SEASON = 'none'
+
+METRIC_PREFIX = 'ohfootball_scraper'
+
+
+class Metrics:
+    """
+    Timers and counters of the hot paths of a crawl, aggregated per season.
+
+    Timers keep the count, total, and maximum of their durations. Counters are
+    plain sums, e.g. the number of skipped teams or of downloaded bytes. Gauges
+    hold the latest value of something, e.g. the current request rate. All of
+    them are safe to update from the fetcher's threads.
+
+    A crawl uses the module level `METRICS`. Worker processes send theirs to
+    the parent as a snapshot, which is merged in with `merge`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.season = NO_SEASON
+        self._timers: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._gauges: Dict[Tuple[str, str], float] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.season = NO_SEASON
+            self._timers = {}
+            self._counters = {}
+            self._gauges = {}
+
+    def set_season(self, season: str) -> None:
+        """Sets the season that everything recorded from now on is attributed to."""
+        self.season = season
+
+    def record_duration(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timer = self._timers.setdefault(
+                (self.season, name),
+                {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0},
+            )
+            timer['count'] += 1
+            timer['total_seconds'] += seconds
+            timer['max_seconds'] = max(timer['max_seconds'], seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Times the body of the with statement, whether or not it raises."""
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record_duration(name, perf_counter() - start)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            key = (self.season, name)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[(self.season, name)] = value
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Returns every timer and counter grouped by season, e.g.
+
+            {'2015': {'timers': {'parse': {'count': ..., 'total_seconds': ..., 'max_seconds': ...}},
+                      'counters': {'teams_skipped': ...},
+                      'gauges': {'rate_limit_concurrency': ...}}}
+        """
+
+        seasons: Dict[str, dict] = {}
+
+        def get_season(season: str) -> dict:
+            return seasons.setdefault(season, {'timers': {}, 'counters': {}, 'gauges': {}})
+
+        with self._lock:
+            for (season, name), timer in self._timers.items():
+                get_season(season)['timers'][name] = dict(timer)
+
+            for (season, name), value in self._counters.items():
+                get_season(season)['counters'][name] = value
+
+            for (season, name), value in self._gauges.items():
+                get_season(season)['gauges'][name] = value
+
+        return seasons
+
+    def merge(self, snapshot: Dict[str, dict]) -> None:
+        """
+        Adds in a snapshot taken elsewhere, e.g. by a worker process. Its gauges
+        replace the ones of the same season.
+        """
+
+        with self._lock:
+            for season, metrics in snapshot.items():
+                for name, other_timer in metrics['timers'].items():
+                    timer = self._timers.setdefault(
+                        (season, name),
+                        {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0},
+                    )
+                    timer['count'] += other_timer['count']
+                    timer['total_seconds'] += other_timer['total_seconds']
+                    timer['max_seconds'] = max(timer['max_seconds'], other_timer['max_seconds'])
+
+                for name, value in metrics['counters'].items():
+                    self._counters[(season, name)] = self._counters.get((season, name), 0) + value
+
+                for name, value in metrics.get('gauges', {}).items():
+                    self._gauges[(season, name)] = value
+
+    def to_prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+
+        snapshot = self.snapshot()
+        lines = []
+
+        timer_metrics = [
+            ('seconds_count', 'count', 'Number of times a stage ran.'),
+            ('seconds_sum', 'total_seconds', 'Total seconds spent in a stage.'),
+            ('seconds_max', 'max_seconds', 'Longest single run of a stage in seconds.'),
+        ]
+
+        for suffix, field, help_text in timer_metrics:
+            metric_name = f'{METRIC_PREFIX}_stage_{suffix}'
+            lines.append(f'# HELP {metric_name} {help_text}')
+            lines.append(f'# TYPE {metric_name} {"gauge" if field == "max_seconds" else "counter"}')
+
+            for season, metrics in sorted(snapshot.items()):
+                for name, timer in sorted(metrics['timers'].items()):
+                    lines.append(f'{metric_name}{{season="{season}",stage="{name}"}} {timer[field]}')
+
+        counter_names = sorted({name for metrics in snapshot.values() for name in metrics['counters']})
+
+        for name in counter_names:
+            metric_name = f'{METRIC_PREFIX}_{name}_total'
+            lines.append(f'# TYPE {metric_name} counter')
+
+            for season, metrics in sorted(snapshot.items()):
+                if name in metrics['counters']:
+                    lines.append(f'{metric_name}{{season="{season}"}} {metrics["counters"][name]}')
+
+        gauge_names = sorted({name for metrics in snapshot.values() for name in metrics['gauges']})
+
+        for name in gauge_names:
+            metric_name = f'{METRIC_PREFIX}_{name}'
+            lines.append(f'# TYPE {metric_name} gauge')
+
+            for season, metrics in sorted(snapshot.items()):
+                if name in metrics['gauges']:
+                    lines.append(f'{metric_name}{{season="{season}"}} {metrics["gauges"][name]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def save(self, path: str) -> None:
+        """
+        Writes the metrics to a file. Files ending in `.prom` are written in the
+        Prometheus text format (e.g. for the node exporter's textfile
+        collector), anything else as JSON.
+        """
+
+        if path.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent = 2)
+
+        # Written atomically so that a collector never reads half a file.
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+
+        with open(tmp_path, 'w', encoding = 'utf-8') as f:
+            f.write(content)
+
+        os.replace(tmp_path, path)
+
+
+METRICS = Metrics()
@@ -0,0 +1,123 @@
+from hashlib import sha256
+from threading import Lock
+from typing import Dict, Optional
+import json
+import os
+from utils.make_output_dir import make_output_dir
+
+
+class CrawlManifest:
+    """
+    Records, for every url that has been crawled, the validators the server sent
+    back (ETag and Last-Modified) and a hash of the page's content.
+
+    The validators are used to make conditional requests so that unchanged pages
+    come back as a bodiless 304. The content hash catches unchanged pages even
+    when the server ignores conditional requests.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        """
+        Args:
+            path (str): Location of the manifest file. Defaults to
+                `crawl_manifest.json` inside of the output directory.
+
+        Returns:
+            None
+        """
+
+        self.path = path or os.path.join(make_output_dir(), 'crawl_manifest.json')
+        self._lock = Lock()
+        self._entries: Dict[str, dict] = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding = 'utf-8') as f:
+                self._entries = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+    @staticmethod
+    def hash_page(page_source: str) -> str:
+        """Returns the content hash of a page."""
+        return sha256(page_source.encode('utf-8')).hexdigest()
+
+    def get_conditional_headers(self, url: str) -> Dict[str, str]:
+        """Returns the headers needed to make a conditional request for the url."""
+
+        with self._lock:
+            entry = self._entries.get(url, {})
+
+        headers = {}
+
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        return headers
+
+    def get_content_hash(self, url: str) -> Optional[str]:
+        """Returns the content hash recorded for the url the last time it was crawled."""
+
+        with self._lock:
+            return self._entries.get(url, {}).get('sha256')
+
+    def record(
+        self,
+        url: str,
+        page_source: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> bool:
+        """
+        Records a freshly downloaded page.
+
+        Args:
+            url (str): Full url of the webpage.
+            page_source (str): The html of the webpage.
+            etag (Optional[str]): The ETag header of the response.
+            last_modified (Optional[str]): The Last-Modified header of the response.
+
+        Returns:
+            unchanged (bool): Whether the page's content is identical to the
+                last time it was recorded.
+        """
+
+        content_hash = self.hash_page(page_source)
+
+        with self._lock:
+            unchanged = self._entries.get(url, {}).get('sha256') == content_hash
+            self._entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'sha256': content_hash,
+            }
+
+        return unchanged
+
+    def get_entries(self) -> Dict[str, dict]:
+        """Returns a copy of every recorded entry."""
+
+        with self._lock:
+            return dict(self._entries)
+
+    def update(self, entries: Dict[str, dict]) -> None:
+        """Merges in entries recorded elsewhere, e.g. by a worker process."""
+
+        with self._lock:
+            self._entries.update(entries)
+
+    def save(self) -> None:
+        """Writes the manifest to disk."""
+
+        with self._lock:
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+
+            with open(tmp_path, 'w', encoding = 'utf-8') as f:
+                json.dump(self._entries, f)
+
+            os.replace(tmp_path, self.path)
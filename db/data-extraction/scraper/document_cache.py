@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Hashable, Optional, Tuple
+from bs4 import BeautifulSoup
+from metrics.metrics import METRICS
+
+# A parsed document takes up roughly this many times the size of its markup
+# (measured with tracemalloc on schedule pages, for both html.parser and lxml).
+PARSED_SIZE_FACTOR = 50
+
+
+class DocumentCache:
+    """
+    Least recently used cache of parsed documents, along with their markup.
+
+    Its size is bounded by an estimate of the memory the parsed documents take
+    up, `PARSED_SIZE_FACTOR` times the size of their markup. Once it is full,
+    the documents that were used the longest time ago are dropped.
+
+    Parsed documents are made of reference cycles (every element points to its
+    parent), so the garbage collector walks every cached element on each full
+    collection. A cache that is never hit, or too small to hold the pages
+    until they are visited again, only slows the scrape down.
+    """
+
+    def __init__(self, max_size_bytes: int) -> None:
+        """
+        Args:
+            max_size_bytes (int): Estimated memory the cached documents may take
+                up. Nothing is cached if 0.
+
+        Returns:
+            None
+        """
+
+        self.max_size_bytes = max_size_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._documents: 'OrderedDict[Hashable, Tuple[BeautifulSoup, str, int]]' = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def get(self, key: Hashable) -> Optional[Tuple[BeautifulSoup, str]]:
+        """
+        Returns a cached document and its markup, or None if it is not cached.
+
+        Args:
+            key (Hashable): Identifies the document, e.g. its url along with the
+                strainer it was parsed with.
+
+        Returns:
+            document, markup (Optional[Tuple[BeautifulSoup, str]])
+        """
+
+        if not self.max_size_bytes:
+            return None
+
+        with self._lock:
+            entry = self._documents.get(key)
+
+            if entry is None:
+                self.misses += 1
+                METRICS.increment('document_cache_misses')
+                return None
+
+            self._documents.move_to_end(key)
+            self.hits += 1
+            METRICS.increment('document_cache_hits')
+
+            document, markup, _ = entry
+            return document, markup
+
+    def put(self, key: Hashable, document: BeautifulSoup, markup: str) -> None:
+        """Caches a parsed document, dropping the least recently used ones if needed."""
+
+        size = len(markup) * PARSED_SIZE_FACTOR
+
+        if not self.max_size_bytes or size > self.max_size_bytes:
+            return
+
+        with self._lock:
+            if key in self._documents:
+                self.size_bytes -= self._documents.pop(key)[2]
+
+            self._documents[key] = (document, markup, size)
+            self.size_bytes += size
+
+            while self.size_bytes > self.max_size_bytes:
+                _, (_, _, evicted_size) = self._documents.popitem(last = False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self.size_bytes = 0
@@ -0,0 +1,448 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from threading import Lock
+from time import sleep
+from typing import Callable, Deque, Dict, Iterable, Iterator, Set, Tuple, Type, Union
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connectionpool import HTTPConnectionPool
+from .crawl_manifest import CrawlManifest
+from .rate_limiter import THROTTLE_STATUS_CODES, AdaptiveRateLimiter, parse_retry_after
+from .response_cache import PageNotCachedError, ResponseCache
+from metrics.metrics import METRICS
+
+
+@dataclass
+class FetchStats:
+    """
+    Running totals for a Fetcher:
+        - requests (int): Number of HTTP requests sent, including retries.
+        - retries (int): Number of requests that were retried after a connection
+          error, timeout, 429, or 5xx response.
+        - failures (int): Number of urls that still failed after every retry.
+        - connections_opened (int): Number of TCP connections that were opened.
+        - connections_reused (int): Number of requests that were sent over an
+          already open keep-alive connection. Every request, retries included,
+          either opens a connection or reuses one.
+        - cache_hits (int): Number of pages served from the response cache.
+        - cache_misses (int): Number of pages that were not in the response cache.
+        - not_modified (int): Number of conditional requests answered with a 304.
+        - unchanged (int): Number of pages whose content is identical to the
+          last crawl, whether or not the server answered with a 304.
+    """
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    not_modified: int = 0
+    unchanged: int = 0
+
+    def __add__(self, other: 'FetchStats') -> 'FetchStats':
+        return FetchStats(**{
+            name: getattr(self, name) + getattr(other, name)
+            for name in self.__dataclass_fields__
+        })
+
+
+def get_counting_pool_class(
+    pool_class: Type[HTTPConnectionPool],
+    on_new_connection: Callable[[], None],
+) -> Type[HTTPConnectionPool]:
+    """Returns a subclass of a connection pool that calls `on_new_connection` for every connection it opens."""
+
+    class CountingConnectionPool(pool_class):
+        def _new_conn(self):
+            on_new_connection()
+            return super()._new_conn()
+
+    return CountingConnectionPool
+
+
+class ConnectionCountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that counts the connections it opens, as they are opened.
+
+    The pool managers only keep a limited number of pools around, so counting
+    the connections of the pools that are left at the end of a crawl misses
+    those of every pool that was dropped along the way.
+    """
+
+    def __init__(self, on_new_connection: Callable[[], None], **kwargs) -> None:
+        """
+        Args:
+            on_new_connection (Callable[[], None]): Called every time a
+                connection is opened, from the thread that opens it.
+            **kwargs: Passed on to HTTPAdapter.
+
+        Returns:
+            None
+        """
+
+        # Set before HTTPAdapter.__init__ creates the pool manager.
+        self.on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+
+    def count_connections(self, pool_manager: PoolManager) -> PoolManager:
+        pool_manager.pool_classes_by_scheme = {
+            scheme: get_counting_pool_class(pool_class, self.on_new_connection)
+            for scheme, pool_class in pool_manager.pool_classes_by_scheme.items()
+        }
+        return pool_manager
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.count_connections(self.poolmanager)
+
+    def proxy_manager_for(self, proxy: str, **proxy_kwargs) -> PoolManager:
+        # Requests sent through a proxy are pooled by the proxy's own manager.
+        if proxy in self.proxy_manager:
+            return self.proxy_manager[proxy]
+
+        return self.count_connections(super().proxy_manager_for(proxy, **proxy_kwargs))
+
+
+class Fetcher:
+    """
+    Responsible for downloading webpages. Pages can either be fetched one at a
+    time or many at once through a thread pool.
+
+    Nearly all of the time spent scraping the website is spent waiting on the
+    network, so fetching several pages at once is the largest speedup available.
+    To stay polite, the requests to each host go through an AdaptiveRateLimiter,
+    regardless of how many worker threads there are. It caps the number of
+    requests in flight and, optionally, the requests per second, and backs
+    off when the host answers with a 429 or 503.
+
+    All requests go through a single connection-pooled session, so connections
+    are kept alive and reused between pages instead of opening a new one for
+    every request. Connection errors, timeouts, 429s, and 5xx responses are
+    retried with exponential backoff, or after the response's Retry-After.
+
+    If a ResponseCache is given, every page that is downloaded is stored in it
+    and later requests for the same url are served from disk. In offline mode
+    nothing is downloaded at all and every page has to come from the cache.
+
+    If a CrawlManifest is given as well, cached pages are revalidated with a
+    conditional request instead of being served straight from disk. Pages that
+    come back as a 304, or whose content hash matches the manifest, are
+    remembered as unchanged so that callers can skip re-extracting them.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_connections_per_host: int = 4,
+        timeout: Tuple[float, float] = (5, 30),
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        cache: ResponseCache = None,
+        offline: bool = False,
+        manifest: CrawlManifest = None,
+        max_requests_per_second: float = None,
+    ) -> None:
+        """
+        Args:
+            max_workers (int): Number of threads used to fetch pages concurrently.
+                A value of 1 fetches pages strictly one after another.
+            max_connections_per_host (int): Maximum number of requests that can be
+                in flight against a single host at once. Lowered while the host
+                is throttling us.
+            timeout (Tuple[float, float]): Connect and read timeouts in seconds.
+            max_retries (int): Number of times a request is retried before giving up.
+            backoff_factor (float): Seconds to wait before the first retry. The wait
+                doubles after every retry.
+            cache (ResponseCache): Cache that pages are served from and stored in.
+            offline (bool): If True, pages are only ever read from the cache.
+            manifest (CrawlManifest): Manifest used to make conditional requests
+                and detect unchanged pages.
+            max_requests_per_second (float): Maximum requests per second sent to
+                a single host. Unlimited if None, until the host throttles us.
+
+        Returns:
+            None
+        """
+
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1.')
+        if max_connections_per_host < 1:
+            raise ValueError('max_connections_per_host must be at least 1.')
+        if offline and cache is None:
+            raise ValueError('offline mode requires a cache.')
+        if manifest is not None and cache is None:
+            raise ValueError('conditional requests require a cache to replay unchanged pages from.')
+
+        self.max_workers = max_workers
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.cache = cache
+        self.offline = offline
+        self.manifest = manifest
+        self.max_requests_per_second = max_requests_per_second
+
+        self._unchanged_urls: Set[str] = set()
+        self._unchanged_urls_lock = Lock()
+
+        self._rate_limiters: Dict[str, AdaptiveRateLimiter] = {}
+        self._rate_limiters_lock = Lock()
+
+        self._stats = FetchStats()
+        self._stats_lock = Lock()
+
+        # Every worker thread can hold a connection to the same host, so the
+        # pool has to be at least as large as the number of requests in flight.
+        self._adapter = ConnectionCountingAdapter(
+            lambda: self.increment_stat('connections_opened'),
+            pool_maxsize = max(max_workers, max_connections_per_host),
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+
+    def close(self) -> None:
+        """Closes every pooled connection."""
+        self.session.close()
+
+    def increment_stat(self, name: str) -> None:
+        """Thread-safe increment of one of the FetchStats counters."""
+
+        with self._stats_lock:
+            setattr(self._stats, name, getattr(self._stats, name) + 1)
+
+    def get_stats(self) -> FetchStats:
+        """Returns a snapshot of the fetcher's counters."""
+
+        with self._stats_lock:
+            return FetchStats(
+                requests = self._stats.requests,
+                retries = self._stats.retries,
+                failures = self._stats.failures,
+                connections_opened = self._stats.connections_opened,
+                connections_reused = max(self._stats.requests - self._stats.connections_opened, 0),
+                cache_hits = self._stats.cache_hits,
+                cache_misses = self._stats.cache_misses,
+                not_modified = self._stats.not_modified,
+                unchanged = self._stats.unchanged,
+            )
+
+    def get_rate_limiter(self, url: str) -> AdaptiveRateLimiter:
+        """Returns the rate limiter of the url's host."""
+
+        host = urlparse(url).netloc
+
+        with self._rate_limiters_lock:
+            if host not in self._rate_limiters:
+                self._rate_limiters[host] = AdaptiveRateLimiter(
+                    self.max_connections_per_host,
+                    self.max_requests_per_second,
+                )
+
+            return self._rate_limiters[host]
+
+    def fetch(self, url: str) -> str:
+        """
+        Returns a single webpage, either from the cache or by downloading it.
+
+        Args:
+            url (str): Full url of the webpage.
+
+        Returns:
+            page source (str): The html of the webpage.
+        """
+
+        cached_page_source = None
+
+        if self.cache is not None:
+            cached_page_source = self.cache.get(url)
+
+            if cached_page_source is not None:
+                self.increment_stat('cache_hits')
+            else:
+                self.increment_stat('cache_misses')
+
+            # Without a manifest, cached pages are trusted as is.
+            if cached_page_source is not None and (self.manifest is None or self.offline):
+                return cached_page_source
+
+            if self.offline:
+                raise PageNotCachedError(f'{url} is not in the cache.')
+
+        headers = {}
+        if self.manifest is not None and cached_page_source is not None:
+            headers = self.manifest.get_conditional_headers(url)
+
+        response = self.download(url, headers)
+
+        if response.status_code == 304 and cached_page_source is not None:
+            self.increment_stat('not_modified')
+            self.mark_unchanged(url)
+            return cached_page_source
+
+        page_source = response.text
+
+        # Only successful responses are worth replaying.
+        if response.status_code == 200:
+            if self.manifest is not None:
+                unchanged = self.manifest.record(
+                    url,
+                    page_source,
+                    etag = response.headers.get('ETag'),
+                    last_modified = response.headers.get('Last-Modified'),
+                )
+
+                if unchanged:
+                    self.mark_unchanged(url)
+
+            if self.cache is not None:
+                self.cache.put(url, page_source)
+
+        return page_source
+
+    def mark_unchanged(self, url: str) -> None:
+        """Remembers that the url's content is identical to the last crawl."""
+
+        self.increment_stat('unchanged')
+
+        with self._unchanged_urls_lock:
+            self._unchanged_urls.add(url)
+
+    def is_unchanged(self, url: str) -> bool:
+        """
+        Returns whether the url has been fetched during this run and its content
+        is identical to the last crawl.
+        """
+
+        with self._unchanged_urls_lock:
+            return url in self._unchanged_urls
+
+    def download(self, url: str, headers: Dict[str, str] = None) -> requests.Response:
+        """
+        Downloads a single webpage, retrying connection errors, timeouts, 429s,
+        and 5xx responses.
+
+        Args:
+            url (str): Full url of the webpage.
+            headers (Dict[str, str]): Extra request headers, e.g. the conditional
+                request headers.
+
+        Returns:
+            response (requests.Response)
+        """
+
+        attempt = 0
+        rate_limiter = self.get_rate_limiter(url)
+
+        while True:
+            retry_after = None
+
+            try:
+                self.increment_stat('requests')
+
+                ticket = rate_limiter.acquire()
+                response = None
+
+                try:
+                    with METRICS.timer('fetch'):
+                        response = self.session.get(url, headers = headers, timeout = self.timeout)
+                finally:
+                    rate_limiter.release(
+                        ticket,
+                        response.status_code if response is not None else None,
+                        response.headers.get('Retry-After') if response is not None else None,
+                    )
+
+                # 429s and 5xx responses are usually transient, so they are
+                # retried. Anything else (e.g. the site's 404 page) is returned
+                # as is.
+                if response.status_code < 500 and response.status_code not in THROTTLE_STATUS_CODES:
+                    METRICS.increment('fetch_bytes', len(response.content))
+                    return response
+
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    self.increment_stat('failures')
+                    raise
+            except requests.HTTPError:
+                self.increment_stat('failures')
+                raise
+
+            self.increment_stat('retries')
+
+            # The rate limiter already holds back every request to the host
+            # until the Retry-After expires.
+            if retry_after is None:
+                sleep(self.backoff_factor * 2 ** attempt)
+
+            attempt += 1
+
+    def fetch_or_exception(self, url: str) -> Union[str, Exception]:
+        """
+        Same as `fetch`, but returns the exception instead of raising it so that
+        one broken link doesn't stop the rest of a batch from being fetched.
+        """
+
+        try:
+            return self.fetch(url)
+        except Exception as e:
+            return e
+
+    def fetch_many(
+        self,
+        urls: Iterable[str],
+        window: int = None,
+    ) -> Iterator[Union[str, Exception]]:
+        """
+        Downloads many webpages concurrently.
+
+        Results are yielded in the same order as the given urls, so anything
+        built from them is identical to fetching the pages one at a time. Only
+        `window` pages are in flight or waiting to be consumed at any one time,
+        which keeps memory bounded on seasons with thousands of teams.
+
+        Args:
+            urls (Iterable[str]): Full urls of the webpages.
+            window (int): Number of pages fetched ahead of the consumer.
+                Defaults to four times the number of workers.
+
+        Returns:
+            pages (Iterator[Union[str, Exception]]): The html of each webpage, or
+                the exception raised while fetching it.
+        """
+
+        if self.max_workers == 1:
+            for url in urls:
+                yield self.fetch_or_exception(url)
+            return
+
+        window = window or self.max_workers * 4
+        urls = iter(urls)
+
+        executor = ThreadPoolExecutor(max_workers = self.max_workers)
+        futures: Deque[Future] = deque()
+
+        try:
+            for url in islice(urls, window):
+                futures.append(executor.submit(self.fetch_or_exception, url))
+
+            while futures:
+                future = futures.popleft()
+
+                # Keep the window full while the consumer works on this page.
+                for url in islice(urls, 1):
+                    futures.append(executor.submit(self.fetch_or_exception, url))
+
+                yield future.result()
+        finally:
+            executor.shutdown(wait = True, cancel_futures = True)
@@ -0,0 +1,146 @@
+from typing import Dict, Iterable, List, Optional, Set
+import json
+import os
+from utils.get_query_parameter import get_query_parameter
+from utils.make_output_dir import make_output_dir
+
+
+def get_team_id(team_schedule_link: str) -> Optional[str]:
+    """Returns the teamID of a team schedule link, or None if it has none."""
+
+    try:
+        return get_query_parameter(team_schedule_link, 'teamID')
+    except KeyError:
+        return None
+
+
+def deduplicate_team_schedule_links(team_schedule_links: Iterable[str], seen: Set[str] = None) -> List[str]:
+    """
+    Drops the links to teams that were already seen, keeping the order of the
+    first occurrences. A team that is listed in several region tables is only
+    scraped, and only exported, once.
+
+    Args:
+        team_schedule_links (Iterable[str]): Normalized team schedule links.
+        seen (Set[str]): teamIDs (or links, for links without a teamID) that
+            were already seen. Updated in place, so that it can be shared
+            between several calls, e.g. one per shard of a season.
+
+    Returns:
+        team schedule links (List[str])
+    """
+
+    if seen is None:
+        seen = set()
+
+    unique_team_schedule_links: List[str] = []
+
+    for team_schedule_link in team_schedule_links:
+        # Links without a teamID can only be told apart by the link itself.
+        key = get_team_id(team_schedule_link) or team_schedule_link
+
+        if key not in seen:
+            seen.add(key)
+            unique_team_schedule_links.append(team_schedule_link)
+
+    return unique_team_schedule_links
+
+
+class LinkIndex:
+    """
+    Persisted index of the team schedule links of each season, as found on each
+    of the season's team listing pages (the region homepages, or the single
+    team list of the 2000 season):
+
+        season -> region homepage link -> normalized team schedule link -> teamID
+
+    Once a season is in the index its team schedule links are known without
+    downloading any of its listing pages again.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        """
+        Args:
+            path (str): Location of the index file. Defaults to
+                `link_index.json` inside of the output directory.
+
+        Returns:
+            None
+        """
+
+        self.path = path or os.path.join(make_output_dir(), 'link_index.json')
+        self._seasons: Dict[str, Dict[str, Dict[str, Optional[str]]]] = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding = 'utf-8') as f:
+                self._seasons = json.load(f)
+
+    def __contains__(self, season: str) -> bool:
+        return season in self._seasons
+
+    def get_team_schedule_links_per_region(self, season: str) -> Optional[Dict[str, List[str]]]:
+        """
+        Returns the team schedule links of a season grouped by region, in the
+        same form as `Scraper.get_team_schedule_links_per_region`.
+        """
+
+        if season not in self._seasons:
+            return None
+
+        return {
+            region_homepage_link: list(team_schedule_links)
+            for region_homepage_link, team_schedule_links in self._seasons[season].items()
+        }
+
+    def get_team_schedule_links(self, season: str) -> Optional[List[str]]:
+        """Returns the de-duplicated team schedule links of a season, or None if the season is not indexed."""
+
+        if season not in self._seasons:
+            return None
+
+        return deduplicate_team_schedule_links(
+            team_schedule_link
+            for team_schedule_links in self._seasons[season].values()
+            for team_schedule_link in team_schedule_links
+        )
+
+    def set_season(self, season: str, team_schedule_links_per_region: Dict[str, List[str]]) -> None:
+        """
+        Replaces the indexed links of a season.
+
+        Args:
+            season (str): The season for which the information is applicable for.
+            team_schedule_links_per_region (Dict[str, List[str]]): The normalized
+                team schedule links found on each of the season's listing pages,
+                in the order of the listing pages.
+        """
+
+        self._seasons[season] = {
+            region_homepage_link: {
+                team_schedule_link: get_team_id(team_schedule_link)
+                for team_schedule_link in team_schedule_links
+            }
+            for region_homepage_link, team_schedule_links in team_schedule_links_per_region.items()
+        }
+
+    def get_entries(self, seasons: Iterable[str] = None) -> Dict[str, dict]:
+        """Returns a copy of every indexed season, or of the given seasons."""
+
+        if seasons is None:
+            return dict(self._seasons)
+
+        return {season: self._seasons[season] for season in seasons if season in self._seasons}
+
+    def update(self, entries: Dict[str, dict]) -> None:
+        """Merges in seasons indexed elsewhere, e.g. by a worker process."""
+        self._seasons.update(entries)
+
+    def save(self) -> None:
+        """Writes the index to disk."""
+
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+
+        with open(tmp_path, 'w', encoding = 'utf-8') as f:
+            json.dump(self._seasons, f, indent = 1)
+
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,257 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Condition
+from time import monotonic
+from typing import Callable, Optional
+from metrics.metrics import METRICS
+
+# Responses that mean the site wants us to slow down.
+THROTTLE_STATUS_CODES = {429, 503}
+
+# Concurrency and rate are halved on every throttled response...
+BACKOFF_FACTOR = 0.5
+# ...and raised again after this many successful responses in a row.
+SUCCESS_STREAK = 20
+RATE_INCREASE_FACTOR = 1.25
+
+# Weight of the newest request in the moving average of the time between requests.
+OBSERVED_RATE_SMOOTHING = 0.1
+
+
+def parse_retry_after(value: Optional[str], now: Callable[[], datetime] = None) -> Optional[float]:
+    """
+    Returns the seconds a Retry-After header asks to wait. The header holds
+    either a number of seconds or an HTTP date.
+
+    Args:
+        value (Optional[str]): The header's value.
+        now (Callable[[], datetime]): Returns the current time. Used to turn a
+            date into seconds.
+
+    Returns:
+        seconds (Optional[float]): None if there is no header or it can't be read.
+    """
+
+    if not value:
+        return None
+
+    value = value.strip()
+
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo = timezone.utc)
+
+    current_time = now() if now is not None else datetime.now(timezone.utc)
+    return max((retry_at - current_time).total_seconds(), 0.0)
+
+
+class AdaptiveRateLimiter:
+    """
+    Schedules the requests to a single host. Combines:
+        - A token bucket that caps the requests per second, with bursts of up
+          to `burst` requests.
+        - An adaptive concurrency limit. Every throttled response (429 or 503)
+          halves both the concurrency and the rate, and every `SUCCESS_STREAK`
+          successful responses in a row raise them again, up to their maximums
+          (additive increase of the concurrency, multiplicative of the rate).
+        - Retry-After headers, which hold back every request until they expire.
+
+    Without a maximum rate the token bucket only kicks in once the host has
+    throttled us, starting from half of the rate we were sending at. It is
+    lifted again once it has grown past twice the rate we actually send at,
+    i.e. once it no longer limits anything.
+
+    Used around every request:
+
+        ticket = limiter.acquire()
+        try:
+            response = session.get(url)
+        finally:
+            limiter.release(ticket, response.status_code, response.headers.get('Retry-After'))
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_rate: float = None,
+        min_rate: float = 0.5,
+        burst: int = None,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """
+        Args:
+            max_concurrency (int): Maximum number of requests in flight.
+            max_rate (float): Maximum requests per second. Unlimited if None.
+            min_rate (float): The rate is never backed off below this.
+            burst (int): Number of requests that can be sent at once after an
+                idle period. Defaults to the maximum concurrency.
+            clock (Callable[[], float]): Monotonic clock in seconds.
+
+        Returns:
+            None
+        """
+
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1.')
+        if max_rate is not None and max_rate <= 0:
+            raise ValueError('max_rate must be positive.')
+
+        self.max_concurrency = max_concurrency
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.burst = burst or max_concurrency
+        self.clock = clock
+
+        self.concurrency = max_concurrency
+        self.rate = max_rate
+        self.in_flight = 0
+        self.tokens = float(self.burst)
+        self.blocked_until = 0.0
+        self.observed_rate = 0.0
+        self._mean_interval = None
+
+        self._condition = Condition()
+        self._last_refill = clock()
+        self._last_request = None
+        self._last_backoff = float('-inf')
+        self._successes = 0
+
+    def acquire(self) -> float:
+        """
+        Blocks until a request may be sent.
+
+        Returns:
+            ticket (float): The time the request was let through, passed back
+                to `release`.
+        """
+
+        with self._condition:
+            while True:
+                now = self.clock()
+                wait = self.get_wait(now)
+
+                if wait == 0.0:
+                    break
+
+                self._condition.wait(wait)
+
+            if self.rate is not None:
+                self.tokens -= 1
+
+            self.in_flight += 1
+            self.update_observed_rate(now)
+            return now
+
+    def get_wait(self, now: float) -> Optional[float]:
+        """
+        Returns 0.0 if a request may be sent now, the seconds until one may
+        be sent, or None if it has to wait for another request to finish.
+        """
+
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        if self.in_flight >= self.concurrency:
+            return None
+
+        if self.rate is None:
+            return 0.0
+
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+        if self.tokens >= 1:
+            return 0.0
+
+        return (1 - self.tokens) / self.rate
+
+    def update_observed_rate(self, now: float) -> None:
+        if self._last_request is not None:
+            interval = now - self._last_request
+
+            if self._mean_interval is None:
+                self._mean_interval = interval
+            else:
+                self._mean_interval += OBSERVED_RATE_SMOOTHING * (interval - self._mean_interval)
+
+            if self._mean_interval > 0:
+                self.observed_rate = 1 / self._mean_interval
+
+        self._last_request = now
+
+    def release(self, ticket: float, status_code: int = None, retry_after: Optional[str] = None) -> None:
+        """
+        Marks a request as finished and adapts to its response.
+
+        Args:
+            ticket (float): What `acquire` returned for the request.
+            status_code (int): The response's status code. None if the request
+                failed without a response, which does not count either way.
+            retry_after (Optional[str]): The response's Retry-After header.
+        """
+
+        with self._condition:
+            self.in_flight -= 1
+            now = self.clock()
+
+            if status_code in THROTTLE_STATUS_CODES:
+                self.back_off(ticket, now, parse_retry_after(retry_after))
+            elif status_code is not None:
+                self.ramp_up()
+
+            self.export_metrics()
+            self._condition.notify_all()
+
+    def back_off(self, ticket: float, now: float, retry_after: Optional[float]) -> None:
+        METRICS.increment('throttled_responses')
+
+        if retry_after is not None:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+        self._successes = 0
+
+        # Requests that were already in flight when we last backed off were
+        # sent too fast for the old limits, not for the new ones.
+        if ticket < self._last_backoff:
+            return
+
+        self._last_backoff = now
+        self.concurrency = max(1, int(self.concurrency * BACKOFF_FACTOR))
+
+        current_rate = self.rate if self.rate is not None else max(self.observed_rate, self.min_rate)
+        self.rate = max(self.min_rate, current_rate * BACKOFF_FACTOR)
+        self.tokens = min(self.tokens, 0.0)
+        # Tokens only start to build up again once the Retry-After expires.
+        self._last_refill = max(now, self.blocked_until)
+
+    def ramp_up(self) -> None:
+        self._successes += 1
+
+        if self._successes < SUCCESS_STREAK:
+            return
+
+        self._successes = 0
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+
+        if self.rate is None:
+            return
+
+        self.rate *= RATE_INCREASE_FACTOR
+
+        if self.max_rate is not None:
+            self.rate = min(self.rate, self.max_rate)
+        elif self.rate > 2 * self.observed_rate:
+            self.rate = None
+            self.tokens = float(self.burst)
+
+    def export_metrics(self) -> None:
+        METRICS.set_gauge('rate_limit_concurrency', self.concurrency)
+        METRICS.set_gauge('rate_limit_requests_per_second', self.rate if self.rate is not None else 0.0)
+        METRICS.set_gauge('observed_requests_per_second', self.observed_rate)
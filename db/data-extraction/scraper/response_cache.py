@@ -0,0 +1,149 @@
+from hashlib import sha256
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Dict, Optional, Tuple
+import os
+from utils.make_output_dir import make_output_dir
+
+
+class PageNotCachedError(Exception):
+    """Raised when a page is requested in offline mode but was never cached."""
+
+
+class ResponseCache:
+    """
+    Persistent on-disk cache of every page the scraper downloads, keyed by url.
+
+    Each page is stored as its own file whose name is the hash of the url. The
+    cache is capped in size; once the cap is exceeded the least recently used
+    pages are evicted. A file's modification time doubles as its last access
+    time, so the LRU order survives between runs.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = None,
+        max_size_bytes: int = 2 * 1024 ** 3,
+    ) -> None:
+        """
+        Args:
+            cache_dir (str): Directory the pages are stored in. Defaults to a
+                `cache` directory inside of the output directory.
+            max_size_bytes (int): Maximum total size of the cached pages.
+
+        Returns:
+            None
+        """
+
+        self.cache_dir = Path(cache_dir or os.path.join(make_output_dir(), 'cache'))
+        self.cache_dir.mkdir(parents = True, exist_ok = True)
+        self.max_size_bytes = max_size_bytes
+
+        self._lock = Lock()
+
+        # Path -> (size in bytes, last access time)
+        self._entries: Dict[Path, Tuple[int, float]] = {}
+        self._size_bytes = 0
+
+        for path in self.cache_dir.glob('*.html'):
+            stat = path.stat()
+            self._entries[path] = (stat.st_size, stat.st_mtime)
+            self._size_bytes += stat.st_size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, url: str) -> bool:
+        return self.get_path(url) in self._entries
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of the cached pages."""
+        return self._size_bytes
+
+    def get_path(self, url: str) -> Path:
+        """Returns the file the url's page is stored in."""
+        return self.cache_dir / (sha256(url.encode('utf-8')).hexdigest() + '.html')
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Returns the cached page source for the url, or None if it is not cached.
+
+        Args:
+            url (str): Full url of the webpage.
+
+        Returns:
+            page source (Optional[str])
+        """
+
+        path = self.get_path(url)
+
+        with self._lock:
+            if path not in self._entries:
+                return None
+
+            try:
+                page_source = path.read_bytes().decode('utf-8')
+            except FileNotFoundError:
+                # Removed from underneath us (e.g. by another process).
+                self.remove_entry(path)
+                return None
+
+            now = time()
+            os.utime(path, (now, now))
+            self._entries[path] = (self._entries[path][0], now)
+
+        return page_source
+
+    def put(self, url: str, page_source: str) -> None:
+        """
+        Stores the page source for the url, evicting the least recently used
+        pages if the cache grows past its size cap.
+
+        Args:
+            url (str): Full url of the webpage.
+            page_source (str): The html of the webpage.
+
+        Returns:
+            None
+        """
+
+        path = self.get_path(url)
+        data = page_source.encode('utf-8')
+
+        with self._lock:
+            # Write to a temporary file first so that a crash never leaves a
+            # half written page behind.
+            tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+            if path in self._entries:
+                self._size_bytes -= self._entries[path][0]
+
+            self._entries[path] = (len(data), time())
+            self._size_bytes += len(data)
+
+            self.evict()
+
+    def remove_entry(self, path: Path) -> None:
+        """Forgets about a cached page and deletes its file. Caller must hold the lock."""
+
+        size, _ = self._entries.pop(path)
+        self._size_bytes -= size
+        path.unlink(missing_ok = True)
+
+    def evict(self) -> None:
+        """Evicts the least recently used pages until the cache fits its size cap. Caller must hold the lock."""
+
+        if self._size_bytes <= self.max_size_bytes:
+            return
+
+        lru_paths = sorted(self._entries, key = lambda path: self._entries[path][1])
+
+        for path in lru_paths:
+            if self._size_bytes <= self.max_size_bytes:
+                break
+
+            self.remove_entry(path)
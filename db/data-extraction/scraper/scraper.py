@@ -1,6 +1,21 @@
-from typing import List, Type
-from bs4 import BeautifulSoup
-import requests
+from itertools import chain
+from typing import Dict, Hashable, Iterator, List, Optional, Type, Union
+from bs4 import BeautifulSoup, SoupStrainer
+from .document_cache import DocumentCache
+from .fetcher import Fetcher
+from .link_index import deduplicate_team_schedule_links
+from metrics.metrics import METRICS
+from utils.normalize_link import normalize_link
+
+
+# The extractors only ever read a handful of elements from each page type, so
+# with partial parsing only the subtrees rooted at these tags are built.
+HOMEPAGE_PARSE_ONLY = SoupStrainer('div')
+SEASON_HOMEPAGE_PARSE_ONLY = SoupStrainer(['a', 'table'])
+REGION_HOMEPAGE_PARSE_ONLY = SoupStrainer('table')
+TEAM_LIST_PARSE_ONLY = SoupStrainer('a')
+
+BASE_URL = 'http://www.joeeitel.com/hsfoot/'
 
 
 class Scraper(BeautifulSoup):
@@ -12,36 +27,178 @@ class Scraper(BeautifulSoup):
     implemented while scraping the entire website. So instead of making a
     new request and reinstantiating a new BeautifulSoup object, the url
     is embedded into this class so that when the url changes
-    a new instance of is automatically created.
+    the page is automatically downloaded and parsed again.
+
+    Pages are downloaded through a Fetcher. Callers that are about to visit
+    many urls can wrap them in `iter_prefetched` so that the pages are fetched
+    concurrently ahead of time.
+
+    The parser backend is selectable (e.g. 'lxml' is much faster than the
+    default 'html.parser'). With partial parsing enabled, callers can pass a
+    SoupStrainer for the page type so that only the subtrees the extractors
+    read are built.
+
+    Pages are parsed lazily, the first time the scraper is queried (`find`,
+    `find_all`, `select`, ...), so a page whose url is all the caller needs is
+    never parsed. Parsed pages can be kept in a DocumentCache, so that visiting
+    a page again during the same run neither downloads nor parses it again.
     """
 
-    def __init__(self, url: str = '') -> None:
+    def __init__(
+        self,
+        url: str = '',
+        fetcher: Fetcher = None,
+        parser_backend: str = 'html.parser',
+        partial_parse: bool = False,
+        parse_only: SoupStrainer = HOMEPAGE_PARSE_ONLY,
+        base_url: str = BASE_URL,
+        document_cache: DocumentCache = None,
+    ) -> None:
         """
         Args:
             url (str): url of the webpage to be scraped.
                 If no url is given, the scraper initializes with the
                 default base url: 'http://www.joeeitel.com/hsfoot/'
+            fetcher (Fetcher): Fetcher used to download pages. If no fetcher
+                is given, one with the default concurrency settings is used.
+            parser_backend (str): The BeautifulSoup parser, e.g. 'html.parser' or 'lxml'.
+            partial_parse (bool): If True, the strainers passed to `update_url`
+                are used to only parse part of each page.
+            parse_only (SoupStrainer): Strainer for the first page.
+            base_url (str): The url every link is relative to. Only changed to
+                point the scraper at a copy of the site, e.g. a local fixture server.
+            document_cache (DocumentCache): Cache of the parsed pages. If no cache
+                is given, pages are not cached.
         
         Returns:
             None
         """
-        self.BASE_URL = 'http://www.joeeitel.com/hsfoot/'
-        self.url = url
+        self.BASE_URL = base_url
+        self.fetcher = fetcher if fetcher is not None else Fetcher()
+        self.parser_backend = parser_backend
+        self.partial_parse = partial_parse
+        self.prefetched_pages: Dict[str, Union[str, Exception]] = {}
+        self.document_cache = document_cache if document_cache is not None else DocumentCache(max_size_bytes = 0)
+
+        # Key of the page that was downloaded but not parsed yet.
+        self.unparsed_key: Optional[Hashable] = None
+
+        # Starts out as an empty document, so that the scraper is a valid
+        # BeautifulSoup before the first page is parsed.
+        BeautifulSoup.__init__(self, '', self.parser_backend)
 
-        request = requests.get(self.BASE_URL + self.url)
-        super().__init__(request.text, 'html.parser')
+        self.update_url(url, parse_only)
     
-    def update_url(self, url: str) -> None:
+    def update_url(self, url: str, parse_only: SoupStrainer = None) -> None:
         """
-        Function that reinitizalizes the class instance.
+        Function that points the scraper at a new url. The page is downloaded
+        (unless it was already prefetched or is cached) right away, so that
+        errors are raised here, but it is only parsed once the scraper is queried.
 
         Args:
             url (str): url of the webpage to be scraped.
+            parse_only (SoupStrainer): The elements the caller is going to read.
+                Only used when partial parsing is enabled.
         
         Returns:
             None
         """
-        self.__init__(url)
+        if self.unparsed_key is not None:
+            METRICS.increment('parses_skipped')
+
+        self.url = url
+        self.page_parse_only = parse_only if self.partial_parse else None
+
+        # The same page parsed with another strainer is another document.
+        key = (url, self.page_parse_only)
+        cached_document = self.document_cache.get(key)
+
+        if cached_document is not None:
+            self.prefetched_pages.pop(url, None)
+            document, self.page_source = cached_document
+            self.load_document(document)
+            self.unparsed_key = None
+            return
+
+        page_source = self.prefetched_pages.pop(url, None)
+
+        if page_source is None:
+            page_source = self.fetcher.fetch(self.BASE_URL + url)
+        elif isinstance(page_source, Exception):
+            raise page_source
+
+        # Kept so that the raw markup is available without downloading the
+        # page a second time.
+        self.page_source = page_source
+        self.unparsed_key = key
+
+    def parse(self) -> None:
+        """Parses the current page, if it was not parsed yet."""
+
+        if self.unparsed_key is None:
+            return
+
+        with METRICS.timer('parse'):
+            document = BeautifulSoup(self.page_source, self.parser_backend, parse_only = self.page_parse_only)
+
+        self.document_cache.put(self.unparsed_key, document, self.page_source)
+        self.load_document(document)
+        self.unparsed_key = None
+
+    def load_document(self, document: BeautifulSoup) -> None:
+        """
+        Makes the scraper the given parsed document by taking over its state.
+        The elements are shared with the document, not copied, so this is as
+        cheap for a page with thousands of elements as for an empty one.
+        """
+        for attribute, value in vars(document).items():
+            setattr(self, attribute, value)
+
+    # Every query (`find`, `find_all`, `select`, `text`, ...) walks the
+    # document through its contents, which parses the current page first.
+    @property
+    def contents(self) -> list:
+        self.parse()
+        return self.__dict__['contents']
+
+    @contents.setter
+    def contents(self, contents: list) -> None:
+        self.__dict__['contents'] = contents
+
+    def is_unchanged(self, url: str) -> bool:
+        """
+        Function that returns whether the url's page was fetched during this run
+        and is identical to the last crawl. Only meaningful when the fetcher makes
+        conditional requests.
+
+        Args:
+            url (str): url of the webpage.
+
+        Returns:
+            unchanged (bool)
+        """
+        return self.fetcher.is_unchanged(self.BASE_URL + url)
+
+    def iter_prefetched(self, urls: List[str]) -> Iterator[str]:
+        """
+        Function that yields each of the given urls in order while the pages
+        are fetched concurrently ahead of the caller. Calling `update_url` with
+        a yielded url uses the prefetched page instead of making a new request.
+
+        Args:
+            urls (List[str]): urls of the webpages to be scraped.
+
+        Returns:
+            urls (Iterator[str]): The given urls, in the same order.
+        """
+        pages = self.fetcher.fetch_many(self.BASE_URL + url for url in urls)
+
+        for url, page_source in zip(urls, pages):
+            self.prefetched_pages[url] = page_source
+            yield url
+
+            # Don't hold on to pages the caller decided not to visit.
+            self.prefetched_pages.pop(url, None)
     
     def get_season_homepage_links(self) -> List[str]:
         """
@@ -82,6 +239,26 @@ class Scraper(BeautifulSoup):
         else:
             return complex_team_schedule_extractor(self)
 
+    def get_team_schedule_links_per_region(self, season: str) -> Dict[str, List[str]]:
+        """
+        Function that returns the urls of each team's schedule, grouped by the
+        page that lists them. The links are normalized but not de-duplicated.
+
+        Args:
+            season (str): The season for which we want to get the
+                          team schedules from.
+
+        Returns:
+            team schedule links per region (Dict[str, List[str]]): The team
+                schedule urls keyed by the url of the region homepage (or team
+                list) they were found on.
+        """
+
+        if season == '2000':
+            return get_team_list_team_schedule_links(self)
+        else:
+            return get_region_team_schedule_links(self, get_region_homepage_links(self))
+
 
 def simple_team_schedule_extractor(scraper: Type[Scraper]) -> List[str]:
     """
@@ -96,29 +273,43 @@ def simple_team_schedule_extractor(scraper: Type[Scraper]) -> List[str]:
         team schedule links (List[str]): A list of urls for each team's schedule.
     """
 
+    team_schedule_links_per_region = get_team_list_team_schedule_links(scraper)
+    return deduplicate_team_schedule_links(chain.from_iterable(team_schedule_links_per_region.values()))
+
+def get_team_list_team_schedule_links(scraper: Type[Scraper]) -> Dict[str, List[str]]:
+    """
+    Function that returns the team schedule urls of a season whose teams are all
+    listed on one page.
+
+    Args:
+        scraper (Scraper): Scraper object pointed at a season's homepage.
+
+    Returns:
+        team schedule links per region (Dict[str, List[str]]): The normalized
+            team schedule urls keyed by the url of the team list.
+    """
+
     anchor_tag_link = scraper.find('a')['href']
-    scraper.update_url(anchor_tag_link)
+    scraper.update_url(anchor_tag_link, TEAM_LIST_PARSE_ONLY)
 
     team_schedule_links: List[str] = []
     team_schedule_anchor_tags = scraper.find_all('a')
 
     for team_schedule_anchor_tag in team_schedule_anchor_tags:
-        team_schedule_link = team_schedule_anchor_tag['href']
+        team_schedule_link = normalize_link(team_schedule_anchor_tag['href'])
         team_schedule_links.append(team_schedule_link)
     
-    return team_schedule_links
+    return {anchor_tag_link: team_schedule_links}
 
-def complex_team_schedule_extractor(scraper: Type[Scraper]) -> List[str]:
+def get_region_homepage_links(scraper: Type[Scraper]) -> List[str]:
     """
-    Function that returns a list of each team's schedule url. This is considered
-    the "complex" extractor because, for instance, the team schedules for the 2001
-    season exist on a variety of different urls.
+    Function that returns the url of each region's homepage for a season.
 
     Args:
-        scraper (Scraper): Scraper object.
+        scraper (Scraper): Scraper object pointed at a season's homepage.
 
     Returns:
-        team schedule links (List[str]): A list of urls for each team's schedule.
+        region homepage links (List[str]): A list of urls for each region's homepage.
     """
     region_homepage_links: List[str] = []
     region_table = scraper.find('table', class_ = 'rankings')
@@ -127,21 +318,68 @@ def complex_team_schedule_extractor(scraper: Type[Scraper]) -> List[str]:
     for region_anchor_tag in region_anchor_tags:
         region_homepage_link = region_anchor_tag['href']
         region_homepage_links.append(region_homepage_link)
+
+    return region_homepage_links
+
+def complex_team_schedule_extractor(
+    scraper: Type[Scraper],
+    region_homepage_links: List[str] = None,
+) -> List[str]:
+    """
+    Function that returns a list of each team's schedule url. This is considered
+    the "complex" extractor because, for instance, the team schedules for the 2001
+    season exist on a variety of different urls.
+
+    Args:
+        scraper (Scraper): Scraper object.
+        region_homepage_links (List[str]): Only extract the teams of these regions.
+            If not given, the scraper must be pointed at the season's homepage
+            and every region is extracted.
+
+    Returns:
+        team schedule links (List[str]): A list of urls for each team's schedule.
+            A team that is listed in several regions is only returned once.
+    """
+    if region_homepage_links is None:
+        region_homepage_links = get_region_homepage_links(scraper)
+
+    team_schedule_links_per_region = get_region_team_schedule_links(scraper, region_homepage_links)
+    return deduplicate_team_schedule_links(chain.from_iterable(team_schedule_links_per_region.values()))
+
+def get_region_team_schedule_links(
+    scraper: Type[Scraper],
+    region_homepage_links: List[str],
+) -> Dict[str, List[str]]:
+    """
+    Function that returns the team schedule urls listed on each of the given
+    region homepages.
+
+    Args:
+        scraper (Scraper): Scraper object.
+        region_homepage_links (List[str]): urls of the region homepages.
+
+    Returns:
+        team schedule links per region (Dict[str, List[str]]): The normalized
+            team schedule urls keyed by the url of the region homepage, in the
+            order of the region homepages.
+    """
+    team_schedule_links_per_region: Dict[str, List[str]] = {}
     
-    team_schedule_links: List[str] = []
-    
-    for region_homepage_link in region_homepage_links:
-        scraper.update_url(region_homepage_link)
+    for region_homepage_link in scraper.iter_prefetched(region_homepage_links):
+        scraper.update_url(region_homepage_link, REGION_HOMEPAGE_PARSE_ONLY)
 
         # Instead of parsing with a bunch of classes that change, the regions
         # table is always the second one.
         region_leaderboard_table = scraper.find_all('table')[1]
         team_schedule_anchor_tags = region_leaderboard_table.find_all('a')
+        team_schedule_links: List[str] = []
 
         for team_schedule_anchor_tag in team_schedule_anchor_tags:
             # Some links include the full url, some don't. To keep the navigation
             # functionality of the scraper consistent, we are going to remove the base url part.
-            team_schedule_link = team_schedule_anchor_tag['href'].replace('http://www.joeeitel.com/hsfoot/', '')
+            team_schedule_link = normalize_link(team_schedule_anchor_tag['href'])
             team_schedule_links.append(team_schedule_link)
+
+        team_schedule_links_per_region[region_homepage_link] = team_schedule_links
     
-    return team_schedule_links
+    return team_schedule_links_per_region
@@ -0,0 +1,70 @@
+"""
+Incremental Parquet runs of the 2002-2012 layout, where the rows of unchanged
+team pages are reused from the season's previous export and the other pages
+are scraped again.
+
+Run from `db/data-extraction`:
+
+    python -m pytest tests
+"""
+
+import pandas as pd
+import pytest
+from benchmark.fixture_server import FixtureServer
+from benchmark.fixture_site import build_fixture_site
+from dataframe_builder import dataframe_builder, parquet_export
+from dataframe_builder.dataframe_builder import export_dataframes, read_dataframe_builder_factory
+from dataframe_builder.parquet_export import read_exported_table, write_season_table
+from metrics.metrics import METRICS
+from scraper.fetcher import Fetcher
+from scraper.scraper import Scraper
+from utils.get_query_parameter import get_query_parameter
+
+SEASON = '2005'
+N_TEAMS = 8
+
+
+class PartlyUnchangedScraper(Scraper):
+    """Scraper that reports the pages of the even teamIDs as unchanged since the last crawl."""
+
+    def is_unchanged(self, url: str) -> bool:
+        return int(get_query_parameter(url, 'teamID')) % 2 == 0
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    for module in [dataframe_builder, parquet_export]:
+        monkeypatch.setattr(module, 'make_output_dir', lambda: str(tmp_path))
+
+    return str(tmp_path)
+
+
+def export_season(scraper: Scraper, incremental: bool) -> pd.DataFrame:
+    team_schedule_links = [f'schedule.php?teamID={team_id}&season={SEASON}' for team_id in range(1, N_TEAMS + 1)]
+    factory = read_dataframe_builder_factory(SEASON, team_schedule_links, scraper)
+
+    export_dataframes(factory, SEASON, incremental = incremental, output_format = 'parquet')
+    return read_exported_table('schedules', seasons = [SEASON])
+
+
+def test_mixed_reused_and_scraped_rows(output_dir):
+    with FixtureServer(build_fixture_site(n_teams = N_TEAMS, seasons = [SEASON])) as server:
+        scraper = Scraper(base_url = server.base_url, fetcher = Fetcher(max_workers = 1))
+        schedules_df = export_season(scraper, incremental = False)
+
+        METRICS.reset()
+        scraper = PartlyUnchangedScraper(base_url = server.base_url, fetcher = Fetcher(max_workers = 1))
+        reused_schedules_df = export_season(scraper, incremental = True)
+
+    # Both reused and freshly built rows went into the season.
+    counters = METRICS.snapshot()[METRICS.season]['counters']
+    assert counters['teams_reused'] > 0 and counters['schedules_built'] > 0
+
+    pd.testing.assert_frame_equal(reused_schedules_df, schedules_df)
+
+
+def test_duplicate_columns_are_rejected(output_dir):
+    schedules_df = pd.DataFrame({'team': ['Town1 School'], 'name': ['Town1 School']})
+
+    with pytest.raises(ValueError, match = 'team'):
+        write_season_table(schedules_df, 'schedules', SEASON)
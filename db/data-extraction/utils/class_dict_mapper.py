@@ -12,7 +12,7 @@ def class_dict_mapper(object: T) -> dict:
     Returns:
         dictionary (dict)
     """
-    class_attrs = object.__dict__.items
+    class_attrs = object.__dict__.items()
 
     output_dict = {}
     for k, v in class_attrs:
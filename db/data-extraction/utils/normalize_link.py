@@ -0,0 +1,19 @@
+import re
+
+# Links to joeeitel.com show up as relative links or as full urls, with or without
+# "www." and over http or https.
+BASE_URL_REGEX = re.compile(r'^(?:https?://(?:www\.)?joeeitel\.com)?/?(?:hsfoot/)?')
+
+def normalize_link(link: str) -> str:
+    """
+    Returns a link relative to the base url, so that the same page is always
+    referred to by the same link.
+
+    Args:
+        link (str): A relative link or a full url.
+
+    Returns:
+        link (str): e.g. 'schedule.php?teamID=1&season=2015'
+    """
+
+    return BASE_URL_REGEX.sub('', link.strip(), count = 1)